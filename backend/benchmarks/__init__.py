@@ -0,0 +1,5 @@
+"""
+性能基准测试
+
+在合成行情数据上测量回测、信号生成、投票聚合等热点路径，不依赖 PostgreSQL 与 Redis。
+"""
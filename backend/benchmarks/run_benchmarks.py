@@ -0,0 +1,233 @@
+"""
+基准测试运行器
+
+用法（在 backend 目录下）:
+    python -m benchmarks.run_benchmarks                      # 运行并与基线对比
+    python -m benchmarks.run_benchmarks --save-baseline      # 运行并保存为新基线
+    python -m benchmarks.run_benchmarks --bars 1000 --symbols 20 -k backtest
+
+每个用例先用 timeit 自动确定单轮调用次数，再重复多轮取每次调用耗时的统计值。
+与基线相比中位数变慢超过阈值的用例标记为回归，存在回归时以退出码 1 结束。
+基线与数据规模相关，对比时会检查 bars/symbols 是否一致。
+"""
+
+import sys
+import json
+import platform
+import argparse
+import statistics
+import timeit
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Dict, Any, List
+
+import numpy as np
+import pandas as pd
+
+from src.models.stock_models import ModelSignal, DecisionType
+from src.ml_models.indicators import IndicatorCache
+from src.ml_models.technical_models import TECHNICAL_MODEL_CLASSES
+from src.decision_engine.voting import DecisionEngine, VotingConfig, VotingStrategy
+from src.services.stock_service import daily_data_to_frame
+from src.api.models import _format_backtest_result
+from benchmarks.synthetic import generate_universe, to_daily_records
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+
+# 用例注册表: 名称 -> setup(ctx)，setup 返回被计时的无参函数
+BENCHMARKS: Dict[str, Callable[[Dict[str, Any]], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    """注册基准用例"""
+    def decorator(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def _default_model(model_type: str):
+    return TECHNICAL_MODEL_CLASSES[model_type](1)
+
+
+for _model_type in TECHNICAL_MODEL_CLASSES:
+
+    @benchmark(f"backtest[{_model_type}]")
+    def _bench_backtest(ctx, model_type=_model_type):
+        model = _default_model(model_type)
+        data = ctx["primary"]
+        return lambda: model.backtest(data)
+
+    @benchmark(f"generate_signal[{_model_type}]")
+    def _bench_signal(ctx, model_type=_model_type):
+        model = _default_model(model_type)
+        universe = ctx["universe"]
+        return lambda: [model.generate_signal(data) for data in universe.values()]
+
+    @benchmark(f"generate_signal_series[{_model_type}]")
+    def _bench_signal_series(ctx, model_type=_model_type):
+        model = _default_model(model_type)
+        data = ctx["primary"]
+        return lambda: model.generate_signal_series(data)
+
+
+@benchmark("generate_signal[all_models_shared_cache]")
+def _bench_shared_cache(ctx):
+    models = [_default_model(model_type) for model_type in TECHNICAL_MODEL_CLASSES]
+    universe = ctx["universe"]
+
+    def run():
+        for data in universe.values():
+            cache = IndicatorCache()
+            for model in models:
+                model.generate_signal(data, cache)
+    return run
+
+
+def _random_signals(n_sets: int, n_models: int, seed: int = 0) -> List[Dict[int, ModelSignal]]:
+    """生成多组模型信号，每组对应一次投票"""
+    rng = np.random.default_rng(seed)
+    decisions = list(DecisionType)
+    return [
+        {
+            model_id: ModelSignal(
+                model_id=model_id,
+                decision=decisions[rng.integers(len(decisions))],
+                confidence=Decimal(str(round(rng.uniform(0.3, 1.0), 4))),
+                signal_strength=Decimal(str(round(rng.uniform(0.0, 1.0), 4))),
+                reasoning="benchmark"
+            )
+            for model_id in range(1, n_models + 1)
+        }
+        for _ in range(n_sets)
+    ]
+
+
+for _strategy in VotingStrategy:
+
+    @benchmark(f"aggregate_decisions[{_strategy.value}]")
+    def _bench_aggregate(ctx, strategy=_strategy):
+        engine = DecisionEngine(VotingConfig(strategy=strategy))
+        engine.set_model_weights({model_id: 1.0 + model_id / 10 for model_id in range(1, 6)})
+        signal_sets = _random_signals(len(ctx["universe"]) * 20, 5)
+        return lambda: [engine.aggregate_decisions(signals) for signals in signal_sets]
+
+
+@benchmark("stock_service.daily_data_to_frame")
+def _bench_daily_frame(ctx):
+    records = ctx["records"]
+    return lambda: daily_data_to_frame(records)
+
+
+@benchmark("format_backtest_result")
+def _bench_format_backtest(ctx):
+    data = ctx["primary"]
+    backtest_result = _default_model('moving_average_crossover').backtest(data)
+    return lambda: _format_backtest_result(backtest_result, data)
+
+
+def build_context(n_bars: int, n_symbols: int) -> Dict[str, Any]:
+    """生成所有用例共用的合成数据"""
+    universe = generate_universe(n_symbols, n_bars)
+    primary = next(iter(universe.values()))
+    return {
+        "universe": universe,
+        "primary": primary,
+        "records": to_daily_records(primary)
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """测量单次调用耗时（秒）"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    timings = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": repeat,
+        "iterations": number
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any],
+            threshold: float) -> List[str]:
+    """与基线对比，返回回归的用例名称"""
+    regressions = []
+    baseline_results = baseline.get("results", {})
+    print(f"\n与基线对比（{baseline.get('created_at', '未知时间')}，阈值 {threshold:.0%}）")
+    for name, stats in results.items():
+        if name not in baseline_results:
+            print(f"  {name:<50} 新用例")
+            continue
+        ratio = stats["median"] / baseline_results[name]["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- 回归"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  (提升)"
+        print(f"  {name:<50} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="热点路径基准测试")
+    parser.add_argument("--bars", type=int, default=500, help="每只股票的交易日数")
+    parser.add_argument("--symbols", type=int, default=10, help="股票数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例的重复轮数")
+    parser.add_argument("-k", "--filter", default="", help="只运行名称包含该字符串的用例")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定回归的中位数变慢比例")
+    args = parser.parse_args()
+
+    ctx = build_context(args.bars, args.symbols)
+    selected = {name: setup for name, setup in BENCHMARKS.items() if args.filter in name}
+
+    print(f"合成数据: {args.symbols} 只股票 x {args.bars} 个交易日")
+    print(f"  {'用例':<50} {'中位数':>12} {'最小':>12} {'标准差':>12}")
+    results = {}
+    for name, setup in selected.items():
+        stats = measure(setup(ctx), args.repeat)
+        results[name] = stats
+        print(f"  {name:<50} {stats['median'] * 1000:10.3f}ms {stats['min'] * 1000:10.3f}ms "
+              f"{stats['stdev'] * 1000:10.3f}ms")
+
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "bars": args.bars,
+        "symbols": args.symbols,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "results": results
+    }
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n基线已保存: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"\n未找到基线文件 {args.baseline}，使用 --save-baseline 生成")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if (baseline.get("bars"), baseline.get("symbols")) != (args.bars, args.symbols):
+        print(f"\n基线数据规模为 {baseline.get('symbols')} 只股票 x {baseline.get('bars')} 个交易日，"
+              f"与本次不一致，跳过对比")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n发现 {len(regressions)} 个性能回归")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+合成行情数据
+
+几何随机游走生成的日线 OHLCV，固定随机种子保证每次运行的数据一致。
+"""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+
+def generate_ohlcv(n_bars: int, seed: int = 0, start_date: date = date(2015, 1, 5)) -> pd.DataFrame:
+    """生成单只股票的日线数据，列与 StockService.get_stock_data 一致"""
+    rng = np.random.default_rng(seed)
+    trade_dates = pd.bdate_range(start_date, periods=n_bars).date
+
+    returns = rng.normal(0.0003, 0.02, n_bars)
+    close = 10.0 * np.exp(np.cumsum(returns))
+    open_ = close * (1 + rng.normal(0, 0.005, n_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n_bars)))
+    volume = rng.integers(100_000, 10_000_000, n_bars)
+
+    return pd.DataFrame({
+        'trade_date': trade_dates,
+        'open_price': np.round(open_, 4),
+        'high_price': np.round(high, 4),
+        'low_price': np.round(low, 4),
+        'close_price': np.round(close, 4),
+        'volume': volume,
+        'turnover': np.round(volume * close, 2)
+    })
+
+
+def generate_universe(n_symbols: int, n_bars: int) -> Dict[str, pd.DataFrame]:
+    """生成多只股票的日线数据，键为合成股票代码"""
+    return {
+        f"{600000 + i:06d}": generate_ohlcv(n_bars, seed=i)
+        for i in range(n_symbols)
+    }
+
+
+def to_daily_records(data: pd.DataFrame) -> List[SimpleNamespace]:
+    """转换为与 StockDailyData ORM 记录同结构的对象（数值列为 Decimal）"""
+    return [
+        SimpleNamespace(
+            trade_date=row.trade_date,
+            open_price=Decimal(str(row.open_price)),
+            high_price=Decimal(str(row.high_price)),
+            low_price=Decimal(str(row.low_price)),
+            close_price=Decimal(str(row.close_price)),
+            volume=int(row.volume),
+            turnover=Decimal(str(row.turnover))
+        )
+        for row in data.itertuples(index=False)
+    ]
@@ -0,0 +1,6 @@
+"""
+压力测试工具
+
+向本地数据库写入合成的股票池、行情与决策数据，并对主要接口施加并发流量，
+统计各接口的吞吐量与延迟分位数。
+"""
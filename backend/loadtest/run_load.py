@@ -0,0 +1,209 @@
+"""
+并发压测
+
+按权重混合请求主要接口，固定并发持续一段时间，输出各接口的吞吐量与延迟分位数。
+股票代码取自 loadtest.seed 写入的压测股票池。
+
+用法（在 backend 目录下）:
+    python -m loadtest.run_load --base-url http://localhost:8000/api/v1 \
+        --universe 2000 --concurrency 32 --duration 60 --output report.json
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import date, timedelta
+from typing import Callable, Dict, Any, List, Tuple
+import numpy as np
+import httpx
+
+from loadtest.universe import load_symbol
+
+# 场景: 名称 -> (权重, 请求构造函数)，构造函数返回 (方法, 路径, 参数)
+Scenario = Callable[[random.Random, List[str]], Tuple[str, str, Dict[str, Any]]]
+
+
+def _recent_range(rng: random.Random, max_days: int) -> Tuple[date, date]:
+    end_date = date.today() - timedelta(days=rng.randint(0, 30))
+    return end_date - timedelta(days=rng.randint(30, max_days)), end_date
+
+
+def stock_data(rng, symbols):
+    start_date, end_date = _recent_range(rng, 730)
+    return "GET", f"/stocks/{rng.choice(symbols)}/data", {
+        "params": {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    }
+
+
+def decision_generate(rng, symbols):
+    return "POST", "/decisions/generate", {"json": {
+        "symbol": rng.choice(symbols),
+        "trade_date": (date.today() - timedelta(days=rng.randint(0, 5))).isoformat(),
+        "current_position": rng.choice([0, 0.5, 1])
+    }}
+
+
+def decision_batch(rng, symbols):
+    return "POST", "/decisions/batch", {"json": {
+        "symbols": rng.sample(symbols, min(10, len(symbols))),
+        "trade_date": date.today().isoformat()
+    }}
+
+
+def backtest_model(rng, symbols):
+    start_date, end_date = _recent_range(rng, 365)
+    return "POST", "/backtest/model", {"json": {
+        "symbol": rng.choice(symbols),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "initial_capital": 100000
+    }}
+
+
+def backtest_portfolio(rng, symbols):
+    start_date, end_date = _recent_range(rng, 365)
+    return "POST", "/backtest/portfolio", {"json": {
+        "symbols": rng.sample(symbols, min(5, len(symbols))),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "initial_capital": 100000
+    }}
+
+
+def backtest_compare(rng, symbols):
+    start_date, end_date = _recent_range(rng, 365)
+    return "POST", "/backtest/compare", {"json": [
+        {"symbol": symbol, "start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+        for symbol in rng.sample(symbols, min(3, len(symbols)))
+    ]}
+
+
+def model_performance(rng, symbols):
+    return "GET", "/models/performance", {}
+
+
+SCENARIOS: Dict[str, Tuple[float, Scenario]] = {
+    "stocks.data": (30, stock_data),
+    "decisions.generate": (25, decision_generate),
+    "decisions.batch": (10, decision_batch),
+    "backtest.model": (10, backtest_model),
+    "backtest.portfolio": (5, backtest_portfolio),
+    "backtest.compare": (5, backtest_compare),
+    "models.performance": (15, model_performance),
+}
+
+
+async def worker(client: httpx.AsyncClient, rng: random.Random, symbols: List[str],
+                 scenarios: Dict[str, Tuple[float, Scenario]], deadline: float,
+                 samples: Dict[str, List[Tuple[float, int]]]):
+    """持续发送请求直到截止时间，记录 (耗时, 状态码)，请求失败记为状态码0"""
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, kwargs = scenarios[name][1](rng, symbols)
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status_code = response.status_code
+        except httpx.HTTPError:
+            status_code = 0
+        samples[name].append((time.perf_counter() - started, status_code))
+
+
+def summarize(samples: Dict[str, List[Tuple[float, int]]], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    """各场景吞吐量与延迟分位数（毫秒）"""
+    report = {}
+    for name, records in samples.items():
+        if not records:
+            continue
+        latencies = np.array([latency for latency, _ in records]) * 1000
+        errors = sum(1 for _, status_code in records if not 200 <= status_code < 300)
+        report[name] = {
+            "requests": len(records),
+            "errors": errors,
+            "throughput_rps": round(len(records) / elapsed, 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "max_ms": round(float(latencies.max()), 2)
+        }
+    return report
+
+
+async def run(base_url: str, universe: int, concurrency: int, duration: float,
+              warmup: float, scenario_names: List[str], timeout: float) -> Dict[str, Any]:
+    symbols = [load_symbol(i) for i in range(universe)]
+    scenarios = {name: SCENARIOS[name] for name in scenario_names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        if warmup > 0:
+            discard = {name: [] for name in scenarios}
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*[
+                worker(client, random.Random(-i - 1), symbols, scenarios, deadline, discard)
+                for i in range(concurrency)
+            ])
+
+        samples = {name: [] for name in scenarios}
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            worker(client, random.Random(i), symbols, scenarios, started + duration, samples)
+            for i in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(records) for records in samples.values())
+    return {
+        "base_url": base_url,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "total_requests": total,
+        "total_throughput_rps": round(total / elapsed, 2),
+        "endpoints": summarize(samples, elapsed)
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\n并发 {report['concurrency']}，持续 {report['duration_s']} 秒，"
+          f"共 {report['total_requests']} 个请求，{report['total_throughput_rps']} req/s")
+    print(f"  {'接口':<22}{'请求数':>8}{'错误':>7}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for name, stats in report["endpoints"].items():
+        print(f"  {name:<22}{stats['requests']:>8}{stats['errors']:>7}{stats['throughput_rps']:>9}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API并发压测")
+    parser.add_argument("--base-url", default="http://localhost:8000/api/v1", help="API根地址")
+    parser.add_argument("--universe", type=int, default=2000, help="压测股票数量，需与写入时一致")
+    parser.add_argument("--concurrency", type=int, default=32, help="并发请求数")
+    parser.add_argument("--duration", type=float, default=60, help="压测时长（秒）")
+    parser.add_argument("--warmup", type=float, default=5, help="预热时长（秒），不计入统计")
+    parser.add_argument("--timeout", type=float, default=120, help="单个请求超时（秒）")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"逗号分隔的场景，可选: {', '.join(SCENARIOS)}")
+    parser.add_argument("--output", help="将报告写入JSON文件")
+    args = parser.parse_args()
+
+    scenario_names = [name for name in args.scenarios.split(",") if name]
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知的场景: {', '.join(unknown)}")
+
+    report = asyncio.run(run(
+        args.base_url, args.universe, args.concurrency, args.duration,
+        args.warmup, scenario_names, args.timeout
+    ))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n报告已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
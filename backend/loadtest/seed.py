@@ -0,0 +1,192 @@
+"""
+压测数据写入
+
+生成合成股票池（市场代码 LOAD）及其多年日线、近期模型决策、综合决策和模型绩效，
+使用 COPY 批量写入。只应指向本地或专用的压测数据库。
+
+用法（在 backend 目录下）:
+    python -m loadtest.seed --symbols 2000 --years 5 --decision-days 60 --reset
+"""
+
+import asyncio
+import argparse
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from src.config.database import engine
+from benchmarks.synthetic import generate_ohlcv
+from loadtest.universe import LOAD_MARKET, load_symbol
+
+# 每批写入的股票数量
+SYMBOL_BATCH_SIZE = 50
+
+# COPY 不经过应用的写入路径，按 migrate_005 的方式为新股票回填最新K线快照
+LATEST_BARS_SQL = """
+    INSERT INTO latest_bars (stock_id, daily_data_id, trade_date, open_price, high_price, low_price,
+                             close_price, volume, turnover, created_at)
+    SELECT DISTINCT ON (stock_id)
+        stock_id, id, trade_date, open_price, high_price, low_price,
+        close_price, volume, turnover, created_at
+    FROM stock_daily_data
+    WHERE stock_id = ANY($1::bigint[])
+    ORDER BY stock_id, trade_date DESC
+    ON CONFLICT (stock_id) DO UPDATE SET
+        daily_data_id = EXCLUDED.daily_data_id,
+        trade_date = EXCLUDED.trade_date,
+        open_price = EXCLUDED.open_price,
+        high_price = EXCLUDED.high_price,
+        low_price = EXCLUDED.low_price,
+        close_price = EXCLUDED.close_price,
+        volume = EXCLUDED.volume,
+        turnover = EXCLUDED.turnover,
+        created_at = EXCLUDED.created_at,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def _decimal(value: float, places: int = 4) -> Decimal:
+    return Decimal(f"{value:.{places}f}")
+
+
+def _bar_records(stock_id: int, data: pd.DataFrame) -> List[Tuple]:
+    return [
+        (stock_id, row.trade_date, _decimal(row.open_price), _decimal(row.high_price),
+         _decimal(row.low_price), _decimal(row.close_price), int(row.volume), _decimal(row.turnover, 2))
+        for row in data.itertuples(index=False)
+    ]
+
+
+def _decision_records(stock_id: int, trade_dates, model_ids: List[int],
+                      rng: np.random.Generator) -> Tuple[List[Tuple], List[Tuple]]:
+    """随机生成近期的模型决策与综合决策"""
+    choices = np.array(["BUY", "SELL", "HOLD"])
+    model_rows, final_rows = [], []
+    for trade_date in trade_dates:
+        decisions = choices[rng.integers(0, 3, len(model_ids))]
+        for model_id, decision in zip(model_ids, decisions):
+            model_rows.append((
+                stock_id, model_id, trade_date, str(decision),
+                _decimal(rng.uniform(0.5, 1.0)), _decimal(rng.uniform(0.0, 1.0)), "压测数据"
+            ))
+        votes = {choice: int((decisions == choice).sum()) for choice in choices}
+        final_rows.append((
+            stock_id, trade_date, votes["BUY"], votes["SELL"], votes["HOLD"],
+            max(votes, key=votes.get), _decimal(rng.uniform(0.5, 1.0)),
+            str(rng.choice(["LOW", "MEDIUM", "HIGH"]))
+        ))
+    return model_rows, final_rows
+
+
+async def seed(n_symbols: int, years: int, decision_days: int, reset: bool):
+    """写入压测数据"""
+    end_date = date.today()
+    start_date = end_date - timedelta(days=365 * years)
+    n_bars = len(pd.bdate_range(start_date, end_date))
+    rng = np.random.default_rng(0)
+    started = datetime.now()
+
+    async with engine.connect() as conn:
+        if reset:
+            # 级联删除行情、决策与特征
+            await conn.execute(text("DELETE FROM stocks WHERE market = :market"), {"market": LOAD_MARKET})
+            await conn.commit()
+
+        result = await conn.execute(text("SELECT id FROM backtest_models WHERE is_active = TRUE ORDER BY id"))
+        model_ids = [row[0] for row in result]
+
+        raw = await conn.get_raw_connection()
+        pg = raw.driver_connection
+
+        symbols = [load_symbol(i) for i in range(n_symbols)]
+        existing = {row["symbol"] for row in await pg.fetch(
+            "SELECT symbol FROM stocks WHERE symbol = ANY($1::varchar[])", symbols
+        )}
+        new_symbols = [symbol for symbol in symbols if symbol not in existing]
+        if not new_symbols:
+            print("压测股票已存在，使用 --reset 重新生成")
+            return
+
+        await pg.copy_records_to_table(
+            "stocks",
+            records=[(symbol, f"压测股票{symbol[2:]}", LOAD_MARKET, True) for symbol in new_symbols],
+            columns=["symbol", "name", "market", "is_active"]
+        )
+        stock_ids = {row["symbol"]: row["id"] for row in await pg.fetch(
+            "SELECT id, symbol FROM stocks WHERE symbol = ANY($1::varchar[])", new_symbols
+        )}
+
+        total_bars = total_decisions = 0
+        for batch_start in range(0, len(new_symbols), SYMBOL_BATCH_SIZE):
+            bar_rows, model_rows, final_rows = [], [], []
+            for symbol in new_symbols[batch_start:batch_start + SYMBOL_BATCH_SIZE]:
+                data = generate_ohlcv(n_bars, seed=int(symbol[2:]), start_date=start_date)
+                stock_id = stock_ids[symbol]
+                bar_rows.extend(_bar_records(stock_id, data))
+                if model_ids and decision_days:
+                    models, finals = _decision_records(
+                        stock_id, data['trade_date'].iloc[-decision_days:], model_ids, rng
+                    )
+                    model_rows.extend(models)
+                    final_rows.extend(finals)
+
+            await pg.copy_records_to_table(
+                "stock_daily_data", records=bar_rows,
+                columns=["stock_id", "trade_date", "open_price", "high_price", "low_price",
+                         "close_price", "volume", "turnover"]
+            )
+            if model_rows:
+                await pg.copy_records_to_table(
+                    "model_decisions", records=model_rows,
+                    columns=["stock_id", "model_id", "trade_date", "decision",
+                             "confidence", "signal_strength", "reasoning"]
+                )
+                await pg.copy_records_to_table(
+                    "final_decisions", records=final_rows,
+                    columns=["stock_id", "trade_date", "buy_votes", "sell_votes", "hold_votes",
+                             "final_decision", "confidence_score", "risk_level"]
+                )
+            total_bars += len(bar_rows)
+            total_decisions += len(final_rows)
+            print(f"  已写入 {min(batch_start + SYMBOL_BATCH_SIZE, len(new_symbols))}/{len(new_symbols)} 只股票")
+
+        # 模型绩效，供 /models/performance 使用
+        for model_id in model_ids:
+            await pg.execute(
+                """
+                INSERT INTO model_performance (model_id, backtest_date, accuracy, total_return, sharpe_ratio, max_drawdown)
+                VALUES ($1, $2, $3, $4, $5, $6)
+                ON CONFLICT (model_id, backtest_date) DO NOTHING
+                """,
+                model_id, end_date, _decimal(rng.uniform(0.4, 0.7)), _decimal(rng.uniform(-0.2, 0.5)),
+                _decimal(rng.uniform(-0.5, 2.0)), _decimal(-rng.uniform(0.05, 0.4))
+            )
+
+        # 最新K线快照，供 /stocks/latest 使用
+        await pg.execute(LATEST_BARS_SQL, list(stock_ids.values()))
+
+        await pg.execute("ANALYZE stocks; ANALYZE stock_daily_data; ANALYZE latest_bars; "
+                         "ANALYZE model_decisions; ANALYZE final_decisions")
+        await conn.commit()
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"写入完成: {len(new_symbols)} 只股票, {total_bars} 条日线, {total_decisions} 条综合决策, 耗时 {elapsed:.1f} 秒")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="写入压测数据")
+    parser.add_argument("--symbols", type=int, default=2000, help="股票数量")
+    parser.add_argument("--years", type=int, default=5, help="日线年数")
+    parser.add_argument("--decision-days", type=int, default=60, help="生成决策的最近交易日数")
+    parser.add_argument("--reset", action="store_true", help="先删除已有的压测数据")
+    args = parser.parse_args()
+
+    await seed(args.symbols, args.years, args.decision_days, args.reset)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,12 @@
+"""
+压测股票池约定
+
+写入数据与发送流量两端共用的股票代码规则。
+"""
+
+LOAD_MARKET = "LOAD"
+
+
+def load_symbol(index: int) -> str:
+    """压测股票代码"""
+    return f"LT{index:06d}"
@@ -2,23 +2,28 @@
 回测分析API
 """
 
-from datetime import date, timedelta
+import json
+import asyncio
+from datetime import date
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_
 
-from src.config.database import get_db_session
+from src.config.database import get_db_session, get_read_session
 from src.models.stock_models import (
-    BacktestRequest, PortfolioBacktestRequest, APIResponse
+    BacktestRequest, PortfolioBacktestRequest, WalkForwardRequest, BacktestJobRequest, APIResponse
 )
 from src.models.database import (
-    Stock, StockDailyData, BacktestModel, ModelDecision,
+    StockDailyData, BacktestModel, ModelDecision,
     FinalDecision, ModelPerformance
 )
-from src.services.stock_service import StockService
+from src.services.backtest_jobs import backtest_job_queue, report_progress, JobStatus, FINISHED_STATUSES
+from src.api.responses import FastJSONRoute
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.post("/backtest/model", response_model=APIResponse)
@@ -26,6 +31,9 @@ async def run_model_backtest(
     backtest_request: BacktestRequest
 ):
     """运行模型回测"""
+    from src.services.stock_service import StockService
+    from src.services.backtest_runs import record_backtest_run
+
     async with get_db_session() as session:
         symbol = backtest_request.symbol
         start_date = backtest_request.start_date
@@ -35,8 +43,8 @@ async def run_model_backtest(
         
         # 验证股票是否存在
         stock_service = StockService(session)
-        stock = await stock_service.get_stock_by_symbol(symbol)
-        if not stock:
+        stock_id = await stock_service.get_stock_id(symbol)
+        if stock_id is None:
             raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
         
         # 获取股票历史数据
@@ -58,7 +66,7 @@ async def run_model_backtest(
             .join(BacktestModel, ModelDecision.model_id == BacktestModel.id)
             .where(
                 and_(
-                    ModelDecision.stock_id == stock.id,
+                    ModelDecision.stock_id == stock_id,
                     ModelDecision.trade_date >= start_date,
                     ModelDecision.trade_date <= end_date,
                     *model_conditions
@@ -141,17 +149,32 @@ async def run_model_backtest(
                 "signals": signals
             }
         
+        parameters = {
+            "symbol": symbol,
+            "start_date": start_date,
+            "end_date": end_date,
+            "initial_capital": initial_capital,
+            "model_ids": model_ids
+        }
+        run_id = await record_backtest_run(
+            session,
+            run_type="model",
+            parameters=parameters,
+            metrics={k: v for k, v in backtest_result.items() if k not in ("trades", "equity_curve", "signals")},
+            trades=trades,
+            equity_curve=equity_curve,
+            symbol=symbol,
+            model_id=model_ids[0] if model_ids and len(model_ids) == 1 else None,
+            start_date=start_date,
+            end_date=end_date
+        )
+        
         return APIResponse(
             data={
+                "run_id": run_id,
                 "symbol": symbol,
                 "backtest_result": backtest_result,
-                "parameters": {
-                    "symbol": symbol,
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "initial_capital": initial_capital,
-                    "model_ids": model_ids
-                }
+                "parameters": parameters
             },
             message="回测完成",
             status="success"
@@ -163,6 +186,10 @@ async def run_portfolio_backtest(
     portfolio_request: PortfolioBacktestRequest
 ):
     """执行组合回测"""
+    from src.services.stock_service import StockService
+    from src.services.backtest_runs import record_backtest_run
+    from src.services.trading_calendar import get_trading_calendar, FREQUENCIES
+
     async with get_db_session() as session:
         symbols = portfolio_request.symbols
         start_date = portfolio_request.start_date
@@ -174,9 +201,10 @@ async def run_portfolio_backtest(
         
         # 验证所有股票是否存在
         stocks_data = []
-        for symbol in symbols:
-            stock = await stock_service.get_stock_by_symbol(symbol)
-            if not stock:
+        for i, symbol in enumerate(symbols):
+            await report_progress(i / len(symbols), f"加载 {symbol} 行情")
+            stock_id = await stock_service.get_stock_id(symbol)
+            if stock_id is None:
                 raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
             
             # 获取股票历史数据
@@ -186,7 +214,7 @@ async def run_portfolio_backtest(
                     stocks_data.append({
                         "symbol": symbol,
                         "data": stock_data,
-                        "stock": stock
+                        "stock_id": stock_id
                     })
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"获取股票 {symbol} 数据失败: {str(e)}")
@@ -228,18 +256,13 @@ async def run_portfolio_backtest(
                 else:
                     correlation_matrix[symbol1][symbol2] = 0.3  # 简化假设
         
-        # 生成重新平衡日期（基于频率）
+        # 生成重新平衡日期: 区间内每个周期的最后一个交易日
+        calendar = get_trading_calendar()
         rebalance_dates = []
-        if rebalance_frequency == "monthly":
-            # 每月重新平衡
-            current_date = start_date
-            while current_date <= end_date:
-                rebalance_dates.append(current_date.strftime("%Y-%m-%d"))
-                # 下个月
-                if current_date.month == 12:
-                    current_date = current_date.replace(year=current_date.year + 1, month=1)
-                else:
-                    current_date = current_date.replace(month=current_date.month + 1)
+        if rebalance_frequency in FREQUENCIES:
+            rebalance_dates = [
+                str(day) for day in calendar.period_ends(start_date, end_date, rebalance_frequency)
+            ]
         
         # 生成权益曲线（简化版）
         equity_curve = []
@@ -254,7 +277,7 @@ async def run_portfolio_backtest(
         
         portfolio_result = {
             "total_return": float(portfolio_return),
-            "annual_return": float(portfolio_return * 252 / len(stocks_data[0]["data"])),  # 年化
+            "annual_return": float(portfolio_return * calendar.annualization_factor() / len(stocks_data[0]["data"])),  # 年化
             "volatility": 0.198,  # 需要计算
             "sharpe_ratio": 1.348,  # 需要计算
             "max_drawdown": 0.089,  # 需要计算
@@ -267,27 +290,123 @@ async def run_portfolio_backtest(
             "equity_curve": equity_curve
         }
         
+        parameters = {
+            "symbols": symbols,
+            "start_date": start_date,
+            "end_date": end_date,
+            "initial_capital": initial_capital,
+            "rebalance_frequency": rebalance_frequency
+        }
+        run_id = await record_backtest_run(
+            session,
+            run_type="portfolio",
+            parameters=parameters,
+            metrics={k: v for k, v in portfolio_result.items() if k != "equity_curve"},
+            trades=[],
+            equity_curve=equity_curve,
+            start_date=start_date,
+            end_date=end_date
+        )
+        
         return APIResponse(
             data={
+                "run_id": run_id,
                 "portfolio_result": portfolio_result,
-                "parameters": {
-                    "symbols": symbols,
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "initial_capital": initial_capital,
-                    "rebalance_frequency": rebalance_frequency
-                }
+                "parameters": parameters
             },
             message="组合回测完成",
             status="success"
         )
 
 
+@router.post("/backtest/walk-forward", response_model=APIResponse)
+async def run_walk_forward(
+    request: WalkForwardRequest
+):
+    """滚动前推优化与样本外评估"""
+    from src.services.stock_service import StockService
+    from src.services.walk_forward import WalkForwardEngine, save_walk_forward_performance
+    from src.services.backtest_runs import record_backtest_run
+
+    async with get_db_session() as session:
+        result = await session.execute(
+            select(BacktestModel).where(BacktestModel.id == request.model_id)
+        )
+        model = result.scalar_one_or_none()
+        
+        if not model:
+            raise HTTPException(status_code=404, detail=f"模型 {request.model_id} 不存在")
+        
+        stock_service = StockService(session)
+        try:
+            stock_data = await stock_service.get_stock_data(request.symbol, request.start_date, request.end_date)
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        
+        if stock_data.empty:
+            raise HTTPException(status_code=404, detail=f"股票 {request.symbol} 在指定时间段内无数据")
+        
+        try:
+            walk_forward_result = await WalkForwardEngine().run(
+                model_type=model.model_type,
+                model_id=model.id,
+                data=stock_data,
+                base_params=model.parameters or {},
+                param_grid=request.param_grid,
+                train_window=request.train_window,
+                test_window=request.test_window,
+                anchored=request.anchored,
+                objective=request.objective,
+                initial_capital=float(request.initial_capital)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        # 样本外绩效写入模型性能表，供模型性能接口展示
+        if request.save_performance:
+            await save_walk_forward_performance(
+                session,
+                model.id,
+                walk_forward_result["windows"][-1]["test_end"],
+                walk_forward_result["out_of_sample_metrics"]
+            )
+        
+        run_id = await record_backtest_run(
+            session,
+            run_type="walk-forward",
+            parameters=request.model_dump(),
+            metrics={
+                **walk_forward_result["out_of_sample_metrics"],
+                "windows": walk_forward_result["windows"]
+            },
+            trades=walk_forward_result["trades"],
+            equity_curve=walk_forward_result["equity_curve"],
+            symbol=request.symbol,
+            model_id=model.id,
+            start_date=request.start_date,
+            end_date=request.end_date
+        )
+        
+        return APIResponse(
+            data={
+                "run_id": run_id,
+                "model_id": model.id,
+                "symbol": request.symbol,
+                "walk_forward_result": walk_forward_result,
+                "parameters": request.model_dump()
+            },
+            message="滚动前推评估完成",
+            status="success"
+        )
+
+
 @router.post("/backtest/compare", response_model=APIResponse)
 async def compare_backtest_results(
     backtest_requests: List[BacktestRequest]
 ):
     """比较多个回测结果"""
+    from src.services.stock_service import StockService
+
     async with get_db_session() as session:
         if not backtest_requests:
             raise HTTPException(status_code=400, detail="至少需要一个回测请求")
@@ -300,10 +419,11 @@ async def compare_backtest_results(
             start_date = request.start_date
             end_date = request.end_date
             model_ids = request.model_ids
+            await report_progress(i / len(backtest_requests), f"比较 {symbol}")
             
             # 验证股票是否存在
-            stock = await stock_service.get_stock_by_symbol(symbol)
-            if not stock:
+            stock_id = await stock_service.get_stock_id(symbol)
+            if stock_id is None:
                 comparison_results.append({
                     "symbol": symbol,
                     "model_id": model_ids[0] if model_ids else i + 1,
@@ -420,159 +540,235 @@ async def compare_backtest_results(
         )
 
 
+@router.get("/backtest/results/compare", response_model=APIResponse)
+async def compare_backtest_runs(
+    ids: str = Query(..., description="回测运行ID，逗号分隔")
+):
+    """对比已保存的回测运行，直接读取存储的指标与权益曲线"""
+    from src.services.backtest_runs import BacktestRunService
+
+    try:
+        run_ids = [int(run_id) for run_id in ids.split(",") if run_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="回测运行ID必须为整数")
+    if not run_ids:
+        raise HTTPException(status_code=400, detail="至少需要一个回测运行ID")
+    
+    # 回测运行ID通常刚由回测接口或任务结果返回，读主库避免复制延迟
+    async with get_read_session(primary=True) as session:
+        runs = await BacktestRunService(session).compare_runs(run_ids)
+    
+    missing = sorted(set(run_ids) - {run["id"] for run in runs})
+    if missing:
+        raise HTTPException(status_code=404, detail=f"回测结果 {', '.join(map(str, missing))} 不存在")
+    
+    returns = [run["results"].get("total_return", 0.0) for run in runs]
+    summary = {
+        "best_run": runs[returns.index(max(returns))]["id"],
+        "worst_run": runs[returns.index(min(returns))]["id"],
+        "avg_return": sum(returns) / len(returns)
+    }
+    
+    return APIResponse(
+        data={"runs": runs, "summary": summary},
+        message="回测结果对比完成",
+        status="success"
+    )
+
+
 @router.get("/backtest/results/{result_id}", response_model=APIResponse)
 async def get_backtest_result(
     result_id: int
 ):
     """获取回测结果详情"""
-    async with get_db_session() as session:
-        # 查询模型性能数据作为回测结果
-        performance_result = await session.execute(
-            select(ModelPerformance, BacktestModel)
-            .join(BacktestModel, ModelPerformance.model_id == BacktestModel.id)
-            .where(ModelPerformance.id == result_id)
-        )
-        performance_data = performance_result.first()
-        
-        if not performance_data:
-            raise HTTPException(status_code=404, detail=f"回测结果 {result_id} 不存在")
-        
-        performance, model = performance_data
-        
-        # 获取该模型最近的决策记录作为交易记录
-        trades_result = await session.execute(
-            select(ModelDecision, Stock)
-            .join(Stock, ModelDecision.stock_id == Stock.id)
-            .where(
-                and_(
-                    ModelDecision.model_id == model.id,
-                    ModelDecision.trade_date >= performance.backtest_date - timedelta(days=30),
-                    ModelDecision.trade_date <= performance.backtest_date
-                )
-            )
-            .order_by(ModelDecision.trade_date.desc())
-            .limit(10)
-        )
-        trades_data = trades_result.all()
-        
-        # 构建交易记录
-        trades = []
-        for i, (decision, stock) in enumerate(trades_data):
-            trades.append({
-                "id": i + 1,
-                "type": decision.decision,
-                "date": decision.trade_date.strftime("%Y-%m-%d"),
-                "price": float(decision.confidence * 100) if decision.confidence else 0,  # 简化价格计算
-                "shares": 1000,  # 简化股数
-                "value": 100000,  # 简化价值
-                "profit": 500 if decision.decision == "SELL" else 0,  # 简化利润
-                "reason": f"{model.name}信号",
-                "symbol": stock.symbol
-            })
-        
-        return APIResponse(
-            data={
-                "id": performance.id,
-                "model_id": model.id,
-                "model_name": model.name,
-                "backtest_date": performance.backtest_date.strftime("%Y-%m-%d"),
-                "results": {
-                    "total_return": float(performance.total_return) if performance.total_return else 0.0,
-                    "annual_return": 0.0,  # 需要计算
-                    "volatility": 0.0,     # 需要计算
-                    "sharpe_ratio": float(performance.sharpe_ratio) if performance.sharpe_ratio else 0.0,
-                    "max_drawdown": float(performance.max_drawdown) if performance.max_drawdown else 0.0,
-                    "win_rate": float(performance.accuracy) if performance.accuracy else 0.0,
-                    "profit_factor": 1.0,  # 需要计算
-                    "total_trades": len(trades),
-                    "winning_trades": len([t for t in trades if t.get('profit', 0) > 0]),
-                    "losing_trades": len([t for t in trades if t.get('profit', 0) < 0])
-                },
-                "trades": trades,
-                "created_at": performance.created_at.strftime("%Y-%m-%dT%H:%M:%SZ") if performance.created_at else "2025-10-16T10:00:00Z"
-            },
-            message="获取回测结果详情成功",
-            status="success"
-        )
+    from src.services.backtest_runs import BacktestRunService
+
+    # 刚写入的回测运行在副本上可能尚不可见，读主库避免 404
+    async with get_read_session(primary=True) as session:
+        run = await BacktestRunService(session).get_run(result_id)
+    
+    if not run:
+        raise HTTPException(status_code=404, detail=f"回测结果 {result_id} 不存在")
+    
+    return APIResponse(
+        data={
+            **run,
+            "backtest_date": run["created_at"].strftime("%Y-%m-%d")
+        },
+        message="获取回测结果详情成功",
+        status="success"
+    )
 
 
 @router.get("/backtest/results", response_model=APIResponse)
 async def get_backtest_results(
     symbol: Optional[str] = None,
     model_id: Optional[int] = None,
+    run_type: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    skip: int = 0,
-    limit: int = 100
+    skip: int = Query(0, ge=0, description="跳过记录数"),
+    limit: int = Query(100, ge=1, le=1000, description="返回记录数"),
+    cursor: Optional[int] = Query(None, description="上一页返回的 next_cursor，传入时忽略 skip")
 ):
     """获取回测结果列表"""
-    async with get_db_session() as session:
-        # 构建查询条件
-        conditions = []
-        
-        if model_id:
-            conditions.append(ModelPerformance.model_id == model_id)
-    
-    if start_date:
-        conditions.append(ModelPerformance.backtest_date >= start_date)
-    
-    if end_date:
-        conditions.append(ModelPerformance.backtest_date <= end_date)
-    
-    # 查询模型性能数据
-    query = (
-        select(ModelPerformance, BacktestModel)
-        .join(BacktestModel, ModelPerformance.model_id == BacktestModel.id)
-        .where(and_(*conditions))
-        .order_by(ModelPerformance.backtest_date.desc())
-        .offset(skip)
-        .limit(limit)
-    )
-    
-    result = await session.execute(query)
-    performance_data = result.all()
-    
-    # 构建结果列表
-    results_list = []
-    for performance, model in performance_data:
-        # 获取该模型对应的股票（简化处理，取第一个有决策的股票）
-        stock_result = await session.execute(
-            select(Stock)
-            .join(ModelDecision, Stock.id == ModelDecision.stock_id)
-            .where(ModelDecision.model_id == model.id)
-            .limit(1)
+    from src.services.backtest_runs import BacktestRunService
+
+    # 刚完成的回测应立即出现在列表中
+    async with get_read_session(primary=True) as session:
+        runs = await BacktestRunService(session).list_runs(
+            symbol=symbol,
+            model_id=model_id,
+            run_type=run_type,
+            start_date=start_date,
+            end_date=end_date,
+            skip=skip,
+            limit=limit,
+            before_id=cursor
         )
-        stock = stock_result.scalar_one_or_none()
-        
-        results_list.append({
-            "id": performance.id,
-            "symbol": stock.symbol if stock else "N/A",
-            "model_id": model.id,
-            "model_name": model.name,
-            "backtest_date": performance.backtest_date.strftime("%Y-%m-%d"),
-            "total_return": float(performance.total_return) if performance.total_return else 0.0,
-            "sharpe_ratio": float(performance.sharpe_ratio) if performance.sharpe_ratio else 0.0,
-            "max_drawdown": float(performance.max_drawdown) if performance.max_drawdown else 0.0,
-            "created_at": performance.created_at.strftime("%Y-%m-%dT%H:%M:%SZ") if performance.created_at else "2025-10-16T10:00:00Z"
-        })
-    
-    # 获取总数
-    count_query = select(func.count(ModelPerformance.id)).where(and_(*conditions))
-    total_result = await session.execute(count_query)
-    total = total_result.scalar()
-    
-    # 应用符号过滤（在查询后过滤）
-    if symbol:
-        results_list = [r for r in results_list if r["symbol"] == symbol]
-        total = len(results_list)
     
     return APIResponse(
         data={
-            "results": results_list,
-            "total": total,
-            "skip": skip,
-            "limit": limit
+            "results": runs["results"],
+            "total": runs["total"],
+            "skip": 0 if cursor else skip,
+            "limit": limit,
+            "next_cursor": runs["next_cursor"]
         },
         message="获取回测结果列表成功",
         status="success"
-    )
\ No newline at end of file
+    )
+
+
+# 异步回测任务: 类型 -> (请求模型, 同步回测接口)
+BACKTEST_JOB_KINDS = {
+    "model": (BacktestRequest, run_model_backtest),
+    "portfolio": (PortfolioBacktestRequest, run_portfolio_backtest),
+    "walk-forward": (WalkForwardRequest, run_walk_forward),
+    "compare": (List[BacktestRequest], compare_backtest_results),
+}
+
+# SSE 轮询任务状态的间隔（秒）
+JOB_EVENTS_POLL_INTERVAL = 1.0
+
+
+def _parse_job_payload(kind: str, payload):
+    """按任务类型校验请求体"""
+    request_model, _ = BACKTEST_JOB_KINDS[kind]
+    if kind == "compare":
+        if not isinstance(payload, list):
+            raise ValueError("compare 任务的请求体必须是回测请求列表")
+        return [BacktestRequest(**item) for item in payload]
+    if not isinstance(payload, dict):
+        raise ValueError(f"{kind} 任务的请求体必须是对象")
+    return request_model(**payload)
+
+
+def _make_job_handler(kind: str):
+    """将同步回测接口包装为任务执行函数，返回接口响应中的数据"""
+    _, endpoint = BACKTEST_JOB_KINDS[kind]
+
+    async def handler(payload):
+        response = await endpoint(_parse_job_payload(kind, payload))
+        return response.data
+
+    return handler
+
+
+for _kind in BACKTEST_JOB_KINDS:
+    backtest_job_queue.register(_kind, _make_job_handler(_kind))
+
+
+@router.post("/backtest/jobs", response_model=APIResponse)
+async def submit_backtest_job(job_request: BacktestJobRequest):
+    """提交异步回测任务，相同参数的任务只执行一次"""
+    if job_request.kind not in BACKTEST_JOB_KINDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的任务类型: {job_request.kind}，可选: {', '.join(BACKTEST_JOB_KINDS)}"
+        )
+    try:
+        parsed = _parse_job_payload(job_request.kind, job_request.payload)
+    except (ValidationError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"任务参数无效: {e}")
+
+    payload = [item.model_dump() for item in parsed] if isinstance(parsed, list) else parsed.model_dump()
+    try:
+        job, deduplicated = await backtest_job_queue.submit(job_request.kind, payload)
+    except Exception as e:
+        print(f"提交回测任务失败: {e}")
+        raise HTTPException(status_code=503, detail=f"回测任务队列不可用: {str(e)}")
+
+    return APIResponse(
+        data={**job, "deduplicated": deduplicated},
+        message="已存在相同的回测任务" if deduplicated else "回测任务已提交",
+        status="success"
+    )
+
+
+async def _get_job_or_404(job_id: str):
+    job = await backtest_job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"回测任务 {job_id} 不存在")
+    return job
+
+
+@router.get("/backtest/jobs/{job_id}", response_model=APIResponse)
+async def get_backtest_job(job_id: str):
+    """获取回测任务状态与进度"""
+    job = await _get_job_or_404(job_id)
+
+    return APIResponse(
+        data=job,
+        message="获取回测任务成功",
+        status="success"
+    )
+
+
+@router.get("/backtest/jobs/{job_id}/result", response_model=APIResponse)
+async def get_backtest_job_result(job_id: str):
+    """获取已完成回测任务的结果"""
+    job = await _get_job_or_404(job_id)
+    if job["status"] == JobStatus.FAILED.value:
+        raise HTTPException(status_code=409, detail=f"回测任务执行失败: {job['error']}")
+    if job["status"] != JobStatus.SUCCEEDED.value:
+        raise HTTPException(status_code=409, detail=f"回测任务尚未完成，当前状态: {job['status']}")
+
+    result = await backtest_job_queue.get_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"回测任务 {job_id} 的结果已过期")
+
+    return APIResponse(
+        data={"job": job, "result": result},
+        message="获取回测结果成功",
+        status="success"
+    )
+
+
+@router.get("/backtest/jobs/{job_id}/events")
+async def stream_backtest_job_events(job_id: str, request: Request):
+    """以 Server-Sent Events 推送任务进度，任务结束后关闭连接"""
+    await _get_job_or_404(job_id)
+
+    async def event_stream():
+        last_snapshot = None
+        while not await request.is_disconnected():
+            job = await backtest_job_queue.get(job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': '任务已过期'}, ensure_ascii=False)}\n\n"
+                break
+
+            snapshot = json.dumps(job, ensure_ascii=False, default=str)
+            if snapshot != last_snapshot:
+                yield f"event: progress\ndata: {snapshot}\n\n"
+                last_snapshot = snapshot
+            if job["status"] in FINISHED_STATUSES:
+                yield f"event: done\ndata: {snapshot}\n\n"
+                break
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,69 @@
+"""
+HTTP缓存
+
+读接口根据行版本（xmin）生成 ETag，请求带有匹配的 If-None-Match 时直接返回 304，
+跳过完整查询与序列化；Cache-Control 让浏览器与反向代理在有效期内不再回源。
+
+不提供 Last-Modified：各表只有 created_at，修改、删除与回放覆盖写入都不会更新它，
+按时间验证会把已变化的内容判为未修改，只携带 If-Modified-Since 的请求一律完整响应。
+"""
+
+import os
+import hashlib
+from typing import Any, Dict
+from fastapi import Request, Response
+from sqlalchemy import BigInteger, Text, cast, literal_column
+
+from src.api.responses import FastJSONResponse
+
+# 可能变化的资源的缓存时长（秒），0 表示每次都需重新验证
+MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+
+# 历史数据（不含当日）的缓存时长（秒）
+HISTORICAL_MAX_AGE = int(os.getenv("HTTP_CACHE_HISTORICAL_MAX_AGE", "3600"))
+
+
+def row_version(table):
+    """PostgreSQL 行版本（xmin），行每次更新都会变化，可用 max() 聚合"""
+    return cast(cast(literal_column(f"{table.__tablename__}.xmin"), Text), BigInteger)
+
+
+def make_etag(*parts: Any) -> str:
+    """由版本信息生成弱 ETag"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+class CacheValidators:
+    """一次响应的缓存验证器与缓存策略"""
+
+    def __init__(self, etag: str, max_age: int = MAX_AGE):
+        self.etag = etag
+        self.max_age = max_age
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={self.max_age}" if self.max_age > 0 else "no-cache",
+        }
+
+    def is_not_modified(self, request: Request) -> bool:
+        """If-None-Match 与当前 ETag 弱比较匹配时未修改"""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        candidates = {_strip_weak(tag.strip()) for tag in if_none_match.split(",")}
+        return _strip_weak(self.etag) in candidates
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers)
+
+    def respond(self, content: Any) -> FastJSONResponse:
+        return FastJSONResponse(content, headers=self.headers)
@@ -4,21 +4,27 @@
 
 from datetime import date, datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_, desc
-import pandas as pd
+from sqlalchemy import select, and_, or_, desc, func, tuple_
 
-from src.config.database import get_db_session
+from src.config.database import get_db_session, get_read_session
 from src.models.stock_models import (
-    DecisionRequest, BatchDecisionRequest, FinalDecisionResponse,
-    APIResponse, PaginatedResponse
+    DecisionRequest, BatchDecisionRequest, DecisionReplayRequest, FinalDecisionResponse,
+    EngineConfigUpdate, APIResponse, PaginatedResponse
 )
-from src.models.database import Stock, StockDailyData, BacktestModel, ModelDecision, FinalDecision
-from src.services.stock_service import StockService, get_stock_service
-from src.decision_engine.manager import decision_engine_manager
+from src.models.database import (
+    Stock, StockDailyData, BacktestModel, ModelDecision, FinalDecision, FinalDecisionRollup
+)
+from src.services.decision_cache import decision_cache
+from src.services.engine_sync import engine_sync, KIND_CONFIG
+from src.services.symbol_cache import symbol_cache
+from src.services.streaming import StreamColumn, stream_query, ensure_format_available, STREAM_FORMATS
+from src.api.responses import FastJSONRoute
+from src.api.caching import CacheValidators, make_etag, row_version, MAX_AGE, HISTORICAL_MAX_AGE
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.get("/decisions/stats", response_model=APIResponse)
@@ -28,7 +34,7 @@ async def get_decision_stats(
     end_date: Optional[date] = None
 ):
     """获取决策统计信息"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         try:
             # 构建查询条件
             query = select(FinalDecision, Stock).join(Stock, FinalDecision.stock_id == Stock.id)
@@ -94,41 +100,100 @@ async def get_decision_stats(
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"获取决策统计失败: {str(e)}")
 
+
+@router.get("/decisions/engine/config", response_model=APIResponse)
+async def get_engine_config():
+    """获取本进程决策引擎的投票与风控配置"""
+    from src.decision_engine.manager import get_decision_engine_manager
+
+    return APIResponse(
+        data={
+            "config": get_decision_engine_manager().engine_config(),
+            "version": engine_sync.config_version
+        },
+        message="获取引擎配置成功",
+        status="success"
+    )
+
+
+@router.put("/decisions/engine/config", response_model=APIResponse)
+async def update_engine_config(
+    config_update: EngineConfigUpdate
+):
+    """更新决策引擎配置，经 Redis 同步到全部 worker"""
+    from src.decision_engine.manager import get_decision_engine_manager
+
+    # 发布完整配置，各 worker 整体替换而不是逐字段合并
+    config = {
+        **get_decision_engine_manager().engine_config(),
+        **jsonable_encoder(config_update.model_dump(exclude_none=True))
+    }
+    version = await engine_sync.publish(KIND_CONFIG, config)
+    
+    return APIResponse(
+        data={"config": config, "version": version},
+        message="引擎配置已更新" if version else "引擎配置已更新（同步不可用，仅当前进程生效）",
+        status="success"
+    )
+
+
 @router.post("/decisions/generate", response_model=APIResponse)
 async def generate_decision(
     decision_request: DecisionRequest
 ):
     """生成交易决策"""
+    from src.decision_engine.registry import model_registry
+    from src.services.stock_service import StockService
+    from src.services.feature_service import FeatureService
+
     async with get_db_session() as session:
+        manager = await model_registry.ensure_loaded(session)
         symbol = decision_request.symbol
         trade_date = decision_request.trade_date
         
         # 获取股票服务实例
         stock_service = StockService(session)
         
+        # 相同输入的决策直接返回缓存结果，不再加载数据和运行模型
+        cache_key = decision_cache.make_key(
+            symbol, trade_date,
+            float(decision_request.current_position or 0),
+            manager.get_config_fingerprint()
+        )
+        cached_result = await decision_cache.get(cache_key)
+        if cached_result is not None:
+            return APIResponse(
+                data=cached_result,
+                message="决策生成成功",
+                status="success"
+            )
+        
         try:
-            # 获取股票数据
-            end_date = trade_date
-            start_date = end_date - pd.Timedelta(days=60)  # 获取最近60天的数据
-            stock_data = await stock_service.get_stock_data(symbol, start_date, end_date)
+            # 获取股票ID
+            stock_id = await stock_service.get_stock_id(symbol)
+            if stock_id is None:
+                raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
+            
+            # 只加载活跃模型预热所需的最近K线
+            stock_data = await stock_service.get_recent_stock_data(
+                stock_id, trade_date, manager.get_warmup_bars()
+            )
             
             if stock_data.empty:
                 raise HTTPException(status_code=404, detail=f"股票 {symbol} 在指定日期范围内没有数据")
             
+            # 合并预计算的技术指标特征，模型直接复用
+            stock_data = await FeatureService(session).attach_features(stock_id, stock_data)
+            
             # 使用决策引擎生成决策
-            decision_result = await decision_engine_manager.generate_decision(decision_request, stock_data)
+            decision_result = await manager.generate_decision(decision_request, stock_data)
             
             if "error" in decision_result:
                 raise HTTPException(status_code=500, detail=decision_result["error"])
             
-            # 获取股票信息
-            stock = await stock_service.get_stock_by_symbol(symbol)
-            if not stock:
-                raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
-            
             # 保存决策结果到数据库
             final_decision_record = FinalDecision(
-                stock_id=stock.id,
+                stock_id=stock_id,
                 trade_date=trade_date,
                 buy_votes=decision_result["final_decision"]["vote_summary"].get("BUY", 0),
                 sell_votes=decision_result["final_decision"]["vote_summary"].get("SELL", 0),
@@ -156,6 +221,8 @@ async def generate_decision(
             
             await session.commit()
             
+            decision_result = await decision_cache.set(cache_key, decision_result)
+            
             return APIResponse(
                 data=decision_result,
                 message="决策生成成功",
@@ -178,7 +245,12 @@ async def generate_batch_decisions(
     batch_request: BatchDecisionRequest
 ):
     """批量生成决策"""
+    from src.decision_engine.registry import model_registry
+    from src.services.stock_service import StockService
+    from src.services.feature_service import FeatureService
+
     async with get_db_session() as session:
+        manager = await model_registry.ensure_loaded(session)
         symbols = batch_request.symbols
         trade_date = batch_request.trade_date
         
@@ -187,13 +259,32 @@ async def generate_batch_decisions(
         
         batch_results = []
         successful_count = 0
+        fingerprint = manager.get_config_fingerprint()
+        warmup_bars = manager.get_warmup_bars()
         
         for symbol in symbols:
             try:
-                # 获取股票数据
-                end_date = trade_date
-                start_date = end_date - pd.Timedelta(days=60)  # 获取最近60天的数据
-                stock_data = await stock_service.get_stock_data(symbol, start_date, end_date)
+                # 命中缓存则跳过数据加载、模型运行和持久化
+                cache_key = decision_cache.make_key(symbol, trade_date, 0.0, fingerprint)
+                cached_result = await decision_cache.get(cache_key)
+                if cached_result is not None:
+                    batch_results.append(cached_result)
+                    successful_count += 1
+                    continue
+                
+                # 获取股票ID
+                stock_id = await stock_service.get_stock_id(symbol)
+                if stock_id is None:
+                    batch_results.append({
+                        "symbol": symbol,
+                        "error": f"股票 {symbol} 不存在",
+                        "final_decision": None,
+                        "risk_assessment": None
+                    })
+                    continue
+                
+                # 只加载活跃模型预热所需的最近K线
+                stock_data = await stock_service.get_recent_stock_data(stock_id, trade_date, warmup_bars)
                 
                 if stock_data.empty:
                     batch_results.append({
@@ -204,6 +295,9 @@ async def generate_batch_decisions(
                     })
                     continue
                 
+                # 合并预计算的技术指标特征
+                stock_data = await FeatureService(session).attach_features(stock_id, stock_data)
+                
                 # 创建决策请求
                 decision_request = DecisionRequest(
                     symbol=symbol,
@@ -212,7 +306,7 @@ async def generate_batch_decisions(
                 )
                 
                 # 使用决策引擎生成决策
-                decision_result = await decision_engine_manager.generate_decision(decision_request, stock_data)
+                decision_result = await manager.generate_decision(decision_request, stock_data)
                 
                 if "error" in decision_result:
                     batch_results.append({
@@ -223,20 +317,9 @@ async def generate_batch_decisions(
                     })
                     continue
                 
-                # 获取股票信息
-                stock = await stock_service.get_stock_by_symbol(symbol)
-                if not stock:
-                    batch_results.append({
-                        "symbol": symbol,
-                        "error": f"股票 {symbol} 不存在",
-                        "final_decision": None,
-                        "risk_assessment": None
-                    })
-                    continue
-                
                 # 保存决策结果到数据库
                 final_decision_record = FinalDecision(
-                    stock_id=stock.id,
+                    stock_id=stock_id,
                     trade_date=trade_date,
                     buy_votes=decision_result["final_decision"]["vote_summary"].get("BUY", 0),
                     sell_votes=decision_result["final_decision"]["vote_summary"].get("SELL", 0),
@@ -264,6 +347,7 @@ async def generate_batch_decisions(
                 
                 await session.commit()
                 
+                decision_result = await decision_cache.set(cache_key, decision_result)
                 batch_results.append(decision_result)
                 successful_count += 1
                 
@@ -288,6 +372,30 @@ async def generate_batch_decisions(
         )
 
 
+@router.post("/decisions/replay", response_model=APIResponse)
+async def replay_decisions(
+    replay_request: DecisionReplayRequest
+):
+    """回放历史决策，批量回填模型决策与综合决策"""
+    from src.services.decision_replay import DecisionReplayService
+
+    if replay_request.start_date > replay_request.end_date:
+        raise HTTPException(status_code=400, detail="开始日期不能晚于结束日期")
+    
+    async with get_db_session() as session:
+        summary = await DecisionReplayService(session).replay(
+            replay_request.start_date,
+            replay_request.end_date,
+            replay_request.symbols
+        )
+        
+        return APIResponse(
+            data=summary,
+            message=f"决策回放完成，共 {summary['symbol_count']} 只股票",
+            status="success"
+        )
+
+
 @router.get("/decisions/history/{symbol}", response_model=APIResponse)
 async def get_decision_history(
     symbol: str,
@@ -295,12 +403,11 @@ async def get_decision_history(
     end_date: date
 ):
     """获取决策历史"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         try:
-            # 查询股票信息
-            stock_service = StockService(session)
-            stock = await stock_service.get_stock_by_symbol(symbol)
-            if not stock:
+            # 查询股票ID
+            stock_id = await symbol_cache.get_id(session, symbol)
+            if stock_id is None:
                 raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
             
             # 查询决策历史
@@ -308,7 +415,7 @@ async def get_decision_history(
                 select(FinalDecision)
                 .where(
                     and_(
-                        FinalDecision.stock_id == stock.id,
+                        FinalDecision.stock_id == stock_id,
                         FinalDecision.trade_date >= start_date,
                         FinalDecision.trade_date <= end_date
                     )
@@ -331,14 +438,43 @@ async def get_decision_history(
                     }
                 })
             
+            # 超过保留期的月份只保留按月汇总
+            rollup_result = await session.execute(
+                select(FinalDecisionRollup)
+                .where(
+                    and_(
+                        FinalDecisionRollup.stock_id == stock_id,
+                        FinalDecisionRollup.month >= date(start_date.year, start_date.month, 1),
+                        FinalDecisionRollup.month <= end_date
+                    )
+                )
+                .order_by(desc(FinalDecisionRollup.month))
+            )
+            monthly_summary = [
+                {
+                    "month": rollup.month.strftime("%Y-%m"),
+                    "trading_days": rollup.trading_days,
+                    "vote_summary": {
+                        "BUY": rollup.buy_days,
+                        "SELL": rollup.sell_days,
+                        "HOLD": rollup.hold_days
+                    },
+                    "avg_confidence": float(rollup.avg_confidence) if rollup.avg_confidence else 0.0,
+                    "last_decision": rollup.last_decision
+                }
+                for rollup in rollup_result.scalars().all()
+            ]
+            
             return APIResponse(
                 data={
                     "symbol": symbol,
                     "history": history_data,
+                    "monthly_summary": monthly_summary,
                     "metadata": {
                         "start_date": start_date.isoformat(),
                         "end_date": end_date.isoformat(),
-                        "record_count": len(history_data)
+                        "record_count": len(history_data),
+                        "summary_month_count": len(monthly_summary)
                     }
                 },
                 message="获取决策历史成功",
@@ -351,16 +487,62 @@ async def get_decision_history(
             raise HTTPException(status_code=500, detail=f"获取决策历史失败: {str(e)}")
 
 
+# 决策历史流式输出的列，与查询的选择列一一对应
+DECISION_HISTORY_STREAM_COLUMNS = [
+    StreamColumn("trade_date", "date32"),
+    StreamColumn("final_decision", "string"),
+    StreamColumn("confidence_score", "float64", float),
+    StreamColumn("buy_votes", "int64"),
+    StreamColumn("sell_votes", "int64"),
+    StreamColumn("hold_votes", "int64"),
+    StreamColumn("risk_level", "string"),
+]
+
+
+@router.get("/decisions/history/{symbol}/stream")
+async def stream_decision_history(
+    symbol: str,
+    start_date: Optional[date] = Query(None, description="开始日期，默认不限"),
+    end_date: Optional[date] = Query(None, description="结束日期，默认不限"),
+    format: str = Query("ndjson", description=f"输出格式: {', '.join(STREAM_FORMATS)}")
+):
+    """流式获取决策历史（按日期升序）"""
+    ensure_format_available(format)
+    async with get_read_session() as session:
+        stock_id = await symbol_cache.get_id(session, symbol)
+
+    if stock_id is None:
+        raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
+
+    conditions = [FinalDecision.stock_id == stock_id]
+    if start_date:
+        conditions.append(FinalDecision.trade_date >= start_date)
+    if end_date:
+        conditions.append(FinalDecision.trade_date <= end_date)
+
+    query = (
+        select(
+            FinalDecision.trade_date, FinalDecision.final_decision, FinalDecision.confidence_score,
+            FinalDecision.buy_votes, FinalDecision.sell_votes, FinalDecision.hold_votes,
+            FinalDecision.risk_level
+        )
+        .where(and_(*conditions))
+        .order_by(FinalDecision.trade_date)
+    )
+    return stream_query(query, DECISION_HISTORY_STREAM_COLUMNS, format, f"{symbol}_decision_history")
+
+
 @router.get("/decisions/{decision_id}", response_model=APIResponse)
 async def get_decision_detail(
+    request: Request,
     decision_id: int
 ):
     """获取决策详情"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         try:
             # 查询最终决策信息
             final_decision_result = await session.execute(
-                select(FinalDecision, Stock)
+                select(FinalDecision, Stock, row_version(FinalDecision))
                 .join(Stock, FinalDecision.stock_id == Stock.id)
                 .where(FinalDecision.id == decision_id)
             )
@@ -369,7 +551,25 @@ async def get_decision_detail(
             if not final_decision_data:
                 raise HTTPException(status_code=404, detail=f"决策 {decision_id} 不存在")
             
-            final_decision, stock = final_decision_data
+            final_decision, stock, final_version = final_decision_data
+            
+            # 综合决策、模型决策与模型名称的版本，用于缓存验证
+            version_result = await session.execute(
+                select(
+                    func.count(ModelDecision.id),
+                    func.max(row_version(ModelDecision)),
+                    func.max(row_version(BacktestModel))
+                )
+                .join(BacktestModel, ModelDecision.model_id == BacktestModel.id)
+                .where(ModelDecision.stock_id == final_decision.stock_id)
+                .where(ModelDecision.trade_date == final_decision.trade_date)
+            )
+            validators = CacheValidators(
+                etag=make_etag(decision_id, final_version, *version_result.one()),
+                max_age=HISTORICAL_MAX_AGE if final_decision.trade_date < date.today() else MAX_AGE
+            )
+            if validators.is_not_modified(request):
+                return validators.not_modified()
             
             # 查询模型决策详情
             model_decisions_result = await session.execute(
@@ -422,11 +622,11 @@ async def get_decision_detail(
                 "created_at": final_decision.created_at.isoformat()
             }
             
-            return APIResponse(
+            return validators.respond(APIResponse(
                 data=decision_detail,
                 message="获取决策详情成功",
                 status="success"
-            )
+            ))
             
         except HTTPException:
             raise
@@ -441,10 +641,11 @@ async def get_decisions(
     end_date: Optional[date] = None,
     decision_type: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，传入时忽略 skip")
 ):
     """获取决策列表"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         try:
             # 构建查询条件
             query = select(FinalDecision, Stock).join(Stock, FinalDecision.stock_id == Stock.id)
@@ -462,16 +663,23 @@ async def get_decisions(
             if decision_type:
                 conditions.append(FinalDecision.final_decision == decision_type)
             
-            if conditions:
-                query = query.where(and_(*conditions))
-            
             # 计算总数
-            count_query = select(FinalDecision.id).select_from(FinalDecision).join(Stock)
+            count_query = select(func.count(FinalDecision.id)).select_from(FinalDecision).join(Stock)
             if conditions:
                 count_query = count_query.where(and_(*conditions))
             
             total_result = await session.execute(count_query)
-            total_count = len(total_result.scalars().all())
+            total_count = total_result.scalar()
+            
+            # 游标分页: 从上一页最后一条之后继续，日期上界同时用于分区裁剪
+            if cursor:
+                cursor_date, cursor_id = _parse_decision_cursor(cursor)
+                conditions.append(FinalDecision.trade_date <= cursor_date)
+                conditions.append(tuple_(FinalDecision.trade_date, FinalDecision.id) < tuple_(cursor_date, cursor_id))
+                skip = 0
+            
+            if conditions:
+                query = query.where(and_(*conditions))
             
             # 获取分页数据
             query = query.order_by(desc(FinalDecision.trade_date), desc(FinalDecision.id)).offset(skip).limit(limit)
@@ -494,17 +702,34 @@ async def get_decisions(
                     }
                 })
             
+            next_cursor = None
+            if len(decisions) == limit:
+                last_decision = decisions[-1][0]
+                next_cursor = f"{last_decision.trade_date.isoformat()}_{last_decision.id}"
+            
             return APIResponse(
                 data=PaginatedResponse(
                     data=decisions_list,
                     total=total_count,
                     skip=skip,
-                    limit=limit
+                    limit=limit,
+                    next_cursor=next_cursor
                 ),
                 message="获取决策列表成功",
                 status="success"
             )
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"获取决策列表失败: {str(e)}")
 
+
+def _parse_decision_cursor(cursor: str):
+    """解析决策列表游标 '<trade_date>_<id>'"""
+    try:
+        cursor_date, cursor_id = cursor.split("_", 1)
+        return date.fromisoformat(cursor_date), int(cursor_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"无效的游标: {cursor}")
+
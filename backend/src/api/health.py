@@ -4,14 +4,17 @@
 
 import os
 import sys
-import psutil
 from datetime import datetime
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
 from typing import Dict, Any
 
 from src.models.stock_models import APIResponse
-from src.config.database import get_db_session
+from src.config.database import get_db_session, get_replica_router
 from src.config.redis_config import get_redis
+from src.services.metrics_sampler import metrics_sampler
+from src.services.instrumentation import registry, CONTENT_TYPE_LATEST
+from src.services.startup import startup_timer
 from sqlalchemy.ext.asyncio import AsyncSession
 from redis.asyncio import Redis
 
@@ -38,32 +41,8 @@ async def check_redis_health(redis_client: Redis) -> Dict[str, Any]:
 
 
 def get_system_metrics() -> Dict[str, Any]:
-    """获取系统指标"""
-    try:
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        return {
-            "cpu_percent": round(cpu_percent, 2),
-            "memory_percent": round(memory.percent, 2),
-            "memory_used_gb": round(memory.used / (1024 ** 3), 2),
-            "memory_total_gb": round(memory.total / (1024 ** 3), 2),
-            "disk_usage_percent": round(disk.percent, 2),
-            "disk_used_gb": round(disk.used / (1024 ** 3), 2),
-            "disk_total_gb": round(disk.total / (1024 ** 3), 2)
-        }
-    except Exception as e:
-        return {
-            "cpu_percent": None,
-            "memory_percent": None,
-            "memory_used_gb": None,
-            "memory_total_gb": None,
-            "disk_usage_percent": None,
-            "disk_used_gb": None,
-            "disk_total_gb": None,
-            "error": str(e)
-        }
+    """获取系统指标（后台采样器的最新快照）"""
+    return metrics_sampler.latest()
 
 
 @router.get("/health", response_model=APIResponse)
@@ -108,6 +87,9 @@ async def database_health_check():
     """数据库健康检查"""
     async with get_db_session() as session:
         health_status = await check_database_health(session)
+        replica_router = get_replica_router()
+        if replica_router:
+            health_status["replicas"] = replica_router.status()
         
         return APIResponse(
             data=health_status,
@@ -129,9 +111,14 @@ async def redis_health_check(redis_client: Redis = Depends(get_redis)):
 
 
 @router.get("/metrics", response_model=APIResponse)
-async def system_metrics():
+async def system_metrics(
+    history: int = Query(12, ge=0, le=1000, description="返回的历史快照数量")
+):
     """系统指标"""
-    metrics = get_system_metrics()
+    metrics = {
+        **get_system_metrics(),
+        "history": metrics_sampler.history(history) if history else []
+    }
     
     return APIResponse(
         data=metrics,
@@ -140,6 +127,12 @@ async def system_metrics():
     )
 
 
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus 文本格式的请求与热点路径指标"""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+
 @router.get("/info", response_model=APIResponse)
 async def system_info():
     """系统信息"""
@@ -149,7 +142,8 @@ async def system_info():
             "version": "1.0.0",
             "environment": os.getenv("ENVIRONMENT", "development"),
             "python_version": sys.version,
-            "startup_time": datetime.now()
+            "startup_time": startup_timer.started_at,
+            "startup_timings": startup_timer.report()
         },
         message="系统信息获取成功",
         status="success"
@@ -4,20 +4,21 @@
 
 from datetime import date
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func
 
-from src.config.database import get_db_session
+from src.config.database import get_db_session, get_read_session
 from src.models.database import BacktestModel, ModelPerformance, ModelDecision
 from src.models.stock_models import (
     BacktestModelResponse, BacktestModelCreate, BacktestModelUpdate,
     ModelPerformanceResponse, BacktestRequest, APIResponse, PaginatedResponse
 )
-from src.services.stock_service import StockService
-from src.ml_models.base import BaseBacktestModel
+from src.api.responses import FastJSONRoute
+from src.api.caching import CacheValidators, make_etag, row_version
+from src.services.engine_sync import engine_sync, KIND_MODEL
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.get("/models", response_model=APIResponse)
@@ -28,7 +29,7 @@ async def get_models(
     model_type: Optional[str] = Query(None, description="模型类型过滤")
 ):
     """获取模型列表"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         # 构建查询条件
         conditions = []
         if active_only:
@@ -97,7 +98,7 @@ async def get_models(
 @router.get("/models/performance", response_model=APIResponse)
 async def get_all_model_performance():
     """获取所有模型的性能指标"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         # 查询所有活跃模型
         models_result = await session.execute(
             select(BacktestModel).where(BacktestModel.is_active == True)
@@ -174,18 +175,36 @@ async def get_all_model_performance():
 
 @router.get("/models/{model_id}", response_model=APIResponse)
 async def get_model(
+    request: Request,
     model_id: int
 ):
     """获取模型详情"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         result = await session.execute(
-            select(BacktestModel).where(BacktestModel.id == model_id)
+            select(BacktestModel, row_version(BacktestModel)).where(BacktestModel.id == model_id)
         )
-        model = result.scalar_one_or_none()
+        row = result.first()
         
-        if not model:
+        if not row:
             raise HTTPException(status_code=404, detail=f"模型 {model_id} 不存在")
         
+        model, model_version = row
+        
+        # 模型与性能记录的版本，用于缓存验证
+        version_result = await session.execute(
+            select(
+                func.count(ModelPerformance.id),
+                func.max(row_version(ModelPerformance))
+            )
+            .where(ModelPerformance.model_id == model_id)
+        )
+        perf_count, perf_version = version_result.one()
+        validators = CacheValidators(
+            etag=make_etag(model_id, model_version, perf_count, perf_version)
+        )
+        if validators.is_not_modified(request):
+            return validators.not_modified()
+        
         # 获取性能历史
         perf_result = await session.execute(
             select(ModelPerformance)
@@ -200,11 +219,11 @@ async def get_model(
             ModelPerformanceResponse.model_validate(perf) for perf in performance_history
         ]
         
-        return APIResponse(
+        return validators.respond(APIResponse(
             data=model_data,
             message="获取模型详情成功",
             status="success"
-        )
+        ))
 
 
 @router.post("/models", response_model=APIResponse)
@@ -227,6 +246,7 @@ async def create_model(
         session.add(model)
         await session.commit()
         await session.refresh(model)
+        await _publish_model_change(model.id)
         
         return APIResponse(
             data=BacktestModelResponse.model_validate(model),
@@ -257,6 +277,7 @@ async def update_model(
         
         await session.commit()
         await session.refresh(model)
+        await _publish_model_change(model_id)
         
         return APIResponse(
             data=BacktestModelResponse.model_validate(model),
@@ -282,6 +303,7 @@ async def delete_model(
         # 软删除
         model.is_active = False
         await session.commit()
+        await _publish_model_change(model_id)
         
         return APIResponse(
             data=None,
@@ -296,6 +318,10 @@ async def run_model_backtest(
     backtest_request: BacktestRequest
 ):
     """运行模型回测"""
+    from src.services.stock_service import StockService
+    from src.services.backtest_runs import record_backtest_run, equity_curve_from_positions
+    from src.decision_engine.registry import model_registry
+
     async with get_db_session() as session:
         # 检查模型是否存在
         result = await session.execute(
@@ -327,13 +353,13 @@ async def run_model_backtest(
             detail=f"股票 {backtest_request.symbol} 在指定时间段内无数据"
         )
     
-    # 根据模型类型创建对应的模型实例
-    model_instance = await _create_model_instance(model, stock_data)
+    # 复用注册表中缓存的模型实例，参数未变时不重新构造
+    model_instance = model_registry.get_instance(model)
     
     if not model_instance:
         raise HTTPException(
             status_code=400,
-            detail=f"不支持的模型类型: {model.model_type}"
+            detail=f"模型 {model_id} 未指定可用的实现或参数无效: {model.model_type}"
         )
     
     # 执行真实回测
@@ -351,8 +377,23 @@ async def run_model_backtest(
     # 格式化回测结果
     formatted_result = _format_backtest_result(backtest_result, stock_data)
     
+    async with get_db_session() as session:
+        run_id = await record_backtest_run(
+            session,
+            run_type="model",
+            parameters={**backtest_request.model_dump(), "model_parameters": model.parameters or {}},
+            metrics={k: v for k, v in formatted_result.items() if k not in ("trades", "signals")},
+            trades=formatted_result["trades"],
+            equity_curve=equity_curve_from_positions(backtest_result["positions"]),
+            symbol=backtest_request.symbol,
+            model_id=model_id,
+            start_date=backtest_request.start_date,
+            end_date=backtest_request.end_date
+        )
+    
     return APIResponse(
         data={
+            "run_id": run_id,
             "model_id": model_id,
             "symbol": backtest_request.symbol,
             "backtest_result": formatted_result
@@ -362,58 +403,21 @@ async def run_model_backtest(
     )
 
 
-async def _create_model_instance(model: BacktestModel, stock_data) -> Optional[BaseBacktestModel]:
-    """根据模型配置创建模型实例"""
-    from src.ml_models.technical_models import (
-        MovingAverageCrossover, RSIModel, MACDModel
-    )
-    
-    model_params = model.parameters or {}
-    
-    try:
-        if model.model_type == "moving_average_crossover":
-            short_window = model_params.get('short_window', 5)
-            long_window = model_params.get('long_window', 20)
-            return MovingAverageCrossover(
-                model_id=model.id,
-                short_window=short_window,
-                long_window=long_window
-            )
-        
-        elif model.model_type == "rsi_model":
-            period = model_params.get('period', 14)
-            overbought = model_params.get('overbought', 70)
-            oversold = model_params.get('oversold', 30)
-            return RSIModel(
-                model_id=model.id,
-                period=period,
-                overbought=overbought,
-                oversold=oversold
-            )
-        
-        elif model.model_type == "macd_model":
-            fast_period = model_params.get('fast_period', 12)
-            slow_period = model_params.get('slow_period', 26)
-            signal_period = model_params.get('signal_period', 9)
-            return MACDModel(
-                model_id=model.id,
-                fast_period=fast_period,
-                slow_period=slow_period,
-                signal_period=signal_period
-            )
-        
-        else:
-            return None
-            
-    except Exception:
-        return None
+async def _publish_model_change(model_id: int):
+    """模型记录变更后通知各 worker 增量刷新决策引擎中的模型"""
+    await engine_sync.publish(KIND_MODEL, {"model_id": model_id})
 
 
 def _format_backtest_result(backtest_result: dict, stock_data) -> dict:
     """格式化回测结果"""
+    from src.services.trading_calendar import get_trading_calendar
+
+    calendar = get_trading_calendar()
+    periods_per_year = calendar.annualization_factor()
+    
     # 计算额外指标
     returns = stock_data['close_price'].pct_change().dropna()
-    volatility = returns.std() * (252 ** 0.5)  # 年化波动率
+    volatility = returns.std() * (periods_per_year ** 0.5)  # 年化波动率
     
     # 计算最大回撤
     cumulative_returns = (1 + returns).cumprod()
@@ -421,9 +425,12 @@ def _format_backtest_result(backtest_result: dict, stock_data) -> dict:
     drawdown = (cumulative_returns - running_max) / running_max
     max_drawdown = drawdown.min()
     
-    # 计算年化收益率
-    total_days = (stock_data['trade_date'].max() - stock_data['trade_date'].min()).days
-    annual_return = (1 + backtest_result['total_return']) ** (365 / total_days) - 1 if total_days > 0 else 0
+    # 计算年化收益率（按区间内经过的交易日数）
+    elapsed_sessions = calendar.count_sessions(stock_data['trade_date'].min(), stock_data['trade_date'].max()) - 1
+    annual_return = (
+        (1 + backtest_result['total_return']) ** (periods_per_year / elapsed_sessions) - 1
+        if elapsed_sessions > 0 else 0
+    )
     
     # 计算夏普比率
     sharpe_ratio = annual_return / volatility if volatility > 0 else 0
@@ -477,7 +484,7 @@ async def get_model_performance(
     end_date: Optional[date] = Query(None, description="结束日期")
 ):
     """获取模型性能历史"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         # 检查模型是否存在
         result = await session.execute(
             select(BacktestModel).where(BacktestModel.id == model_id)
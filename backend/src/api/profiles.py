@@ -0,0 +1,43 @@
+"""
+请求剖析结果API
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from src.models.stock_models import APIResponse
+from src.services.profiler import profile_store, get_profile_token, is_authorized
+
+router = APIRouter()
+
+
+async def require_profile_token(x_profile: Optional[str] = Header(None)):
+    """校验剖析令牌，功能未开启时按不存在处理"""
+    if not get_profile_token():
+        raise HTTPException(status_code=404, detail="请求剖析未开启")
+    if not is_authorized(x_profile):
+        raise HTTPException(status_code=403, detail="剖析令牌无效")
+
+
+@router.get("/profiles", response_model=APIResponse, dependencies=[Depends(require_profile_token)])
+async def list_profiles():
+    """最近的剖析记录"""
+    profiles = profile_store.list()
+
+    return APIResponse(
+        data=profiles,
+        message=f"获取到 {len(profiles)} 条剖析记录",
+        status="success"
+    )
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse,
+            dependencies=[Depends(require_profile_token)])
+async def get_profile(profile_id: str):
+    """剖析结果（collapsed stack 格式，可直接生成火焰图）"""
+    collapsed = profile_store.get(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail=f"剖析记录 {profile_id} 不存在")
+
+    return PlainTextResponse(collapsed)
@@ -4,18 +4,27 @@
 
 from datetime import date
 from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func
 
-from src.config.database import get_db_session
-from src.models.database import Stock, StockDailyData
+from src.config.database import get_db_session, get_read_session
+from src.models.database import Stock, StockDailyData, StockFeature, LatestBar
 from src.models.stock_models import (
     StockResponse, StockCreate, StockUpdate, StockDailyDataResponse,
     StockDailyDataCreate, StockDailyDataUpdate, APIResponse, PaginatedResponse
 )
+from src.services.decision_cache import decision_cache
+from src.services.latest_bars import refresh_latest_bars, get_latest_bars, latest_bar_to_dict
+from src.services.symbol_cache import symbol_cache
+from src.services.streaming import StreamColumn, stream_query, ensure_format_available, STREAM_FORMATS
+from src.api.responses import FastJSONRoute
+from src.api.caching import CacheValidators, make_etag, row_version, MAX_AGE, HISTORICAL_MAX_AGE
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
+
+# 批量查询最新行情时单次请求的股票数上限
+LATEST_MAX_SYMBOLS = 1000
 
 
 @router.get("/stocks", response_model=APIResponse)
@@ -26,7 +35,7 @@ async def get_stocks(
     market: Optional[str] = Query(None, description="市场类型过滤")
 ):
     """获取股票列表"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         # 构建查询条件
         conditions = []
         if active_only:
@@ -62,12 +71,44 @@ async def get_stocks(
         )
 
 
+@router.get("/stocks/latest", response_model=APIResponse)
+async def get_latest_bars_batch(
+    symbols: str = Query(..., description="股票代码，逗号分隔")
+):
+    """批量获取最新行情（读取最新K线快照，一次查询），需在 /stocks/{symbol} 之前注册"""
+    symbol_list = list(dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()))
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="symbols 不能为空")
+    if len(symbol_list) > LATEST_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"单次最多查询 {LATEST_MAX_SYMBOLS} 只股票")
+    
+    async with get_read_session() as session:
+        bars = await get_latest_bars(session, symbol_list)
+    
+    return APIResponse(
+        data={
+            "bars": [
+                {
+                    "symbol": symbol,
+                    "latest_data": StockDailyDataResponse.model_validate(bars[symbol]),
+                    "timestamp": bars[symbol]["created_at"]
+                }
+                for symbol in symbol_list if symbol in bars
+            ],
+            # 不存在或暂无数据的股票
+            "missing": [symbol for symbol in symbol_list if symbol not in bars]
+        },
+        message="获取最新数据成功",
+        status="success"
+    )
+
+
 @router.get("/stocks/{symbol}", response_model=APIResponse)
 async def get_stock(
     symbol: str
 ):
     """获取股票详情"""
-    async with get_db_session() as session:
+    async with get_read_session() as session:
         try:
             result = await session.execute(
                 select(Stock).where(Stock.symbol == symbol)
@@ -111,6 +152,9 @@ async def create_stock(
         await session.commit()
         await session.refresh(stock)
         
+        # 更新各 worker 的股票代码缓存
+        await symbol_cache.publish(stock.symbol, stock.id)
+        
         return APIResponse(
             data=StockResponse.model_validate(stock),
             message="创建股票成功",
@@ -141,6 +185,8 @@ async def update_stock(
         await session.commit()
         await session.refresh(stock)
         
+        await symbol_cache.publish(stock.symbol, stock.id)
+        
         return APIResponse(
             data=StockResponse.model_validate(stock),
             message="更新股票信息成功",
@@ -162,10 +208,12 @@ async def delete_stock(
         if not stock:
             raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
         
-        # 软删除
+        # 软删除，代码与ID的映射不变
         stock.is_active = False
         await session.commit()
         
+        await symbol_cache.publish(stock.symbol, stock.id)
+        
         return APIResponse(
             data=None,
             message=f"股票 {symbol} 已删除",
@@ -175,6 +223,7 @@ async def delete_stock(
 
 @router.get("/stocks/{symbol}/data", response_model=APIResponse)
 async def get_stock_data(
+    request: Request,
     symbol: str,
     start_date: date = Query(..., description="开始日期"),
     end_date: date = Query(..., description="结束日期"),
@@ -183,36 +232,61 @@ async def get_stock_data(
     limit: int = Query(1000, ge=1, le=10000, description="返回记录数")
 ):
     """获取股票历史数据"""
-    async with get_db_session() as session:
+    from src.services.feature_service import FeatureService
+
+    async with get_read_session() as session:
         try:
-            # 获取股票
-            stock_result = await session.execute(
-                select(Stock).where(Stock.symbol == symbol)
-            )
-            stock = stock_result.scalar_one_or_none()
+            # 获取股票ID
+            stock_id = await symbol_cache.get_id(session, symbol)
             
-            if not stock:
+            if stock_id is None:
                 raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
             
-            # 查询历史数据总数
-            count_result = await session.execute(
-                select(StockDailyData.id)
+            # 查询历史数据总数与版本，用于缓存验证
+            version_result = await session.execute(
+                select(
+                    func.count(StockDailyData.id),
+                    func.max(row_version(StockDailyData))
+                )
                 .where(
                     and_(
-                        StockDailyData.stock_id == stock.id,
+                        StockDailyData.stock_id == stock_id,
                         StockDailyData.trade_date >= start_date,
                         StockDailyData.trade_date <= end_date
                     )
                 )
             )
-            total_count = len(count_result.scalars().all())
+            total_count, version = version_result.one()
+            
+            feature_version = None
+            if include_features:
+                feature_result = await session.execute(
+                    select(func.max(StockFeature.updated_at))
+                    .where(
+                        and_(
+                            StockFeature.stock_id == stock_id,
+                            StockFeature.trade_date >= start_date,
+                            StockFeature.trade_date <= end_date
+                        )
+                    )
+                )
+                feature_version = feature_result.scalar()
+            
+            # 结束日期早于今天的区间视为历史数据，可长时间缓存
+            validators = CacheValidators(
+                etag=make_etag(stock_id, start_date, end_date, skip, limit, include_features,
+                               total_count, version, feature_version),
+                max_age=HISTORICAL_MAX_AGE if end_date < date.today() else MAX_AGE
+            )
+            if validators.is_not_modified(request):
+                return validators.not_modified()
             
             # 查询分页数据
             result = await session.execute(
                 select(StockDailyData)
                 .where(
                     and_(
-                        StockDailyData.stock_id == stock.id,
+                        StockDailyData.stock_id == stock_id,
                         StockDailyData.trade_date >= start_date,
                         StockDailyData.trade_date <= end_date
                     )
@@ -226,7 +300,19 @@ async def get_stock_data(
             # 构建响应数据
             data_list = [StockDailyDataResponse.model_validate(data) for data in daily_data]
             
-            return APIResponse(
+            # 附加预计算的技术指标特征
+            if include_features and data_list:
+                features = await FeatureService(session).get_features(
+                    stock_id,
+                    min(item.trade_date for item in data_list),
+                    max(item.trade_date for item in data_list)
+                )
+                data_list = [
+                    {**item.model_dump(), "features": features.get(item.trade_date, {})}
+                    for item in data_list
+                ]
+            
+            return validators.respond(APIResponse(
                 data={
                     "symbol": symbol,
                     "data": data_list,
@@ -242,7 +328,7 @@ async def get_stock_data(
                 },
                 message="获取股票数据成功",
                 status="success"
-            )
+            ))
         except HTTPException:
             raise
         except Exception as e:
@@ -251,38 +337,77 @@ async def get_stock_data(
             raise HTTPException(status_code=500, detail=f"获取股票数据失败: {str(e)}")
 
 
+# 日线流式输出的列，与查询的选择列一一对应
+DAILY_DATA_STREAM_COLUMNS = [
+    StreamColumn("trade_date", "date32"),
+    StreamColumn("open_price", "float64", float),
+    StreamColumn("high_price", "float64", float),
+    StreamColumn("low_price", "float64", float),
+    StreamColumn("close_price", "float64", float),
+    StreamColumn("volume", "int64"),
+    StreamColumn("turnover", "float64", float),
+]
+
+
+@router.get("/stocks/{symbol}/data/stream")
+async def stream_stock_data(
+    symbol: str,
+    start_date: Optional[date] = Query(None, description="开始日期，默认不限"),
+    end_date: Optional[date] = Query(None, description="结束日期，默认不限"),
+    format: str = Query("ndjson", description=f"输出格式: {', '.join(STREAM_FORMATS)}")
+):
+    """流式获取股票历史数据（按日期升序），适合拉取完整历史"""
+    ensure_format_available(format)
+    async with get_read_session() as session:
+        stock_id = await symbol_cache.get_id(session, symbol)
+
+    if stock_id is None:
+        raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
+
+    conditions = [StockDailyData.stock_id == stock_id]
+    if start_date:
+        conditions.append(StockDailyData.trade_date >= start_date)
+    if end_date:
+        conditions.append(StockDailyData.trade_date <= end_date)
+
+    query = (
+        select(
+            StockDailyData.trade_date, StockDailyData.open_price, StockDailyData.high_price,
+            StockDailyData.low_price, StockDailyData.close_price, StockDailyData.volume,
+            StockDailyData.turnover
+        )
+        .where(and_(*conditions))
+        .order_by(StockDailyData.trade_date)
+    )
+    return stream_query(query, DAILY_DATA_STREAM_COLUMNS, format, f"{symbol}_daily_data")
+
+
 @router.get("/stocks/{symbol}/latest", response_model=APIResponse)
 async def get_latest_stock_data(
     symbol: str
 ):
     """获取最新股票数据"""
-    async with get_db_session() as session:
-        # 获取股票
-        stock_result = await session.execute(
-            select(Stock).where(Stock.symbol == symbol)
+    async with get_read_session() as session:
+        # 股票与最新K线快照一次查询
+        result = await session.execute(
+            select(Stock.id, LatestBar)
+            .outerjoin(LatestBar, LatestBar.stock_id == Stock.id)
+            .where(Stock.symbol == symbol)
         )
-        stock = stock_result.scalar_one_or_none()
+        row = result.first()
         
-        if not stock:
+        if not row:
             raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
         
-        # 查询最新数据
-        result = await session.execute(
-            select(StockDailyData)
-            .where(StockDailyData.stock_id == stock.id)
-            .order_by(StockDailyData.trade_date.desc())
-            .limit(1)
-        )
-        latest_data = result.scalar_one_or_none()
-        
-        if not latest_data:
+        _, latest_bar = row
+        if latest_bar is None:
             raise HTTPException(status_code=404, detail=f"股票 {symbol} 暂无数据")
         
         return APIResponse(
             data={
                 "symbol": symbol,
-                "latest_data": StockDailyDataResponse.model_validate(latest_data),
-                "timestamp": latest_data.created_at
+                "latest_data": StockDailyDataResponse.model_validate(latest_bar_to_dict(symbol, latest_bar)),
+                "timestamp": latest_bar.created_at
             },
             message="获取最新数据成功",
             status="success"
@@ -296,19 +421,16 @@ async def refresh_stock_data(
     """刷新股票数据 - 从外部数据源获取最新数据并更新到数据库"""
     async with get_db_session() as session:
         try:
-            # 获取股票信息
-            stock_result = await session.execute(
-                select(Stock).where(Stock.symbol == symbol)
-            )
-            stock = stock_result.scalar_one_or_none()
+            # 获取股票ID
+            stock_id = await symbol_cache.get_id(session, symbol)
             
-            if not stock:
+            if stock_id is None:
                 raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
             
             # 获取最新的交易日期
             latest_date_result = await session.execute(
                 select(StockDailyData.trade_date)
-                .where(StockDailyData.stock_id == stock.id)
+                .where(StockDailyData.stock_id == stock_id)
                 .order_by(StockDailyData.trade_date.desc())
                 .limit(1)
             )
@@ -337,7 +459,7 @@ async def refresh_stock_data(
                     select(StockDailyData)
                     .where(
                         and_(
-                            StockDailyData.stock_id == stock.id,
+                            StockDailyData.stock_id == stock_id,
                             StockDailyData.trade_date == data_item["trade_date"]
                         )
                     )
@@ -347,7 +469,7 @@ async def refresh_stock_data(
                 if not existing_data:
                     # 创建新数据记录
                     daily_data = StockDailyData(
-                        stock_id=stock.id,
+                        stock_id=stock_id,
                         trade_date=data_item["trade_date"],
                         open_price=data_item["open_price"],
                         high_price=data_item["high_price"],
@@ -359,9 +481,16 @@ async def refresh_stock_data(
                     session.add(daily_data)
                     updated_count += 1
             
+            # 最新K线快照与日线在同一事务内更新
+            if updated_count:
+                await refresh_latest_bars(session, [stock_id])
+            
             # 提交事务
             await session.commit()
             
+            # 增量更新特征并失效决策缓存
+            await _on_bars_ingested(session, stock_id, symbol)
+            
             return APIResponse(
                 data={
                     "symbol": symbol,
@@ -384,6 +513,22 @@ async def refresh_stock_data(
             )
 
 
+async def _on_bars_ingested(session: AsyncSession, stock_id: int, symbol: str):
+    """新行情入库后的后续处理，失败不影响数据写入"""
+    from src.decision_engine.registry import model_registry
+    from src.services.feature_service import FeatureService
+
+    # 行情变化后该股票的历史决策缓存不再可信
+    await decision_cache.invalidate_symbol(symbol)
+
+    try:
+        manager = await model_registry.ensure_loaded(session)
+        await FeatureService(session).update_features(stock_id, manager.get_feature_specs())
+    except Exception as e:
+        await session.rollback()
+        print(f"更新股票 {symbol} 特征失败: {str(e)}")
+
+
 async def _fetch_stock_data_from_external(symbol: str, latest_date: Optional[date]) -> List[Dict]:
     """
     从外部数据源获取股票数据（模拟实现）
@@ -394,6 +539,7 @@ async def _fetch_stock_data_from_external(symbol: str, latest_date: Optional[dat
     # 这里返回一些模拟的股票数据
     import random
     from datetime import date, timedelta
+    from src.services.trading_calendar import get_trading_calendar
     
     # 如果没有最新日期，则从30天前开始
     if not latest_date:
@@ -405,11 +551,10 @@ async def _fetch_stock_data_from_external(symbol: str, latest_date: Optional[dat
     if start_date > date.today():
         return []
     
-    # 生成模拟数据（从开始日期到今天）
+    # 生成模拟数据（从开始日期到今天的每个交易日）
     new_data = []
-    current_date = start_date
     
-    while current_date <= date.today():
+    for current_date in get_trading_calendar().sessions_in_range(start_date, date.today()).astype(object):
         # 生成模拟价格数据
         base_price = 10.0 + random.uniform(-2.0, 2.0)  # 基础价格在8-12之间
         
@@ -429,8 +574,6 @@ async def _fetch_stock_data_from_external(symbol: str, latest_date: Optional[dat
             "volume": volume,
             "turnover": turnover
         })
-        
-        current_date += timedelta(days=1)
     
     return new_data
 
@@ -442,13 +585,10 @@ async def create_stock_data(
 ):
     """创建股票日线数据"""
     async with get_db_session() as session:
-        # 获取股票
-        stock_result = await session.execute(
-            select(Stock).where(Stock.symbol == symbol)
-        )
-        stock = stock_result.scalar_one_or_none()
+        # 获取股票ID
+        stock_id = await symbol_cache.get_id(session, symbol)
         
-        if not stock:
+        if stock_id is None:
             raise HTTPException(status_code=404, detail=f"股票 {symbol} 不存在")
         
         # 检查数据是否已存在
@@ -456,7 +596,7 @@ async def create_stock_data(
             select(StockDailyData)
             .where(
                 and_(
-                    StockDailyData.stock_id == stock.id,
+                    StockDailyData.stock_id == stock_id,
                     StockDailyData.trade_date == data.trade_date
                 )
             )
@@ -471,13 +611,17 @@ async def create_stock_data(
         
         # 创建新数据
         daily_data = StockDailyData(
-            stock_id=stock.id,
+            stock_id=stock_id,
             **data.model_dump(exclude={'symbol'})
         )
         session.add(daily_data)
+        await refresh_latest_bars(session, [stock_id])
         await session.commit()
         await session.refresh(daily_data)
         
+        # 增量更新特征并失效决策缓存
+        await _on_bars_ingested(session, stock_id, symbol)
+        
         return APIResponse(
             data=StockDailyDataResponse.model_validate(daily_data),
             message="创建股票数据成功",
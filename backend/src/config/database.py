@@ -1,13 +1,21 @@
 """
 数据库连接配置
+
+写入与需要读己之写的请求使用主库；只读请求可通过 get_read_session 路由到
+DATABASE_REPLICA_URLS 配置的只读副本，副本间轮询，复制延迟超过阈值或不可达的副本
+暂时跳过，全部不可用时回退主库。
 """
 
 import os
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+import asyncio
+import itertools
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Any, Dict, List, Optional
 
 class DatabaseConfig:
     """数据库配置类"""
@@ -22,6 +30,14 @@ class DatabaseConfig:
         self.max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "20"))
         self.pool_recycle = 3600  # 1小时
 
+        # 只读副本配置，多个地址以逗号分隔
+        self.replica_urls = [
+            url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+        ]
+        self.replica_max_lag = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "10"))
+        self.replica_check_interval = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+        self.replica_check_timeout = float(os.getenv("DB_REPLICA_CHECK_TIMEOUT", "2"))
+
         if not self.database_url:
             raise ValueError("DATABASE_URL 环境变量未设置")
 
@@ -52,6 +68,13 @@ class DatabaseConfig:
             **self.get_engine_kwargs()
         )
 
+    def create_replica_engines(self) -> List[AsyncEngine]:
+        """创建只读副本引擎，连接池参数与主库相同"""
+        return [
+            create_async_engine(url, **self.get_engine_kwargs())
+            for url in self.replica_urls
+        ]
+
     def create_test_engine(self):
         """创建测试数据库引擎"""
         if not self.test_database_url:
@@ -64,31 +87,178 @@ class DatabaseConfig:
             future=True
         )
 
-# 全局数据库配置实例
-db_config = DatabaseConfig()
-
-# 创建主数据库引擎和会话工厂
-engine = db_config.create_engine()
-AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
-
-# 创建测试数据库引擎和会话工厂
-test_engine = None
-if db_config.test_database_url:
-    test_engine = db_config.create_test_engine()
-    TestAsyncSessionLocal = sessionmaker(
-        test_engine,
-        class_=AsyncSession,
-        expire_on_commit=False
-    )
+# 复制延迟（秒）。非恢复模式的实例（独立的库）视为无延迟；
+# 已回放到最新接收位置时也为 0，避免主库空闲时回放时间戳变旧被误判为延迟
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """只读副本路由: 轮询选择延迟在阈值内的副本，延迟按间隔缓存"""
+
+    def __init__(self, engines: List[AsyncEngine], max_lag: float,
+                 check_interval: float, check_timeout: float):
+        self.engines = engines
+        self.session_factories = [
+            sessionmaker(replica_engine, class_=AsyncSession, expire_on_commit=False)
+            for replica_engine in engines
+        ]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._counter = itertools.count()
+        # None 表示上次检查时不可达
+        self._lags: List[Optional[float]] = [None] * len(engines)
+        self._checked_at: List[float] = [float("-inf")] * len(engines)
+
+    async def _measure_lag(self, index: int) -> Optional[float]:
+        async def query():
+            async with self.engines[index].connect() as conn:
+                result = await conn.execute(REPLICA_LAG_SQL)
+                return float(result.scalar() or 0)
+
+        try:
+            return await asyncio.wait_for(query(), timeout=self.check_timeout)
+        except Exception as e:
+            url = self.engines[index].url
+            print(f"只读副本 {url.host}:{url.port} 检查失败: {str(e) or type(e).__name__}")
+            return None
+
+    async def _is_usable(self, index: int) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at[index] >= self.check_interval:
+            # 先更新检查时间，并发请求沿用上次结果而不是同时检查
+            self._checked_at[index] = now
+            self._lags[index] = await self._measure_lag(index)
+        lag = self._lags[index]
+        return lag is not None and lag <= self.max_lag
+
+    async def session_factory(self) -> Optional[sessionmaker]:
+        """从下一个轮询位置开始选择可用副本，均不可用时返回 None"""
+        start = next(self._counter)
+        for offset in range(len(self.engines)):
+            index = (start + offset) % len(self.engines)
+            if await self._is_usable(index):
+                return self.session_factories[index]
+        return None
+
+    def status(self) -> List[Dict[str, Any]]:
+        """各副本最近一次检查结果"""
+        return [
+            {
+                "host": replica_engine.url.host,
+                "port": replica_engine.url.port,
+                "lag_seconds": lag,
+                "usable": lag is not None and lag <= self.max_lag,
+            }
+            for replica_engine, lag in zip(self.engines, self._lags)
+        ]
+
+    async def dispose(self):
+        for replica_engine in self.engines:
+            await replica_engine.dispose()
+
+
+# 引擎与会话工厂在首次使用时创建，导入本模块不连接数据库也不要求已设置 DATABASE_URL
+_db_config: Optional[DatabaseConfig] = None
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+_replica_router: Optional[ReplicaRouter] = None
+_replicas_initialized = False
+_test_engine: Optional[AsyncEngine] = None
+_test_session_factory: Optional[sessionmaker] = None
+
+
+def get_db_config() -> DatabaseConfig:
+    """全局数据库配置实例"""
+    global _db_config
+    if _db_config is None:
+        _db_config = DatabaseConfig()
+    return _db_config
+
+
+def get_engine() -> AsyncEngine:
+    """主数据库引擎"""
+    global _engine
+    if _engine is None:
+        _engine = get_db_config().create_engine()
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    """主数据库会话工厂"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(
+            get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+    return _session_factory
+
+
+def get_replica_router() -> Optional[ReplicaRouter]:
+    """只读副本路由，未配置副本时为 None"""
+    global _replica_router, _replicas_initialized
+    if not _replicas_initialized:
+        _replicas_initialized = True
+        config = get_db_config()
+        if config.replica_urls:
+            _replica_router = ReplicaRouter(
+                config.create_replica_engines(),
+                max_lag=config.replica_max_lag,
+                check_interval=config.replica_check_interval,
+                check_timeout=config.replica_check_timeout
+            )
+    return _replica_router
+
+
+def get_test_session_factory() -> Optional[sessionmaker]:
+    """测试数据库会话工厂，未配置测试库时为 None"""
+    global _test_engine, _test_session_factory
+    if _test_session_factory is None and get_db_config().test_database_url:
+        _test_engine = get_db_config().create_test_engine()
+        _test_session_factory = sessionmaker(
+            _test_engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+    return _test_session_factory
+
+
+async def dispose_engines():
+    """释放已创建的引擎连接池"""
+    if _engine is not None:
+        await _engine.dispose()
+    if _replica_router is not None:
+        await _replica_router.dispose()
+    if _test_engine is not None:
+        await _test_engine.dispose()
+
+
+_LAZY_ATTRIBUTES = {
+    "db_config": get_db_config,
+    "engine": get_engine,
+    "AsyncSessionLocal": get_session_factory,
+    "replica_router": get_replica_router,
+}
+
+
+def __getattr__(name: str):
+    # 兼容旧的 `from src.config.database import engine` 等写法，访问时才创建
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 @asynccontextmanager
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """获取数据库会话的上下文管理器"""
-    session = AsyncSessionLocal()
+    session = get_session_factory()()
     try:
         yield session
         await session.commit()
@@ -98,13 +268,30 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     finally:
         await session.close()
 
+@asynccontextmanager
+async def get_read_session(primary: bool = False) -> AsyncGenerator[AsyncSession, None]:
+    """获取只读会话: 优先使用只读副本，不可用时使用主库。不得在其中写入
+
+    primary=True 时始终读主库，用于读取客户端刚写入的数据（如刚返回的回测运行ID），
+    避免复制延迟导致 404 或列表缺项。
+    """
+    replica_router = None if primary else get_replica_router()
+    factory = await replica_router.session_factory() if replica_router else None
+    session = (factory or get_session_factory())()
+    try:
+        yield session
+    finally:
+        # 只读会话无需提交，关闭时回滚事务
+        await session.close()
+
 @asynccontextmanager
 async def get_test_db_session() -> AsyncGenerator[AsyncSession, None]:
     """获取测试数据库会话的上下文管理器"""
-    if not test_engine:
+    test_session_factory = get_test_session_factory()
+    if not test_session_factory:
         raise RuntimeError("测试数据库未配置")
 
-    session = TestAsyncSessionLocal()
+    session = test_session_factory()
     try:
         yield session
         await session.commit()
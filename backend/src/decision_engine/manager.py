@@ -2,17 +2,22 @@
 决策引擎管理器
 """
 
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import date
+import hashlib
+import json
 import pandas as pd
 
 from src.ml_models.base import ModelManager
-from src.ml_models.technical_models import MovingAverageCrossover, RSIModel, MACDModel
+from src.ml_models.indicators import IndicatorCache
+from src.ml_models.technical_models import TECHNICAL_MODEL_CLASSES
 from src.decision_engine.voting import DecisionEngine, RiskController, VotingConfig
 from src.models.stock_models import (
-    DecisionRequest, ModelSignal, DecisionType
+    DecisionRequest, ModelSignal, DecisionType, VotingStrategy
 )
 from src.decision_engine.voting import FinalDecision
+from src.services.instrumentation import model_signal_duration_seconds, voting_duration_seconds
+from src.services.engine_sync import engine_sync, KIND_CONFIG
 
 
 class DecisionEngineManager:
@@ -31,14 +36,10 @@ class DecisionEngineManager:
 
     def _register_model_types(self):
         """注册模型类型"""
-        self.model_manager.model_registry.update({
-            'moving_average_crossover': MovingAverageCrossover,
-            'rsi_model': RSIModel,
-            'macd_model': MACDModel
-        })
+        self.model_manager.model_registry.update(TECHNICAL_MODEL_CLASSES)
     
     def _initialize_default_models(self):
-        """初始化默认模型"""
+        """初始化内置默认模型，backtest_models 中配置了可识别的模型后由注册表整体替换"""
         try:
             # 创建默认的技术指标模型
             self.model_manager.register_model(
@@ -75,12 +76,14 @@ class DecisionEngineManager:
                 "risk_assessment": None
             }
 
-        # 运行所有模型生成信号
+        # 运行所有模型生成信号，同一标的的指标在各模型间只计算一次
         model_signals: Dict[int, ModelSignal] = {}
+        indicator_cache = IndicatorCache()
         
         for model in active_models:
             try:
-                signal = model.generate_signal(stock_data)
+                with model_signal_duration_seconds.time(model=type(model).__name__):
+                    signal = model.generate_signal(stock_data, indicator_cache)
                 model_signals[model.model_id] = signal
             except Exception as e:
                 # 记录错误但继续处理其他模型
@@ -88,7 +91,8 @@ class DecisionEngineManager:
                 continue
 
         # 聚合决策
-        final_decision = self.decision_engine.aggregate_decisions(model_signals)
+        with voting_duration_seconds.time(strategy=self.decision_engine.config.strategy.value):
+            final_decision = self.decision_engine.aggregate_decisions(model_signals)
 
         # 风险评估 - 将Decimal转换为float
         current_position = float(decision_request.current_position) if decision_request.current_position else 0.0
@@ -199,6 +203,45 @@ class DecisionEngineManager:
         """获取所有模型信息"""
         return self.model_manager.get_all_models_info()
 
+    def get_feature_specs(self) -> List[tuple]:
+        """汇总活跃模型所需的特征规格（去重）"""
+        specs = []
+        for model in self.model_manager.models.values():
+            if not model.is_active:
+                continue
+            for spec in model.get_feature_specs():
+                if spec not in specs:
+                    specs.append(spec)
+        return specs
+
+    def get_warmup_bars(self) -> int:
+        """活跃模型所需预热K线数的最大值，生成决策时只需加载这么多根最近的K线"""
+        return max(
+            (model.get_warmup_bars() for model in self.model_manager.models.values() if model.is_active),
+            default=1
+        )
+
+    def get_config_fingerprint(self) -> str:
+        """引擎配置指纹，覆盖活跃模型及参数、预热K线数、权重、投票与风控配置"""
+        config = self.decision_engine.config
+        payload = {
+            "models": sorted(
+                [
+                    model.model_id,
+                    type(model).__name__,
+                    model.parameters,
+                    model.get_warmup_bars(),
+                    self.decision_engine.model_weights.get(model.model_id, 1.0)
+                ]
+                for model in self.model_manager.models.values()
+                if model.is_active
+            ),
+            "voting": [config.strategy, config.threshold, config.min_confidence, config.enable_risk_control],
+            "risk": [self.risk_controller.max_daily_loss, self.risk_controller.max_position_size]
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
     def update_voting_config(self, config: VotingConfig):
         """更新投票配置"""
         self.decision_engine.config = config
@@ -208,6 +251,56 @@ class DecisionEngineManager:
         self.risk_controller.max_daily_loss = max_daily_loss
         self.risk_controller.max_position_size = max_position_size
 
+    def engine_config(self) -> Dict[str, Any]:
+        """当前的投票与风控配置"""
+        config = self.decision_engine.config
+        return {
+            "strategy": config.strategy.value,
+            "threshold": config.threshold,
+            "min_confidence": config.min_confidence,
+            "enable_risk_control": config.enable_risk_control,
+            "max_daily_loss": self.risk_controller.max_daily_loss,
+            "max_position_size": self.risk_controller.max_position_size,
+        }
+
+    def apply_engine_config(self, config: Dict[str, Any]):
+        """应用同步下发的配置，投票配置整体替换，过程中不会让出事件循环"""
+        current = {**self.engine_config(), **config}
+        self.update_voting_config(VotingConfig(
+            strategy=VotingStrategy(current["strategy"]),
+            threshold=float(current["threshold"]),
+            min_confidence=float(current["min_confidence"]),
+            enable_risk_control=bool(current["enable_risk_control"])
+        ))
+        self.update_risk_config(float(current["max_daily_loss"]), float(current["max_position_size"]))
+
+
+# 全局决策引擎管理器实例，首次使用时创建（会初始化默认模型）
+_decision_engine_manager: Optional[DecisionEngineManager] = None
+
+
+def get_decision_engine_manager() -> DecisionEngineManager:
+    """获取全局决策引擎管理器"""
+    global _decision_engine_manager
+    if _decision_engine_manager is None:
+        _decision_engine_manager = DecisionEngineManager()
+        # 创建前已同步到的配置
+        if engine_sync.config:
+            _decision_engine_manager.apply_engine_config(engine_sync.config)
+    return _decision_engine_manager
+
+
+async def _on_engine_config(config: Dict[str, Any]):
+    # 管理器尚未创建时无需处理，创建时会读取最新配置
+    if _decision_engine_manager is not None:
+        _decision_engine_manager.apply_engine_config(config)
+
+
+engine_sync.subscribe(KIND_CONFIG, _on_engine_config)
+
 
-# 全局决策引擎管理器实例
-decision_engine_manager = DecisionEngineManager()
\ No newline at end of file
+def __getattr__(name: str):
+    # 兼容旧的 `from src.decision_engine.manager import decision_engine_manager` 写法
+    if name == "decision_engine_manager":
+        return get_decision_engine_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
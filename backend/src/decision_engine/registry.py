@@ -0,0 +1,186 @@
+"""
+数据库驱动的模型注册表
+
+从 backtest_models 加载启用的模型，构造并校验实例后注册到决策引擎，并把表中的
+weight 应用为投票权重。实例按模型ID缓存，仅在实现或参数变化时重建，决策与回测请求
+不再逐次构造模型；/models 的增删改接口提交后发布模型变更，各 worker 增量刷新。
+
+backtest_models.model_type 是模型类别（technical/ml/dl），具体实现由
+parameters["implementation"] 指定（TECHNICAL_MODEL_CLASSES 的键），
+直接以实现名作为 model_type 的记录同样可以识别。
+"""
+
+import json
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.database import get_db_session
+from src.models.database import BacktestModel
+from src.ml_models.base import BaseBacktestModel
+from src.ml_models.technical_models import TECHNICAL_MODEL_CLASSES, create_technical_model
+from src.decision_engine.manager import DecisionEngineManager, get_decision_engine_manager
+from src.services.engine_sync import engine_sync, KIND_MODEL, KIND_RESYNC
+
+# parameters 中指定具体实现的键
+IMPLEMENTATION_PARAM = "implementation"
+
+# 未设置权重时的投票权重
+DEFAULT_WEIGHT = 1.0
+
+
+def resolve_implementation(model: BacktestModel) -> Optional[str]:
+    """模型记录对应的实现名，无法识别时为 None"""
+    implementation = (model.parameters or {}).get(IMPLEMENTATION_PARAM) or model.model_type
+    return implementation if implementation in TECHNICAL_MODEL_CLASSES else None
+
+
+class ModelRegistry:
+    """模型注册表，维护决策引擎中的模型集合与权重"""
+
+    def __init__(self, manager: Optional[DecisionEngineManager] = None):
+        self._manager = manager
+        # 模型ID -> (实现与参数签名, 实例)
+        self._instances: Dict[int, Tuple[str, BaseBacktestModel]] = {}
+        self._weights: Dict[int, float] = {}
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        # 表中没有可识别的模型时沿用决策引擎的内置默认模型
+        self.using_defaults = False
+
+    @property
+    def manager(self) -> DecisionEngineManager:
+        return self._manager or get_decision_engine_manager()
+
+    @staticmethod
+    def _signature(implementation: str, model: BacktestModel) -> str:
+        return json.dumps([implementation, model.parameters or {}], sort_keys=True, default=str)
+
+    def get_instance(self, model: BacktestModel) -> Optional[BaseBacktestModel]:
+        """按模型记录获取实例，实现与参数未变时复用缓存；无法识别或参数无效时返回 None"""
+        implementation = resolve_implementation(model)
+        if implementation is None:
+            self._instances.pop(model.id, None)
+            return None
+
+        signature = self._signature(implementation, model)
+        cached = self._instances.get(model.id)
+        if cached and cached[0] == signature:
+            instance = cached[1]
+        else:
+            try:
+                instance = create_technical_model(implementation, model.id, model.parameters or {})
+                if instance is None:
+                    print(f"模型 {model.id} ({model.name}) 参数校验失败")
+            except Exception as e:
+                print(f"模型 {model.id} 实例化失败: {str(e)}")
+                instance = None
+            if instance is None:
+                self._instances.pop(model.id, None)
+                return None
+            self._instances[model.id] = (signature, instance)
+
+        instance.name = model.name
+        instance.description = model.description or instance.description
+        instance.is_active = model.is_active
+        return instance
+
+    def _apply(self, model: BacktestModel, models: Dict[int, BaseBacktestModel]) -> bool:
+        """把一条模型记录同步到引擎模型集合，未启用或无法构造的模型从集合中移除"""
+        instance = self.get_instance(model) if model.is_active else None
+        if instance is None:
+            models.pop(model.id, None)
+            self._weights.pop(model.id, None)
+            return False
+        models[model.id] = instance
+        self._weights[model.id] = float(model.weight) if model.weight is not None else DEFAULT_WEIGHT
+        return True
+
+    async def load(self, session: AsyncSession) -> int:
+        """全量加载模型记录，返回引擎中的模型数"""
+        result = await session.execute(select(BacktestModel).order_by(BacktestModel.id))
+        rows: List[BacktestModel] = list(result.scalars().all())
+        manager = self.manager
+
+        self.using_defaults = not any(resolve_implementation(row) for row in rows)
+        if self.using_defaults:
+            print("backtest_models 中没有可识别的模型，使用内置默认模型")
+            self.loaded = True
+            return len(manager.model_manager.models)
+
+        models: Dict[int, BaseBacktestModel] = {}
+        self._weights = {}
+        for row in rows:
+            if row.is_active and resolve_implementation(row) is None:
+                print(f"模型 {row.id} ({row.name}) 未指定可用的实现，已跳过")
+            self._apply(row, models)
+        row_ids = {row.id for row in rows}
+        self._instances = {model_id: item for model_id, item in self._instances.items() if model_id in row_ids}
+
+        # 整体替换，进行中的决策仍使用替换前的集合
+        manager.model_manager.models = models
+        manager.update_model_weights(dict(self._weights))
+        self.loaded = True
+        print(f"模型注册表加载完成: 启用 {len(models)} 个模型")
+        return len(models)
+
+    async def ensure_loaded(self, session: AsyncSession) -> DecisionEngineManager:
+        """首次使用时加载注册表，返回决策引擎管理器"""
+        if not self.loaded:
+            async with self._lock:
+                if not self.loaded:
+                    await self.load(session)
+        return self.manager
+
+    async def refresh_model(self, session: AsyncSession, model_id: int):
+        """模型记录增删改后增量刷新；尚未加载时无需处理，首次加载会读取最新记录"""
+        if not self.loaded:
+            return
+        result = await session.execute(select(BacktestModel).where(BacktestModel.id == model_id))
+        model = result.scalar_one_or_none()
+
+        if self.using_defaults:
+            # 第一个可识别的模型出现后整体切换为数据库配置
+            if model is not None and resolve_implementation(model):
+                await self.load(session)
+            return
+
+        manager = self.manager
+        models = dict(manager.model_manager.models)
+        if model is None:
+            models.pop(model_id, None)
+            self._weights.pop(model_id, None)
+            self._instances.pop(model_id, None)
+        else:
+            self._apply(model, models)
+        manager.model_manager.models = models
+        manager.update_model_weights(dict(self._weights))
+
+    def invalidate(self):
+        """下次使用时重新全量加载"""
+        self.loaded = False
+
+
+# 全局模型注册表实例
+model_registry = ModelRegistry()
+
+
+async def _on_model_changed(data: Dict[str, Any]):
+    # 尚未加载时无需处理，首次加载会读取最新记录
+    if not model_registry.loaded:
+        return
+    try:
+        async with get_db_session() as session:
+            await model_registry.refresh_model(session, data["model_id"])
+    except Exception as e:
+        print(f"刷新模型注册表失败: {str(e)}")
+        model_registry.invalidate()
+
+
+async def _on_resync(data: Dict[str, Any]):
+    model_registry.invalidate()
+
+
+engine_sync.subscribe(KIND_MODEL, _on_model_changed)
+engine_sync.subscribe(KIND_RESYNC, _on_resync)
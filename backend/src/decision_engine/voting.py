@@ -5,6 +5,8 @@
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 from enum import Enum
+import numpy as np
+import pandas as pd
 
 from src.models.stock_models import (
     DecisionType, VotingStrategy, ModelSignal, RiskLevel
@@ -50,7 +52,7 @@ class DecisionEngine:
         # 过滤无效决策
         valid_decisions = {
             model_id: signal for model_id, signal in model_decisions.items()
-            if signal and signal.confidence >= self.config.min_confidence
+            if signal and float(signal.confidence) >= self.config.min_confidence
         }
 
         if not valid_decisions:
@@ -67,6 +69,116 @@ class DecisionEngine:
         else:
             return self._confidence_weighted_voting(valid_decisions, vote_counts)
 
+    def aggregate_decisions_batch(self, signal_frames: Dict[int, pd.DataFrame]) -> pd.DataFrame:
+        """批量聚合多个交易日的模型信号
+
+        signal_frames 为 模型ID -> 信号序列（generate_signal_series 的输出，索引对齐），
+        返回每个交易日一行的聚合结果，逐行与 aggregate_decisions 一致。
+        """
+        decision_types = list(DecisionType)
+        model_ids = list(signal_frames.keys())
+        index = signal_frames[model_ids[0]].index if model_ids else pd.Index([])
+        n_rows = len(index)
+        hold_code = decision_types.index(DecisionType.HOLD)
+
+        # (交易日, 模型) 矩阵
+        codes = np.full((n_rows, len(model_ids)), -1)
+        confidence = np.zeros((n_rows, len(model_ids)))
+        for column, model_id in enumerate(model_ids):
+            frame = signal_frames[model_id]
+            for code, decision_type in enumerate(decision_types):
+                codes[(frame['decision'] == decision_type.value).to_numpy(), column] = code
+            confidence[:, column] = frame['confidence'].to_numpy(dtype=float)
+
+        valid = (codes >= 0) & (confidence >= self.config.min_confidence)
+        has_valid = valid.any(axis=1)
+
+        # 按模型顺序逐列累加，保持与逐日聚合相同的浮点求和顺序
+        vote_counts = np.zeros((n_rows, len(decision_types)), dtype=int)
+        scores = np.zeros((n_rows, len(decision_types)))
+        for column, model_id in enumerate(model_ids):
+            if self.config.strategy == VotingStrategy.WEIGHTED:
+                weight = self.model_weights.get(model_id, 1.0)
+            else:
+                weight = 1.0
+            for code in range(len(decision_types)):
+                voted = valid[:, column] & (codes[:, column] == code)
+                vote_counts[:, code] += voted
+                scores[:, code] += np.where(voted, weight * confidence[:, column], 0.0)
+
+        # 平局时按 BUY、SELL、HOLD 顺序取先出现者，与逐日聚合一致
+        if self.config.strategy == VotingStrategy.MAJORITY:
+            winner = vote_counts.argmax(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ratio = vote_counts.max(axis=1) / vote_counts.sum(axis=1)
+        else:
+            winner = np.where(scores.max(axis=1) > 0, scores.argmax(axis=1), hold_code)
+            if self.config.strategy == VotingStrategy.WEIGHTED:
+                total = sum(self.model_weights.values()) or valid.sum(axis=1)
+            else:
+                total = scores.sum(axis=1)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                ratio = np.where(total > 0, scores.max(axis=1) / total, 0.0)
+
+        # 获胜决策的置信度: 加权策略为加权平均，其余为简单平均
+        weighted_confidence = np.zeros(n_rows)
+        winner_weight = np.zeros(n_rows)
+        for column, model_id in enumerate(model_ids):
+            if self.config.strategy == VotingStrategy.WEIGHTED:
+                weight = self.model_weights.get(model_id, 1.0)
+            else:
+                weight = 1.0
+            voted = valid[:, column] & (codes[:, column] == winner)
+            weighted_confidence += np.where(voted, confidence[:, column] * weight, 0.0)
+            winner_weight += np.where(voted, weight, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            final_confidence = np.where(winner_weight > 0, weighted_confidence / winner_weight, 0.0)
+
+        approved = has_valid & (ratio >= self.config.threshold) & (final_confidence >= self.config.min_confidence)
+
+        labels = {
+            VotingStrategy.MAJORITY: ("多数投票通过", "投票未达阈值"),
+            VotingStrategy.WEIGHTED: ("加权投票通过", "加权投票未达阈值"),
+            VotingStrategy.CONFIDENCE: ("置信度加权投票通过", "置信度加权投票未达阈值"),
+        }
+        passed_label, failed_label = labels[self.config.strategy]
+
+        rows = []
+        for i in range(n_rows):
+            if not model_ids:
+                rows.append(self._hold_row("无模型决策"))
+            elif not has_valid[i]:
+                rows.append(self._hold_row("无有效模型决策"))
+            elif approved[i]:
+                rows.append({
+                    'decision': decision_types[winner[i]].value,
+                    'confidence': float(final_confidence[i]),
+                    'buy_votes': int(vote_counts[i, decision_types.index(DecisionType.BUY)]),
+                    'sell_votes': int(vote_counts[i, decision_types.index(DecisionType.SELL)]),
+                    'hold_votes': int(vote_counts[i, hold_code]),
+                    'risk_level': self._assess_risk_level(final_confidence[i], ratio[i]).value,
+                    'reasoning': f"{passed_label}: {ratio[i]:.1%}"
+                })
+            else:
+                rows.append(self._hold_row(f"{failed_label}: {ratio[i]:.1%}"))
+
+        return pd.DataFrame(rows, index=index, columns=[
+            'decision', 'confidence', 'buy_votes', 'sell_votes', 'hold_votes', 'risk_level', 'reasoning'
+        ])
+
+    def _hold_row(self, reasoning: str) -> Dict:
+        """批量聚合中的观望决策行，与 _create_hold_decision 一致"""
+        hold = self._create_hold_decision(reasoning)
+        return {
+            'decision': hold.decision.value,
+            'confidence': hold.confidence,
+            'buy_votes': 0,
+            'sell_votes': 0,
+            'hold_votes': 0,
+            'risk_level': hold.risk_level.value,
+            'reasoning': hold.reasoning
+        }
+
     def _count_votes(self, model_decisions: Dict[int, ModelSignal]) -> Dict[DecisionType, int]:
         """统计各决策类型的票数"""
         vote_counts = {decision_type: 0 for decision_type in DecisionType}
@@ -113,7 +225,7 @@ class DecisionEngine:
         for model_id, signal in model_decisions.items():
             if signal and signal.decision:
                 weight = self.model_weights.get(model_id, 1.0)  # 默认权重为1.0
-                weighted_scores[signal.decision] += weight * signal.confidence
+                weighted_scores[signal.decision] += weight * float(signal.confidence)
 
         max_score = 0.0
         winning_decision = DecisionType.HOLD
@@ -148,7 +260,7 @@ class DecisionEngine:
 
         for signal in model_decisions.values():
             if signal and signal.decision:
-                confidence_scores[signal.decision] += signal.confidence
+                confidence_scores[signal.decision] += float(signal.confidence)
 
         max_score = 0.0
         winning_decision = DecisionType.HOLD
@@ -187,7 +299,7 @@ class DecisionEngine:
         if not relevant_signals:
             return 0.0
         
-        return sum(signal.confidence for signal in relevant_signals) / len(relevant_signals)
+        return sum(float(signal.confidence) for signal in relevant_signals) / len(relevant_signals)
 
     def _calculate_weighted_confidence(self, model_decisions: Dict[int, ModelSignal],
                                      decision_type: DecisionType) -> float:
@@ -198,7 +310,7 @@ class DecisionEngine:
         for model_id, signal in model_decisions.items():
             if signal.decision == decision_type:
                 weight = self.model_weights.get(model_id, 1.0)
-                weighted_confidence += signal.confidence * weight
+                weighted_confidence += float(signal.confidence) * weight
                 total_weight += weight
         
         return weighted_confidence / total_weight if total_weight > 0 else 0.0
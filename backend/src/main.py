@@ -2,6 +2,8 @@
 股票回测决策系统 - 主应用入口
 """
 
+from src.services.startup import startup_timer
+
 import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
@@ -9,27 +11,71 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from typing import Dict, Any
 
-from src.config.database import engine
-from src.models.database import Base
+from src.config.database import get_engine, get_db_session, dispose_engines
 from src.models.stock_models import APIResponse
-from src.api import stocks, models, decisions, backtest, health
+from src.api import stocks, models, decisions, backtest, health, profiles
+from src.services.metrics_sampler import metrics_sampler
+from src.services.engine_sync import engine_sync
+from src.services.symbol_cache import symbol_cache
+from src.services.partitions import partition_maintainer
+from src.services.schema import get_schema_mode, prepare_schema, SchemaVersionError
+from src.services.instrumentation import PrometheusMiddleware
+from src.services.profiler import ProfilingMiddleware, get_profile_token
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    # 启动时创建数据库表
-    try:
-        async with engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-        print("数据库表创建成功")
-    except Exception as e:
-        print(f"数据库表创建失败: {e}")
+    startup_timer.mark("模块导入")
+
+    # 开发环境按模型建表，生产环境只校验迁移登记的结构版本
+    schema_mode = get_schema_mode()
+    with startup_timer.phase("结构准备"):
+        try:
+            async with get_engine().begin() as conn:
+                version = await prepare_schema(conn, schema_mode)
+            print(f"数据库结构就绪 (模式: {schema_mode}, 版本: {version})")
+        except SchemaVersionError:
+            # 结构版本落后时拒绝启动，避免带着不兼容的结构提供服务
+            raise
+        except Exception as e:
+            print(f"数据库结构准备失败: {e}")
+    
+    # 补建近期的日线与决策分区，避免新数据落入默认分区
+    with startup_timer.phase("分区检查"):
+        try:
+            created = await partition_maintainer.check()
+            if created:
+                print(f"新建分区: {', '.join(created)}")
+        except Exception as e:
+            print(f"分区检查失败: {e}")
+    
+    # 预加载股票代码到ID的映射，失败时按需回查
+    with startup_timer.phase("代码缓存"):
+        try:
+            async with get_db_session() as session:
+                count = await symbol_cache.load(session)
+            print(f"股票代码缓存加载完成: {count} 只")
+        except Exception as e:
+            print(f"股票代码缓存加载失败: {e}")
+    
+    # 启动系统指标后台采样
+    metrics_sampler.start()
+    
+    # 定期补建分区，进程跨月运行时也能提前建好下月分区
+    partition_maintainer.start()
+    
+    # 订阅其他 worker 发布的决策引擎更新
+    engine_sync.start()
+    print(startup_timer.summary())
     
     yield
     
     # 关闭时清理资源
-    await engine.dispose()
+    await metrics_sampler.stop()
+    await partition_maintainer.stop()
+    await engine_sync.stop()
+    await dispose_engines()
 
 
 # 创建FastAPI应用
@@ -49,14 +95,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 前端需要读取缓存验证头
+    expose_headers=["ETag", "Cache-Control"],
 )
 
+# 请求延迟与状态码埋点
+app.add_middleware(PrometheusMiddleware)
+
+# 按请求头开启的采样剖析，未配置令牌时不注册
+if get_profile_token():
+    app.add_middleware(ProfilingMiddleware)
+
 # 注册路由
 app.include_router(health.router, prefix="/api/v1", tags=["系统状态"])
 app.include_router(stocks.router, prefix="/api/v1", tags=["股票数据"])
 app.include_router(models.router, prefix="/api/v1", tags=["模型管理"])
 app.include_router(decisions.router, prefix="/api/v1", tags=["决策引擎"])
 app.include_router(backtest.router, prefix="/api/v1", tags=["回测分析"])
+app.include_router(profiles.router, prefix="/api/v1", tags=["系统状态"])
 
 
 @app.exception_handler(HTTPException)
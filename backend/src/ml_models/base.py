@@ -3,13 +3,19 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from datetime import datetime
 import pandas as pd
 
 from src.models.stock_models import (
     DecisionType, ModelSignal, ModelType
 )
+from src.ml_models.indicators import IndicatorCache
+from src.services.instrumentation import model_signal_duration_seconds
+
+
+# 信号序列的列
+SIGNAL_COLUMNS = ['decision', 'confidence', 'signal_strength', 'reasoning']
 
 
 class BaseBacktestModel(ABC):
@@ -27,8 +33,8 @@ class BaseBacktestModel(ABC):
         self.created_at: datetime = datetime.now()
 
     @abstractmethod
-    def generate_signal(self, data: pd.DataFrame) -> ModelSignal:
-        """生成交易信号"""
+    def generate_signal(self, data: pd.DataFrame, cache: Optional[IndicatorCache] = None) -> ModelSignal:
+        """生成交易信号，cache 为同一次运行内各模型共享的指标缓存"""
         pass
 
     @abstractmethod
@@ -36,15 +42,45 @@ class BaseBacktestModel(ABC):
         """验证模型参数"""
         pass
 
-    def backtest(self, data: pd.DataFrame, initial_capital: float = 100000) -> Dict[str, Any]:
-        """执行回测"""
+    def get_feature_specs(self) -> List[tuple]:
+        """模型所需的预计算特征规格，默认不依赖特征"""
+        return []
+
+    def get_warmup_bars(self) -> int:
+        """生成有效信号所需的最少K线数（含当日），默认只需当日一根"""
+        return 1
+
+    def generate_signal_series(self, data: pd.DataFrame,
+                               cache: Optional[IndicatorCache] = None) -> pd.DataFrame:
+        """生成逐日信号序列
+
+        第 i 行等价于 generate_signal(data.iloc[:i+1])，列为 SIGNAL_COLUMNS。
+        默认逐日调用 generate_signal，子类可重写为向量化实现。
+        """
+        rows = []
+        for i in range(len(data)):
+            signal = self.generate_signal(data.iloc[:i + 1])
+            rows.append({
+                'decision': signal.decision.value,
+                'confidence': float(signal.confidence),
+                'signal_strength': float(signal.signal_strength),
+                'reasoning': signal.reasoning
+            })
+        return pd.DataFrame(rows, index=data.index, columns=SIGNAL_COLUMNS)
+
+    def backtest(self, data: pd.DataFrame, initial_capital: float = 100000,
+                 start_index: int = 0) -> Dict[str, Any]:
+        """执行回测
+
+        start_index 之前的数据仅作为指标预热，不产生交易。
+        """
         # 基础回测逻辑，子类可以重写
         signals = []
         positions = []
         capital = initial_capital
         current_position = 0
         
-        for i in range(len(data)):
+        for i in range(start_index, len(data)):
             current_data = data.iloc[:i+1]
             signal = self.generate_signal(current_data)
             signals.append(signal)
@@ -76,7 +112,7 @@ class BaseBacktestModel(ABC):
             'final_value': final_value,
             'signals': signals,
             'positions': positions,
-            'trades': self._extract_trades(positions, data)
+            'trades': self._extract_trades(positions, data.iloc[start_index:])
         }
 
     def _extract_trades(self, positions: list, data: pd.DataFrame) -> list:
@@ -169,9 +205,11 @@ class ModelManager:
     def run_models_on_data(self, data: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
         """在所有模型上运行数据"""
         results = {}
+        cache = IndicatorCache()
         for model_id, model in self.models.items():
             try:
-                signal = model.generate_signal(data)
+                with model_signal_duration_seconds.time(model=type(model).__name__):
+                    signal = model.generate_signal(data, cache)
                 results[model_id] = {
                     'model_name': model.name,
                     'signal': signal.model_dump() if hasattr(signal, 'model_dump') else signal,
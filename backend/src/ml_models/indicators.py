@@ -0,0 +1,171 @@
+"""
+技术指标计算
+
+模型与特征存储共用同一套指标实现和列命名规则，
+当数据中已包含预计算的特征列时直接复用，否则现场计算。
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# 特征规格: (指标名称, 参数元组)，如 ('sma', (5,))、('macd', (12, 26, 9))
+FeatureSpec = Tuple[str, Tuple[int, ...]]
+
+
+class IndicatorCache:
+    """单次决策运行内共享的指标缓存
+
+    以 (数据对象, 指标, 参数) 为键，同一标的上多个模型（或同一模型的
+    多组参数）需要相同的滚动/指数均线时只计算一次。
+    """
+
+    def __init__(self):
+        self._series: Dict[tuple, Any] = {}
+        # 持有数据引用，避免缓存存活期间对象id被复用
+        self._sources: Dict[int, pd.DataFrame] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, data: pd.DataFrame, indicator: str, params: tuple,
+                       compute: Callable[[], Any]) -> Any:
+        """命中则返回缓存结果，否则计算并缓存"""
+        key = (id(data), len(data), indicator, params)
+        if key in self._series:
+            self.hits += 1
+            return self._series[key]
+
+        self.misses += 1
+        self._sources[id(data)] = data
+        value = compute()
+        self._series[key] = value
+        return value
+
+    def clear(self):
+        """清空缓存"""
+        self._series.clear()
+        self._sources.clear()
+
+
+def _cached(cache: Optional[IndicatorCache], data: pd.DataFrame, indicator: str,
+            params: tuple, compute: Callable[[], Any]) -> Any:
+    """有缓存时经缓存计算，否则直接计算"""
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(data, indicator, params, compute)
+
+
+def feature_name(indicator: str, *params: int) -> str:
+    """生成特征列名，如 sma_5、macd_signal_12_26_9"""
+    return "_".join([indicator, *[str(param) for param in params]])
+
+
+def _precomputed(data: pd.DataFrame, column: str):
+    """获取预计算的特征列，最近两行缺失时视为不可用"""
+    if column not in data.columns:
+        return None
+    series = data[column]
+    if series.iloc[-2:].isna().any():
+        return None
+    return series.astype(float)
+
+
+def sma(data: pd.DataFrame, window: int, cache: Optional[IndicatorCache] = None) -> pd.Series:
+    """简单移动平均线"""
+    precomputed = _precomputed(data, feature_name('sma', window))
+    if precomputed is not None:
+        return precomputed
+    return _cached(cache, data, 'sma', (window,),
+                   lambda: data['close_price'].rolling(window=window).mean())
+
+
+def ema(data: pd.DataFrame, span: int, cache: Optional[IndicatorCache] = None) -> pd.Series:
+    """指数移动平均线"""
+    precomputed = _precomputed(data, feature_name('ema', span))
+    if precomputed is not None:
+        return precomputed
+    return _cached(cache, data, 'ema', (span,),
+                   lambda: data['close_price'].ewm(span=span).mean())
+
+
+def rsi(data: pd.DataFrame, period: int, cache: Optional[IndicatorCache] = None) -> pd.Series:
+    """相对强弱指数"""
+    precomputed = _precomputed(data, feature_name('rsi', period))
+    if precomputed is not None:
+        return precomputed
+
+    def compute() -> pd.Series:
+        # 涨跌幅拆分与周期无关，多组参数共享
+        gain, loss = _cached(cache, data, 'gain_loss', (), lambda: _split_gain_loss(data))
+        avg_gain = gain.rolling(window=period).mean()
+        avg_loss = loss.rolling(window=period).mean()
+
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+    return _cached(cache, data, 'rsi', (period,), compute)
+
+
+def _split_gain_loss(data: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+    """拆分收盘价的上涨与下跌幅度"""
+    delta = data['close_price'].diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    return gain, loss
+
+
+def macd(data: pd.DataFrame, fast_period: int, slow_period: int, signal_period: int,
+         cache: Optional[IndicatorCache] = None) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """MACD指标，返回 (MACD线, 信号线, 柱状图)"""
+    params = (fast_period, slow_period, signal_period)
+    macd_line = _precomputed(data, feature_name('macd', *params))
+    signal_line = _precomputed(data, feature_name('macd_signal', *params))
+    if macd_line is not None and signal_line is not None:
+        return macd_line, signal_line, macd_line - signal_line
+
+    def compute() -> Tuple[pd.Series, pd.Series, pd.Series]:
+        line = ema(data, fast_period, cache) - ema(data, slow_period, cache)
+        signal = line.ewm(span=signal_period).mean()
+        return line, signal, line - signal
+
+    return _cached(cache, data, 'macd', params, compute)
+
+
+def compute_features(data: pd.DataFrame, specs: List[FeatureSpec]) -> pd.DataFrame:
+    """按特征规格批量计算指标，返回与输入同索引的特征表"""
+    # 去掉已有的特征列，保证从收盘价重新计算
+    base = data[['close_price']]
+    cache = IndicatorCache()
+    columns: Dict[str, pd.Series] = {}
+
+    for indicator, params in specs:
+        if indicator == 'sma':
+            columns[feature_name('sma', *params)] = sma(base, *params, cache=cache)
+        elif indicator == 'ema':
+            columns[feature_name('ema', *params)] = ema(base, *params, cache=cache)
+        elif indicator == 'rsi':
+            columns[feature_name('rsi', *params)] = rsi(base, *params, cache=cache)
+        elif indicator == 'macd':
+            macd_line, signal_line, histogram = macd(base, *params, cache=cache)
+            columns[feature_name('macd', *params)] = macd_line
+            columns[feature_name('macd_signal', *params)] = signal_line
+            columns[feature_name('macd_hist', *params)] = histogram
+        else:
+            raise ValueError(f"未知的特征类型: {indicator}")
+
+    return pd.DataFrame(columns, index=data.index)
+
+
+def spec_columns(specs: List[FeatureSpec]) -> List[str]:
+    """特征规格对应的全部列名"""
+    names = []
+    for indicator, params in specs:
+        if indicator == 'macd':
+            names.extend([
+                feature_name('macd', *params),
+                feature_name('macd_signal', *params),
+                feature_name('macd_hist', *params)
+            ])
+        else:
+            names.append(feature_name(indicator, *params))
+    return names
@@ -2,15 +2,41 @@
 技术指标模型实现
 """
 
+import inspect
 import pandas as pd
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 
-from src.ml_models.base import BaseBacktestModel
+from src.ml_models.base import BaseBacktestModel, SIGNAL_COLUMNS
+from src.ml_models import indicators
+from src.ml_models.indicators import FeatureSpec, IndicatorCache
 from src.models.stock_models import (
     DecisionType, ModelSignal, ModelType
 )
 
+# EMA 预热的周期倍数：起点的残余权重约为 e^-(2*倍数)，5 倍时可忽略，
+# 只加载预热K线生成的决策与按完整历史计算的结果一致
+EMA_SETTLING_SPANS = 5
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """上一交易日的值，首行取自身（与单日信号中数据不足两行时的处理一致）"""
+    previous = np.roll(values, 1)
+    if len(values):
+        previous[0] = values[0]
+    return previous
+
+
+def _signal_frame(index: pd.Index, decision: np.ndarray, confidence: np.ndarray,
+                  signal_strength: np.ndarray, reasoning: List[str]) -> pd.DataFrame:
+    """组装信号序列"""
+    return pd.DataFrame({
+        'decision': decision,
+        'confidence': confidence.astype(float),
+        'signal_strength': signal_strength.astype(float),
+        'reasoning': reasoning
+    }, index=index, columns=SIGNAL_COLUMNS)
+
 
 class MovingAverageCrossover(BaseBacktestModel):
     """移动平均线交叉模型"""
@@ -31,7 +57,15 @@ class MovingAverageCrossover(BaseBacktestModel):
                 self.long_window > 0 and 
                 self.short_window < self.long_window)
 
-    def generate_signal(self, data: pd.DataFrame) -> ModelSignal:
+    def get_feature_specs(self) -> List[FeatureSpec]:
+        """所需的特征规格"""
+        return [('sma', (self.short_window,)), ('sma', (self.long_window,))]
+
+    def get_warmup_bars(self) -> int:
+        """判断交叉还需要前一日的长期均线"""
+        return self.long_window + 1
+
+    def generate_signal(self, data: pd.DataFrame, cache: Optional[IndicatorCache] = None) -> ModelSignal:
         """生成交易信号"""
         if len(data) < self.long_window:
             return ModelSignal(
@@ -43,8 +77,8 @@ class MovingAverageCrossover(BaseBacktestModel):
             )
 
         # 计算移动平均线
-        sma_short = data['close_price'].rolling(window=self.short_window).mean()
-        sma_long = data['close_price'].rolling(window=self.long_window).mean()
+        sma_short = indicators.sma(data, self.short_window, cache)
+        sma_long = indicators.sma(data, self.long_window, cache)
 
         # 获取最新值
         current_short = sma_short.iloc[-1]
@@ -86,6 +120,42 @@ class MovingAverageCrossover(BaseBacktestModel):
             )
 
 
+    def generate_signal_series(self, data: pd.DataFrame,
+                               cache: Optional[IndicatorCache] = None) -> pd.DataFrame:
+        """向量化生成逐日信号序列"""
+        current_short = indicators.sma(data, self.short_window, cache).to_numpy(dtype=float)
+        current_long = indicators.sma(data, self.long_window, cache).to_numpy(dtype=float)
+        prev_short = _previous(current_short)
+        prev_long = _previous(current_long)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            insufficient = np.arange(len(data)) + 1 < self.long_window
+            golden = ~insufficient & (current_short > current_long) & (prev_short <= prev_long)
+            death = ~insufficient & ~golden & (current_short < current_long) & (prev_short >= prev_long)
+
+            decision = np.full(len(data), DecisionType.HOLD.value, dtype=object)
+            decision[golden] = DecisionType.BUY.value
+            decision[death] = DecisionType.SELL.value
+
+            distance = np.abs(current_short - current_long) / current_long
+            confidence = np.where(insufficient, 0.3, np.maximum(0.3, 1.0 - distance * 2))
+            confidence = np.where(golden | death, 0.7, confidence)
+
+            signal_strength = np.where(insufficient, 0.2, 0.3)
+            signal_strength = np.where(golden, np.minimum((current_short - current_long) / current_long * 10, 1.0), signal_strength)
+            signal_strength = np.where(death, np.minimum((current_long - current_short) / current_short * 10, 1.0), signal_strength)
+
+        windows = f"(短:{self.short_window}日, 长:{self.long_window}日)"
+        reasoning = [
+            "数据不足，无法计算移动平均线" if insufficient[i]
+            else f"移动平均线金叉 {windows}" if golden[i]
+            else f"移动平均线死叉 {windows}" if death[i]
+            else "移动平均线无交叉信号"
+            for i in range(len(data))
+        ]
+        return _signal_frame(data.index, decision, confidence, signal_strength, reasoning)
+
+
 class RSIModel(BaseBacktestModel):
     """RSI模型"""
 
@@ -108,23 +178,19 @@ class RSIModel(BaseBacktestModel):
                 0 < self.oversold < 100 and
                 0 < self.overbought < 100)
 
-    def _calculate_rsi(self, data: pd.DataFrame) -> pd.Series:
+    def get_feature_specs(self) -> List[FeatureSpec]:
+        """所需的特征规格"""
+        return [('rsi', (self.period,))]
+
+    def get_warmup_bars(self) -> int:
+        """计算 period 个涨跌幅需要 period + 1 根K线"""
+        return self.period + 1
+
+    def _calculate_rsi(self, data: pd.DataFrame, cache: Optional[IndicatorCache] = None) -> pd.Series:
         """计算RSI指标"""
-        close_prices = data['close_price']
-        delta = close_prices.diff()
-        
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        
-        avg_gain = gain.rolling(window=self.period).mean()
-        avg_loss = loss.rolling(window=self.period).mean()
-        
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        return indicators.rsi(data, self.period, cache)
 
-    def generate_signal(self, data: pd.DataFrame) -> ModelSignal:
+    def generate_signal(self, data: pd.DataFrame, cache: Optional[IndicatorCache] = None) -> ModelSignal:
         """生成交易信号"""
         if len(data) < self.period + 1:
             return ModelSignal(
@@ -135,7 +201,7 @@ class RSIModel(BaseBacktestModel):
                 reasoning="数据不足，无法计算RSI"
             )
 
-        rsi = self._calculate_rsi(data)
+        rsi = self._calculate_rsi(data, cache)
         current_rsi = rsi.iloc[-1]
 
         if pd.isna(current_rsi):
@@ -186,6 +252,48 @@ class RSIModel(BaseBacktestModel):
             )
 
 
+    def generate_signal_series(self, data: pd.DataFrame,
+                               cache: Optional[IndicatorCache] = None) -> pd.DataFrame:
+        """向量化生成逐日信号序列"""
+        current_rsi = self._calculate_rsi(data, cache).to_numpy(dtype=float)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            insufficient = np.arange(len(data)) + 1 < self.period + 1
+            failed = ~insufficient & np.isnan(current_rsi)
+            oversold = ~insufficient & (current_rsi < self.oversold)
+            overbought = ~insufficient & (current_rsi > self.overbought)
+            neutral = ~(insufficient | failed | oversold | overbought)
+
+            decision = np.full(len(data), DecisionType.HOLD.value, dtype=object)
+            decision[oversold] = DecisionType.BUY.value
+            decision[overbought] = DecisionType.SELL.value
+
+            distance_to_oversold = np.abs(current_rsi - self.oversold) / self.oversold
+            distance_to_overbought = np.abs(current_rsi - self.overbought) / (100 - self.overbought)
+            neutral_confidence = np.maximum(0.4, 1.0 - np.minimum(distance_to_oversold, distance_to_overbought))
+
+            confidence = np.full(len(data), 0.3)
+            confidence[oversold | overbought] = 0.8
+            confidence[neutral] = neutral_confidence[neutral]
+
+            signal_strength = np.full(len(data), 0.2)
+            signal_strength[neutral] = 0.4
+            oversold_level = np.minimum((self.oversold - current_rsi) / self.oversold * 2, 1.0)
+            overbought_level = np.minimum((current_rsi - self.overbought) / (100 - self.overbought) * 2, 1.0)
+            signal_strength[oversold] = oversold_level[oversold]
+            signal_strength[overbought] = overbought_level[overbought]
+
+        reasoning = [
+            "数据不足，无法计算RSI" if insufficient[i]
+            else "RSI计算失败" if failed[i]
+            else f"RSI超卖 (当前:{current_rsi[i]:.1f}, 阈值:{self.oversold})" if oversold[i]
+            else f"RSI超买 (当前:{current_rsi[i]:.1f}, 阈值:{self.overbought})" if overbought[i]
+            else f"RSI正常区间 (当前:{current_rsi[i]:.1f})"
+            for i in range(len(data))
+        ]
+        return _signal_frame(data.index, decision, confidence, signal_strength, reasoning)
+
+
 class MACDModel(BaseBacktestModel):
     """MACD模型"""
 
@@ -207,20 +315,23 @@ class MACDModel(BaseBacktestModel):
                 self.slow_period > self.fast_period and
                 self.signal_period > 0)
 
-    def _calculate_macd(self, data: pd.DataFrame) -> tuple:
+    def get_feature_specs(self) -> List[FeatureSpec]:
+        """所需的特征规格"""
+        return [
+            ('ema', (self.fast_period,)),
+            ('ema', (self.slow_period,)),
+            ('macd', (self.fast_period, self.slow_period, self.signal_period))
+        ]
+
+    def get_warmup_bars(self) -> int:
+        """慢线 EMA 收敛所需长度加上信号线的预热长度"""
+        return EMA_SETTLING_SPANS * self.slow_period + self.signal_period
+
+    def _calculate_macd(self, data: pd.DataFrame, cache: Optional[IndicatorCache] = None) -> tuple:
         """计算MACD指标"""
-        close_prices = data['close_price']
-        
-        ema_fast = close_prices.ewm(span=self.fast_period).mean()
-        ema_slow = close_prices.ewm(span=self.slow_period).mean()
-        
-        macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=self.signal_period).mean()
-        histogram = macd_line - signal_line
-        
-        return macd_line, signal_line, histogram
+        return indicators.macd(data, self.fast_period, self.slow_period, self.signal_period, cache)
 
-    def generate_signal(self, data: pd.DataFrame) -> ModelSignal:
+    def generate_signal(self, data: pd.DataFrame, cache: Optional[IndicatorCache] = None) -> ModelSignal:
         """生成交易信号"""
         if len(data) < self.slow_period + self.signal_period:
             return ModelSignal(
@@ -231,7 +342,7 @@ class MACDModel(BaseBacktestModel):
                 reasoning="数据不足，无法计算MACD"
             )
 
-        macd_line, signal_line, histogram = self._calculate_macd(data)
+        macd_line, signal_line, histogram = self._calculate_macd(data, cache)
 
         # 获取最新值
         current_macd = macd_line.iloc[-1]
@@ -273,4 +384,56 @@ class MACDModel(BaseBacktestModel):
                 confidence=confidence,
                 signal_strength=0.3,
                 reasoning=f"MACD无交叉信号 (MACD:{current_macd:.3f}, 信号:{current_signal:.3f})"
-            )
\ No newline at end of file
+            )
+
+    def generate_signal_series(self, data: pd.DataFrame,
+                               cache: Optional[IndicatorCache] = None) -> pd.DataFrame:
+        """向量化生成逐日信号序列"""
+        macd_line, signal_line, histogram = self._calculate_macd(data, cache)
+        current_macd = macd_line.to_numpy(dtype=float)
+        current_signal = signal_line.to_numpy(dtype=float)
+        current_histogram = histogram.to_numpy(dtype=float)
+        prev_macd = _previous(current_macd)
+        prev_signal = _previous(current_signal)
+
+        with np.errstate(invalid='ignore'):
+            insufficient = np.arange(len(data)) + 1 < self.slow_period + self.signal_period
+            golden = ~insufficient & (current_macd > current_signal) & (prev_macd <= prev_signal)
+            death = ~insufficient & ~golden & (current_macd < current_signal) & (prev_macd >= prev_signal)
+
+            decision = np.full(len(data), DecisionType.HOLD.value, dtype=object)
+            decision[golden] = DecisionType.BUY.value
+            decision[death] = DecisionType.SELL.value
+
+            distance = np.abs(current_macd - current_signal)
+            confidence = np.where(insufficient, 0.3, np.maximum(0.4, 1.0 - distance * 10))
+            confidence = np.where(golden | death, 0.7, confidence)
+
+            signal_strength = np.where(insufficient, 0.2, 0.3)
+            signal_strength = np.where(golden | death, np.minimum(np.abs(current_histogram) * 10, 1.0), signal_strength)
+
+        reasoning = [
+            "数据不足，无法计算MACD" if insufficient[i]
+            else f"MACD金叉 (MACD:{current_macd[i]:.3f}, 信号:{current_signal[i]:.3f})" if golden[i]
+            else f"MACD死叉 (MACD:{current_macd[i]:.3f}, 信号:{current_signal[i]:.3f})" if death[i]
+            else f"MACD无交叉信号 (MACD:{current_macd[i]:.3f}, 信号:{current_signal[i]:.3f})"
+            for i in range(len(data))
+        ]
+        return _signal_frame(data.index, decision, confidence, signal_strength, reasoning)
+
+
+# 模型类型标识到模型类的映射
+TECHNICAL_MODEL_CLASSES = {
+    'moving_average_crossover': MovingAverageCrossover,
+    'rsi_model': RSIModel,
+    'macd_model': MACDModel
+}
+
+
+def create_technical_model(model_type: str, model_id: int, params: Dict[str, Any]) -> Optional[BaseBacktestModel]:
+    """按类型创建模型，忽略构造函数不接受的参数，参数无效时返回None"""
+    model_class = TECHNICAL_MODEL_CLASSES[model_type]
+    accepted = inspect.signature(model_class.__init__).parameters
+    kwargs = {name: value for name, value in params.items() if name in accepted and name != 'model_id'}
+    model = model_class(model_id, **kwargs)
+    return model if model.validate_parameters() else None
@@ -4,12 +4,13 @@
 
 from sqlalchemy import (
     BigInteger, String, Boolean, DateTime, Date, 
-    Numeric, Integer, Text, ForeignKey, CheckConstraint, UniqueConstraint
+    Numeric, Integer, Text, LargeBinary, ForeignKey, CheckConstraint, UniqueConstraint, Index
 )
+from sqlalchemy import event, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import JSONB
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional, Tuple
 
 class Base(DeclarativeBase):
     """基础模型类"""
@@ -32,12 +33,13 @@ class Stock(Base):
     final_decisions: Mapped[list["FinalDecision"]] = relationship(back_populates="stock")
 
 class StockDailyData(Base):
-    """股票日线数据表"""
+    """股票日线数据表，按交易日期年份分区"""
     __tablename__ = "stock_daily_data"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    # 分区表的主键必须包含分区键
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     stock_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False)
-    trade_date: Mapped[datetime] = mapped_column(Date, nullable=False)
+    trade_date: Mapped[datetime] = mapped_column(Date, primary_key=True)
     open_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
     high_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
     low_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
@@ -49,10 +51,117 @@ class StockDailyData(Base):
     # 关系
     stock: Mapped["Stock"] = relationship(back_populates="daily_data")
 
+    # 唯一约束同时覆盖按股票查询；日期范围扫描使用 BRIN 索引
     __table_args__ = (
         UniqueConstraint('stock_id', 'trade_date', name='uq_stock_date'),
+        Index('idx_daily_data_date_brin', 'trade_date', postgresql_using='brin'),
+        {'postgresql_partition_by': 'RANGE (trade_date)'},
+    )
+
+
+class RangePartitioning:
+    """按 trade_date 年或月范围分区的表"""
+
+    def __init__(self, table: str, interval: str):
+        assert interval in ("year", "month")
+        self.table = table
+        self.interval = interval
+
+    def period_start(self, day: date) -> date:
+        return date(day.year, 1, 1) if self.interval == "year" else date(day.year, day.month, 1)
+
+    def next_period(self, start: date) -> date:
+        if self.interval == "year":
+            return date(start.year + 1, 1, 1)
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+    def periods(self, first: date, last: date) -> List[date]:
+        """覆盖 [first, last] 的各分区起始日期"""
+        starts = []
+        start = self.period_start(first)
+        while start <= last:
+            starts.append(start)
+            start = self.next_period(start)
+        return starts
+
+    def partition_name(self, start: date) -> str:
+        suffix = f"y{start.year}" if self.interval == "year" else f"m{start.year}{start.month:02d}"
+        return f"{self.table}_{suffix}"
+
+    def partition_start(self, name: str) -> Optional[date]:
+        """由分区名解析分区起始日期，默认分区等其他名称返回None"""
+        prefix = f"{self.table}_{'y' if self.interval == 'year' else 'm'}"
+        suffix = name[len(prefix):]
+        if not name.startswith(prefix) or not suffix.isdigit() or len(suffix) != (4 if self.interval == "year" else 6):
+            return None
+        if self.interval == "year":
+            return date(int(suffix), 1, 1)
+        return date(int(suffix[:4]), int(suffix[4:]), 1)
+
+    @property
+    def default_partition_name(self) -> str:
+        return f"{self.table}_default"
+
+    def partition_ddl(self, start: date) -> str:
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.partition_name(start)} PARTITION OF {self.table} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{self.next_period(start).isoformat()}')"
+        )
+
+    def default_partition_ddl(self) -> str:
+        return f"CREATE TABLE IF NOT EXISTS {self.default_partition_name} PARTITION OF {self.table} DEFAULT"
+
+    def create_partitions(self, connection, first: date, last: date):
+        """同步连接上创建分区与默认分区，供 after_create 事件使用"""
+        for start in self.periods(first, last):
+            connection.execute(text(self.partition_ddl(start)))
+        connection.execute(text(self.default_partition_ddl()))
+
+
+# 日线按年分区，覆盖的起始日期，更早的数据进入默认分区
+DAILY_DATA_PARTITIONING = RangePartitioning("stock_daily_data", "year")
+DAILY_DATA_FIRST_DATE = date(1990, 1, 1)
+
+
+@event.listens_for(StockDailyData.__table__, "after_create")
+def _create_daily_data_partitions(target, connection, **kw):
+    """create_all 建表后创建逐年分区（至明年）与默认分区"""
+    DAILY_DATA_PARTITIONING.create_partitions(
+        connection, DAILY_DATA_FIRST_DATE, date(date.today().year + 1, 12, 31)
+    )
+
+
+class StockFeature(Base):
+    """股票技术指标特征表"""
+    __tablename__ = "stock_features"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    stock_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False)
+    trade_date: Mapped[datetime] = mapped_column(Date, nullable=False)
+    features: Mapped[dict] = mapped_column(JSONB, nullable=False, comment="指标名称到数值的映射")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint('stock_id', 'trade_date', name='uq_feature_stock_date'),
     )
 
+
+class LatestBar(Base):
+    """最新K线快照表，每只股票一行，随日线写入在同一事务内更新"""
+    __tablename__ = "latest_bars"
+
+    stock_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("stocks.id", ondelete="CASCADE"), primary_key=True)
+    daily_data_id: Mapped[int] = mapped_column(BigInteger, nullable=False, comment="对应 stock_daily_data.id")
+    trade_date: Mapped[datetime] = mapped_column(Date, nullable=False)
+    open_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    high_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    low_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    close_price: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    volume: Mapped[Optional[int]] = mapped_column(BigInteger)
+    turnover: Mapped[Optional[float]] = mapped_column(Numeric(15, 2))
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, comment="对应日线记录的创建时间")
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+
 class BacktestModel(Base):
     """回测模型表"""
     __tablename__ = "backtest_models"
@@ -71,13 +180,13 @@ class BacktestModel(Base):
     performances: Mapped[list["ModelPerformance"]] = relationship(back_populates="model")
 
 class ModelDecision(Base):
-    """模型决策记录表"""
+    """模型决策记录表，按交易日期月份分区"""
     __tablename__ = "model_decisions"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     stock_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False)
     model_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("backtest_models.id", ondelete="CASCADE"), nullable=False)
-    trade_date: Mapped[datetime] = mapped_column(Date, nullable=False)
+    trade_date: Mapped[datetime] = mapped_column(Date, primary_key=True)
     decision: Mapped[str] = mapped_column(String(10), nullable=False)
     confidence: Mapped[Optional[float]] = mapped_column(Numeric(5, 4))
     signal_strength: Mapped[Optional[float]] = mapped_column(Numeric(5, 4))
@@ -93,15 +202,18 @@ class ModelDecision(Base):
         CheckConstraint("decision IN ('BUY', 'SELL', 'HOLD')", name='chk_decision_type'),
         CheckConstraint("confidence >= 0 AND confidence <= 1", name='chk_confidence_range'),
         CheckConstraint("signal_strength >= 0 AND signal_strength <= 1", name='chk_signal_range'),
+        Index('idx_model_decisions_stock_date', 'stock_id', 'trade_date'),
+        Index('idx_model_decisions_model_date', 'model_id', 'trade_date'),
+        {'postgresql_partition_by': 'RANGE (trade_date)'},
     )
 
 class FinalDecision(Base):
-    """综合决策表"""
+    """综合决策表，按交易日期月份分区"""
     __tablename__ = "final_decisions"
 
-    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     stock_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False)
-    trade_date: Mapped[datetime] = mapped_column(Date, nullable=False)
+    trade_date: Mapped[datetime] = mapped_column(Date, primary_key=True)
     buy_votes: Mapped[Optional[int]] = mapped_column(Integer)
     sell_votes: Mapped[Optional[int]] = mapped_column(Integer)
     hold_votes: Mapped[Optional[int]] = mapped_column(Integer)
@@ -118,6 +230,76 @@ class FinalDecision(Base):
         CheckConstraint("final_decision IN ('BUY', 'SELL', 'HOLD')", name='chk_final_decision_type'),
         CheckConstraint("confidence_score >= 0 AND confidence_score <= 1", name='chk_final_confidence_range'),
         CheckConstraint("risk_level IN ('LOW', 'MEDIUM', 'HIGH')", name='chk_risk_level'),
+        # 决策列表按 (trade_date, id) 倒序分页
+        Index('idx_final_decisions_date_id', 'trade_date', 'id'),
+        {'postgresql_partition_by': 'RANGE (trade_date)'},
+    )
+
+
+# 决策表按月分区，建表时创建最近一年至两个月后的分区，更早的月份按需创建
+MODEL_DECISIONS_PARTITIONING = RangePartitioning("model_decisions", "month")
+FINAL_DECISIONS_PARTITIONING = RangePartitioning("final_decisions", "month")
+DECISION_PARTITIONS_AHEAD = 2
+
+
+def decision_partition_window(today: Optional[date] = None) -> Tuple[date, date]:
+    """建表及启动时预建的决策分区范围"""
+    today = today or date.today()
+    first = date(today.year - 1, today.month, 1)
+    last = today
+    for _ in range(DECISION_PARTITIONS_AHEAD):
+        last = MODEL_DECISIONS_PARTITIONING.next_period(MODEL_DECISIONS_PARTITIONING.period_start(last))
+    return first, last
+
+
+@event.listens_for(ModelDecision.__table__, "after_create")
+def _create_model_decision_partitions(target, connection, **kw):
+    MODEL_DECISIONS_PARTITIONING.create_partitions(connection, *decision_partition_window())
+
+
+@event.listens_for(FinalDecision.__table__, "after_create")
+def _create_final_decision_partitions(target, connection, **kw):
+    FINAL_DECISIONS_PARTITIONING.create_partitions(connection, *decision_partition_window())
+
+
+class ModelDecisionRollup(Base):
+    """超过保留期的模型决策按月汇总"""
+    __tablename__ = "model_decision_rollups"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    stock_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False)
+    model_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("backtest_models.id", ondelete="CASCADE"), nullable=False)
+    month: Mapped[datetime] = mapped_column(Date, nullable=False, comment="月份首日")
+    buy_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sell_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    hold_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    avg_confidence: Mapped[Optional[float]] = mapped_column(Numeric(5, 4))
+    avg_signal_strength: Mapped[Optional[float]] = mapped_column(Numeric(5, 4))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint('stock_id', 'model_id', 'month', name='uq_model_rollup_stock_model_month'),
+    )
+
+class FinalDecisionRollup(Base):
+    """超过保留期的综合决策按月汇总"""
+    __tablename__ = "final_decision_rollups"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    stock_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("stocks.id", ondelete="CASCADE"), nullable=False)
+    month: Mapped[datetime] = mapped_column(Date, nullable=False, comment="月份首日")
+    trading_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    buy_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sell_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    hold_days: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    avg_confidence: Mapped[Optional[float]] = mapped_column(Numeric(5, 4))
+    first_trade_date: Mapped[Optional[datetime]] = mapped_column(Date)
+    last_trade_date: Mapped[Optional[datetime]] = mapped_column(Date)
+    last_decision: Mapped[Optional[str]] = mapped_column(String(10), comment="当月最后一个交易日的决策")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint('stock_id', 'month', name='uq_final_rollup_stock_month'),
     )
 
 class ModelPerformance(Base):
@@ -141,4 +323,38 @@ class ModelPerformance(Base):
 
     __table_args__ = (
         UniqueConstraint('model_id', 'backtest_date', name='uq_model_backtest_date'),
-    )
\ No newline at end of file
+    )
+
+class BacktestRun(Base):
+    """回测运行记录表"""
+    __tablename__ = "backtest_runs"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    run_type: Mapped[str] = mapped_column(String(20), nullable=False, comment="回测类型")
+    symbol: Mapped[Optional[str]] = mapped_column(String(20), comment="单股票回测的股票代码")
+    model_id: Mapped[Optional[int]] = mapped_column(BigInteger, ForeignKey("backtest_models.id", ondelete="SET NULL"))
+    start_date: Mapped[Optional[datetime]] = mapped_column(Date)
+    end_date: Mapped[Optional[datetime]] = mapped_column(Date)
+    parameters: Mapped[dict] = mapped_column(JSONB, nullable=False, comment="回测请求参数")
+    metrics: Mapped[dict] = mapped_column(JSONB, nullable=False, comment="绩效指标")
+    trades: Mapped[list] = mapped_column(JSONB, nullable=False, comment="交易记录")
+    equity_points: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    equity_dates: Mapped[Optional[bytes]] = mapped_column(LargeBinary, comment="差分编码并压缩的权益曲线日期")
+    equity_values: Mapped[Optional[bytes]] = mapped_column(LargeBinary, comment="差分编码并压缩的权益曲线数值")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index('idx_backtest_runs_symbol', 'symbol', 'created_at'),
+        Index('idx_backtest_runs_model', 'model_id', 'created_at'),
+    )
+
+# 当前代码依赖的结构版本，与 data/migrations 中最新的迁移编号一致
+SCHEMA_VERSION = 5
+
+class SchemaMigration(Base):
+    """结构版本表，迁移脚本执行后登记各自的编号"""
+    __tablename__ = "schema_migrations"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
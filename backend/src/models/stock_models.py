@@ -4,7 +4,7 @@
 
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import date, datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from enum import Enum
 from decimal import Decimal
 
@@ -232,6 +232,16 @@ class RiskConfig(BaseModel):
     enable_circuit_breaker: bool = Field(True, description="启用熔断机制")
 
 
+class EngineConfigUpdate(BaseModel):
+    """决策引擎配置更新模型，未提供的字段保持不变"""
+    strategy: Optional[VotingStrategy] = Field(None, description="投票策略")
+    threshold: Optional[Decimal] = Field(None, ge=0, le=1, description="决策阈值")
+    min_confidence: Optional[Decimal] = Field(None, ge=0, le=1, description="最小置信度")
+    enable_risk_control: Optional[bool] = Field(None, description="启用风险控制")
+    max_daily_loss: Optional[Decimal] = Field(None, ge=0, le=1, description="最大日亏损")
+    max_position_size: Optional[Decimal] = Field(None, ge=0, le=1, description="最大仓位比例")
+
+
 class DecisionRequest(BaseModel):
     """决策请求模型"""
     symbol: str = Field(..., description="股票代码")
@@ -245,6 +255,13 @@ class BatchDecisionRequest(BaseModel):
     trade_date: date = Field(..., description="交易日期")
 
 
+class DecisionReplayRequest(BaseModel):
+    """历史决策回放请求模型"""
+    symbols: Optional[List[str]] = Field(None, description="股票代码列表，为空时回放全部活跃股票")
+    start_date: date = Field(..., description="开始日期")
+    end_date: date = Field(..., description="结束日期")
+
+
 class BacktestRequest(BaseModel):
     """回测请求模型"""
     symbol: str = Field(..., description="股票代码")
@@ -263,6 +280,27 @@ class PortfolioBacktestRequest(BaseModel):
     rebalance_frequency: str = Field("monthly", description="再平衡频率")
 
 
+class WalkForwardRequest(BaseModel):
+    """滚动前推优化请求模型"""
+    model_id: int = Field(..., description="模型ID")
+    symbol: str = Field(..., description="股票代码")
+    start_date: date = Field(..., description="开始日期")
+    end_date: date = Field(..., description="结束日期")
+    train_window: int = Field(120, gt=0, description="训练窗口交易日数")
+    test_window: int = Field(20, gt=0, description="测试窗口交易日数")
+    anchored: bool = Field(False, description="是否锚定训练起点（扩张窗口）")
+    param_grid: Dict[str, List[Any]] = Field(default_factory=dict, description="参数搜索网格")
+    objective: str = Field("sharpe_ratio", description="优化目标: sharpe_ratio 或 total_return")
+    initial_capital: Decimal = Field(100000, gt=0, description="初始资金")
+    save_performance: bool = Field(True, description="是否写入模型性能表")
+
+
+class BacktestJobRequest(BaseModel):
+    """异步回测任务请求模型"""
+    kind: str = Field(..., description="任务类型: model/portfolio/walk-forward/compare")
+    payload: Union[Dict[str, Any], List[Dict[str, Any]]] = Field(..., description="对应同步回测接口的请求体")
+
+
 class APIResponse(BaseModel):
     """API响应模型"""
     data: Optional[Any] = Field(None, description="响应数据")
@@ -276,4 +314,5 @@ class PaginatedResponse(BaseModel):
     data: List[Any] = Field(..., description="数据列表")
     total: int = Field(..., description="总记录数")
     skip: int = Field(0, description="跳过记录数")
-    limit: int = Field(100, description="限制记录数")
\ No newline at end of file
+    limit: int = Field(100, description="限制记录数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，没有更多数据时为空")
\ No newline at end of file
@@ -0,0 +1,335 @@
+"""
+异步回测任务队列
+
+提交回测后立即返回任务ID，由独立的工作进程从 Redis 队列中取出执行，
+客户端轮询或通过 SSE 获取进度，完成后读取结果。相同类型和参数的任务
+在未失败前只执行一次，重复提交返回已有任务。
+
+工作进程取出任务时原子地移入处理中列表，执行期间定期刷新心跳；进程崩溃或被杀后
+心跳过期，回收器将任务重新排队，超过最大尝试次数时标记失败。
+
+启动工作进程（在 backend 目录下）:
+    python -m src.services.backtest_jobs --workers 4
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import asyncio
+import argparse
+import multiprocessing
+from contextvars import ContextVar
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from src.config.redis_config import redis_config
+
+KEY_PREFIX = "backtest_job"
+QUEUE_KEY = f"{KEY_PREFIX}s:queue"
+PROCESSING_KEY = f"{KEY_PREFIX}s:processing"
+
+# 心跳刷新间隔（秒）
+HEARTBEAT_INTERVAL = int(os.getenv("BACKTEST_JOB_HEARTBEAT_INTERVAL", "15"))
+
+# 心跳超过该时长（秒）未刷新的执行中任务视为工作进程已中断
+HEARTBEAT_TIMEOUT = int(os.getenv("BACKTEST_JOB_HEARTBEAT_TIMEOUT", "120"))
+
+# 单个任务的最大执行次数，中断后重新排队不超过该次数
+MAX_ATTEMPTS = int(os.getenv("BACKTEST_JOB_MAX_ATTEMPTS", "2"))
+
+JobHandler = Callable[[Any], Awaitable[Any]]
+
+
+class JobStatus(str, Enum):
+    """任务状态"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+FINISHED_STATUSES = (JobStatus.SUCCEEDED.value, JobStatus.FAILED.value)
+
+# 当前执行中的任务，供回测代码上报进度
+_current_job: ContextVar[Optional[Tuple["BacktestJobQueue", str]]] = ContextVar("current_backtest_job", default=None)
+
+
+async def report_progress(progress: float, message: str = ""):
+    """上报当前任务进度（0~1），不在任务中执行时不做任何事"""
+    current = _current_job.get()
+    if current is None:
+        return
+    queue, job_id = current
+    try:
+        await queue.update(job_id, progress=round(min(max(progress, 0.0), 1.0), 4), message=message,
+                           heartbeat_at=datetime.now().isoformat())
+    except Exception as e:
+        print(f"上报任务进度失败: {e}")
+
+
+class BacktestJobQueue:
+    """基于 Redis 的回测任务队列"""
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl or int(os.getenv("BACKTEST_JOB_TTL", str(7 * 24 * 3600)))
+        self._handlers: Dict[str, JobHandler] = {}
+        self._redis = None
+        # 上次回收时在处理中列表里、但仍为排队状态的任务
+        self._unclaimed = set()
+
+    def register(self, kind: str, handler: JobHandler):
+        """注册任务类型及其执行函数"""
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self):
+        return list(self._handlers)
+
+    async def _get_redis(self):
+        if self._redis is None:
+            self._redis = await redis_config.get_redis_client()
+        return self._redis
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"{KEY_PREFIX}:{job_id}"
+
+    @staticmethod
+    def _result_key(job_id: str) -> str:
+        return f"{KEY_PREFIX}:{job_id}:result"
+
+    @staticmethod
+    def _dedupe_key(request_hash: str) -> str:
+        return f"{KEY_PREFIX}:dedupe:{request_hash}"
+
+    @staticmethod
+    def is_stale(job: Dict[str, Any]) -> bool:
+        """执行中的任务心跳是否已过期"""
+        if job["status"] != JobStatus.RUNNING.value:
+            return False
+        heartbeat_at = job.get("heartbeat_at") or job.get("started_at")
+        if not heartbeat_at:
+            return True
+        return (datetime.now() - datetime.fromisoformat(heartbeat_at)).total_seconds() > HEARTBEAT_TIMEOUT
+
+    @staticmethod
+    def request_hash(kind: str, payload: Any) -> str:
+        """任务类型与参数的确定性哈希，用于去重"""
+        canonical = json.dumps(
+            {"kind": kind, "payload": jsonable_encoder(payload)},
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+    async def submit(self, kind: str, payload: Any) -> Tuple[Dict[str, Any], bool]:
+        """提交任务，返回 (任务, 是否命中已有任务)"""
+        if kind not in self._handlers:
+            raise ValueError(f"不支持的任务类型: {kind}")
+
+        client = await self._get_redis()
+        request_hash = self.request_hash(kind, payload)
+        dedupe_key = self._dedupe_key(request_hash)
+        job_id = uuid.uuid4().hex
+
+        if not await client.set(dedupe_key, job_id, nx=True, ex=self.ttl):
+            existing_id = await client.get(dedupe_key)
+            existing = await self.get(existing_id) if existing_id else None
+            if existing and existing["status"] != JobStatus.FAILED.value:
+                if not self.is_stale(existing):
+                    return existing, True
+                # 工作进程已中断，放弃旧任务后重新提交
+                await client.lrem(PROCESSING_KEY, 0, existing["job_id"])
+                await self._fail(existing, "工作进程中断，任务已重新提交")
+            await client.set(dedupe_key, job_id, ex=self.ttl)
+
+        job_key = self._job_key(job_id)
+        await client.hset(job_key, mapping={
+            "job_id": job_id,
+            "kind": kind,
+            "payload": json.dumps(jsonable_encoder(payload), ensure_ascii=False),
+            "request_hash": request_hash,
+            "status": JobStatus.QUEUED.value,
+            "progress": 0,
+            "message": "",
+            "error": "",
+            "created_at": datetime.now().isoformat(),
+            "started_at": "",
+            "heartbeat_at": "",
+            "finished_at": "",
+            "attempts": 0
+        })
+        await client.expire(job_key, self.ttl)
+        await client.lpush(QUEUE_KEY, job_id)
+        return await self.get(job_id), False
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """获取任务状态（不含结果）"""
+        client = await self._get_redis()
+        job = await client.hgetall(self._job_key(job_id))
+        if not job:
+            return None
+        job["payload"] = json.loads(job["payload"])
+        job["progress"] = float(job["progress"])
+        job["attempts"] = int(job.get("attempts") or 0)
+        return {key: (value if value != "" else None) for key, value in job.items()}
+
+    async def get_result(self, job_id: str) -> Optional[Any]:
+        """获取任务结果，未完成或失败时返回None"""
+        client = await self._get_redis()
+        payload = await client.get(self._result_key(job_id))
+        return json.loads(payload) if payload is not None else None
+
+    async def update(self, job_id: str, **fields):
+        """更新任务字段"""
+        client = await self._get_redis()
+        await client.hset(self._job_key(job_id), mapping={
+            key: ("" if value is None else value) for key, value in fields.items()
+        })
+
+    async def _fail(self, job: Dict[str, Any], error: str):
+        await self.update(job["job_id"], status=JobStatus.FAILED.value, error=error,
+                          finished_at=datetime.now().isoformat())
+        # 失败的任务允许重新提交
+        client = await self._get_redis()
+        await client.delete(self._dedupe_key(job["request_hash"]))
+
+    async def _heartbeat(self, job_id: str):
+        """任务执行期间定期刷新心跳，回测代码长时间不上报进度时也不会被回收"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await self.update(job_id, heartbeat_at=datetime.now().isoformat())
+            except Exception as e:
+                print(f"刷新任务心跳失败: {e}")
+
+    async def reap_stale(self) -> int:
+        """回收心跳过期的任务：未超过最大尝试次数时重新排队，否则标记失败，返回回收数量"""
+        client = await self._get_redis()
+        reaped = 0
+        unclaimed = set()
+        for job_id in await client.lrange(PROCESSING_KEY, 0, -1):
+            job = await self.get(job_id)
+            if job is not None and job["status"] == JobStatus.QUEUED.value:
+                # 刚被取出、尚未标记为执行中；到下次回收仍未开始执行则视为中断
+                if job_id not in self._unclaimed:
+                    unclaimed.add(job_id)
+                    continue
+            elif job is not None and job["status"] == JobStatus.RUNNING.value and not self.is_stale(job):
+                continue
+            # 多个进程同时回收时只有移出成功的一方处理
+            if not await client.lrem(PROCESSING_KEY, 1, job_id):
+                continue
+            reaped += 1
+            if job is None or job["status"] in FINISHED_STATUSES:
+                continue
+            if job["attempts"] >= MAX_ATTEMPTS:
+                print(f"回测任务 {job_id} 多次中断，已放弃")
+                await self._fail(job, f"工作进程中断，已尝试 {job['attempts']} 次")
+                continue
+            print(f"回测任务 {job_id} 心跳过期，重新排队")
+            await self.update(job_id, status=JobStatus.QUEUED.value, progress=0,
+                              message="工作进程中断，重新排队", heartbeat_at=None)
+            # 放到队列出口一端，优先重新执行
+            await client.rpush(QUEUE_KEY, job_id)
+        self._unclaimed = unclaimed
+        return reaped
+
+    async def run_next(self, timeout: int = 5) -> bool:
+        """取出并执行一个任务，队列为空时返回False"""
+        client = await self._get_redis()
+        # 原子地移入处理中列表，进程在执行期间退出时任务不会丢失
+        job_id = await client.blmove(QUEUE_KEY, PROCESSING_KEY, timeout, "RIGHT", "LEFT")
+        if job_id is None:
+            return False
+
+        try:
+            await self._execute(job_id)
+        finally:
+            await client.lrem(PROCESSING_KEY, 1, job_id)
+        return True
+
+    async def _execute(self, job_id: str):
+        job = await self.get(job_id)
+        if job is None or job["status"] != JobStatus.QUEUED.value:
+            return
+
+        handler = self._handlers.get(job["kind"])
+        if handler is None:
+            await self._fail(job, f"不支持的任务类型: {job['kind']}")
+            return
+
+        now = datetime.now().isoformat()
+        client = await self._get_redis()
+        await client.hincrby(self._job_key(job_id), "attempts", 1)
+        await self.update(job_id, status=JobStatus.RUNNING.value, started_at=now, heartbeat_at=now)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        token = _current_job.set((self, job_id))
+        try:
+            result = await handler(job["payload"])
+            await client.set(
+                self._result_key(job_id),
+                json.dumps(jsonable_encoder(result), ensure_ascii=False),
+                ex=self.ttl
+            )
+            await self.update(job_id, status=JobStatus.SUCCEEDED.value, progress=1,
+                              finished_at=datetime.now().isoformat())
+        except HTTPException as e:
+            await self._fail(job, str(e.detail))
+        except Exception as e:
+            print(f"回测任务 {job_id} 执行失败: {e}")
+            await self._fail(job, str(e))
+        finally:
+            _current_job.reset(token)
+            heartbeat.cancel()
+
+    async def work(self):
+        """持续消费队列，并定期回收心跳过期的任务"""
+        loop = asyncio.get_running_loop()
+        next_reap = 0.0
+        while True:
+            try:
+                if loop.time() >= next_reap:
+                    next_reap = loop.time() + HEARTBEAT_INTERVAL
+                    await self.reap_stale()
+                await self.run_next()
+            except Exception as e:
+                print(f"回测任务队列异常: {e}")
+                await asyncio.sleep(1)
+
+
+# 全局回测任务队列实例
+backtest_job_queue = BacktestJobQueue()
+
+
+def _worker_process(index: int):
+    """工作进程入口"""
+    # 导入回测API以注册各任务类型
+    import src.api.backtest  # noqa: F401
+
+    print(f"回测任务工作进程 {index} 已启动，任务类型: {', '.join(backtest_job_queue.kinds)}")
+    asyncio.run(backtest_job_queue.work())
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="回测任务工作进程")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("BACKTEST_JOB_WORKERS", "2")),
+                        help="工作进程数量")
+    args = parser.parse_args()
+
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(i,), name=f"backtest-worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+回测运行记录服务
+
+每次回测的参数、指标、交易记录与权益曲线写入 backtest_runs，
+历史结果直接读取而无需重新计算。权益曲线按列存储为二进制数组：
+日期为距 1970-01-01 的天数（int32），数值为万分之一定点数（int64），
+均先做一阶差分再 zlib 压缩，平滑的曲线差分后数值很小、压缩率高。
+"""
+
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from src.models.database import BacktestRun, BacktestModel
+
+# 编码格式版本，写在压缩数据首字节
+EQUITY_CODEC_VERSION = 1
+
+# 权益数值定点精度
+VALUE_SCALE = 10_000
+
+EPOCH = date(1970, 1, 1)
+
+
+def _delta_compress(values: np.ndarray) -> bytes:
+    deltas = np.diff(values, prepend=values.dtype.type(0))
+    return bytes([EQUITY_CODEC_VERSION]) + zlib.compress(deltas.astype(values.dtype.newbyteorder('<')).tobytes(), 6)
+
+
+def _delta_decompress(blob: bytes, dtype) -> np.ndarray:
+    if blob[0] != EQUITY_CODEC_VERSION:
+        raise ValueError(f"不支持的权益曲线编码版本: {blob[0]}")
+    deltas = np.frombuffer(zlib.decompress(blob[1:]), dtype=np.dtype(dtype).newbyteorder('<'))
+    return np.cumsum(deltas, dtype=dtype)
+
+
+def _to_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def encode_equity_curve(equity_curve: List[Dict[str, Any]]) -> Tuple[bytes, bytes]:
+    """编码权益曲线 [{"date", "value"}, ...]，返回 (日期数据, 数值数据)"""
+    days = np.array([(_to_date(point["date"]) - EPOCH).days for point in equity_curve], dtype=np.int32)
+    values = np.round(np.array([float(point["value"]) for point in equity_curve]) * VALUE_SCALE).astype(np.int64)
+    return _delta_compress(days), _delta_compress(values)
+
+
+def decode_equity_curve(dates_blob: Optional[bytes], values_blob: Optional[bytes]) -> List[Dict[str, Any]]:
+    """解码权益曲线"""
+    if not dates_blob or not values_blob:
+        return []
+    days = _delta_decompress(dates_blob, np.int32)
+    values = _delta_decompress(values_blob, np.int64) / VALUE_SCALE
+    return [
+        {"date": date.fromordinal(EPOCH.toordinal() + int(day)).isoformat(), "value": float(value)}
+        for day, value in zip(days, values)
+    ]
+
+
+def equity_curve_from_positions(positions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """由 BaseBacktestModel.backtest 的仓位记录生成权益曲线"""
+    return [{"date": position["date"], "value": float(position["capital"])} for position in positions]
+
+
+class BacktestRunService:
+    """回测运行记录服务"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def save_run(self, run_type: str, parameters: Dict[str, Any], metrics: Dict[str, Any],
+                       trades: List[Dict[str, Any]], equity_curve: List[Dict[str, Any]],
+                       symbol: Optional[str] = None, model_id: Optional[int] = None,
+                       start_date: Optional[date] = None, end_date: Optional[date] = None) -> BacktestRun:
+        """保存一次回测运行"""
+        equity_dates, equity_values = encode_equity_curve(equity_curve) if equity_curve else (None, None)
+        run = BacktestRun(
+            run_type=run_type,
+            symbol=symbol,
+            model_id=model_id,
+            start_date=start_date,
+            end_date=end_date,
+            parameters=jsonable_encoder(parameters),
+            metrics=jsonable_encoder(metrics),
+            trades=jsonable_encoder(trades),
+            equity_points=len(equity_curve),
+            equity_dates=equity_dates,
+            equity_values=equity_values
+        )
+        self.session.add(run)
+        await self.session.commit()
+        await self.session.refresh(run)
+        return run
+
+    async def get_run(self, run_id: int) -> Optional[Dict[str, Any]]:
+        """获取回测运行详情，包括解码后的权益曲线"""
+        result = await self.session.execute(
+            select(BacktestRun, BacktestModel.name)
+            .outerjoin(BacktestModel, BacktestRun.model_id == BacktestModel.id)
+            .where(BacktestRun.id == run_id)
+        )
+        row = result.first()
+        if not row:
+            return None
+        run, model_name = row
+        return {
+            **self._summary(run, model_name),
+            "parameters": run.parameters,
+            "trades": run.trades,
+            "equity_curve": decode_equity_curve(run.equity_dates, run.equity_values)
+        }
+
+    @staticmethod
+    def _conditions(symbol: Optional[str], model_id: Optional[int], run_type: Optional[str],
+                    start_date: Optional[date], end_date: Optional[date]) -> list:
+        conditions = []
+        if symbol:
+            conditions.append(BacktestRun.symbol == symbol)
+        if model_id:
+            conditions.append(BacktestRun.model_id == model_id)
+        if run_type:
+            conditions.append(BacktestRun.run_type == run_type)
+        # 日期过滤按回测运行时间
+        if start_date:
+            conditions.append(BacktestRun.created_at >= datetime.combine(start_date, time.min))
+        if end_date:
+            conditions.append(BacktestRun.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        return conditions
+
+    async def list_runs(self, symbol: Optional[str] = None, model_id: Optional[int] = None,
+                        run_type: Optional[str] = None, start_date: Optional[date] = None,
+                        end_date: Optional[date] = None, skip: int = 0, limit: int = 100,
+                        before_id: Optional[int] = None) -> Dict[str, Any]:
+        """回测运行列表（仅摘要，不含交易与权益曲线），before_id 为上一页最后一条的ID"""
+        conditions = self._conditions(symbol, model_id, run_type, start_date, end_date)
+
+        result = await self.session.execute(
+            select(
+                BacktestRun.id, BacktestRun.run_type, BacktestRun.symbol, BacktestRun.model_id,
+                BacktestRun.start_date, BacktestRun.end_date, BacktestRun.metrics,
+                BacktestRun.equity_points, BacktestRun.created_at, BacktestModel.name
+            )
+            .outerjoin(BacktestModel, BacktestRun.model_id == BacktestModel.id)
+            .where(*conditions, *([BacktestRun.id < before_id] if before_id else []))
+            .order_by(BacktestRun.id.desc())
+            .offset(0 if before_id else skip)
+            .limit(limit)
+        )
+        total_result = await self.session.execute(
+            select(func.count(BacktestRun.id)).where(*conditions)
+        )
+        results = [self._summary(row, row.name) for row in result.all()]
+        return {
+            "results": results,
+            "total": total_result.scalar(),
+            "next_cursor": results[-1]["id"] if len(results) == limit else None
+        }
+
+    async def compare_runs(self, run_ids: List[int]) -> List[Dict[str, Any]]:
+        """按ID批量读取回测运行的摘要与权益曲线，用于对比"""
+        result = await self.session.execute(
+            select(BacktestRun, BacktestModel.name)
+            .outerjoin(BacktestModel, BacktestRun.model_id == BacktestModel.id)
+            .where(BacktestRun.id.in_(run_ids))
+        )
+        runs = {
+            run.id: {
+                **self._summary(run, model_name),
+                "equity_curve": decode_equity_curve(run.equity_dates, run.equity_values)
+            }
+            for run, model_name in result.all()
+        }
+        return [runs[run_id] for run_id in run_ids if run_id in runs]
+
+    @staticmethod
+    def _summary(run, model_name: Optional[str]) -> Dict[str, Any]:
+        return {
+            "id": run.id,
+            "run_type": run.run_type,
+            "symbol": run.symbol,
+            "model_id": run.model_id,
+            "model_name": model_name,
+            "start_date": run.start_date,
+            "end_date": run.end_date,
+            "results": run.metrics,
+            "equity_points": run.equity_points,
+            "created_at": run.created_at
+        }
+
+
+async def record_backtest_run(session: AsyncSession, **kwargs) -> Optional[int]:
+    """保存回测运行并返回ID，保存失败不影响回测结果返回"""
+    try:
+        run = await BacktestRunService(session).save_run(**kwargs)
+        return run.id
+    except Exception as e:
+        await session.rollback()
+        print(f"保存回测运行记录失败: {e}")
+        return None
@@ -0,0 +1,151 @@
+"""
+决策结果缓存服务
+
+进程内LRU + Redis 两级缓存。键由 (股票代码, 交易日期, 当前仓位, 引擎配置指纹)
+组成，引擎配置指纹覆盖活跃模型及其参数、权重、投票与风控配置，
+配置变化后旧键自然失效；行情数据变化时按股票主动失效。
+
+按股票失效时删除 Redis 中的键，并经引擎状态同步通道通知各 worker 丢弃本地副本；
+订阅重新同步时（可能漏收了失效通知）清空本地缓存。
+Redis 出错后在 DECISION_CACHE_REDIS_RETRY 秒内只使用本地缓存，不再逐次访问和报错。
+"""
+
+import os
+import json
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Any, Optional
+from fastapi.encoders import jsonable_encoder
+
+from src.config.redis_config import redis_config
+from src.services.engine_sync import engine_sync, KIND_DECISION_CACHE, KIND_RESYNC
+
+KEY_PREFIX = "decision"
+
+
+class DecisionCache:
+    """决策结果缓存"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("DECISION_CACHE_SIZE", "1024"))
+        self.ttl = ttl or int(os.getenv("DECISION_CACHE_TTL", str(7 * 24 * 3600)))
+        self.retry_interval = int(os.getenv("DECISION_CACHE_REDIS_RETRY", "30"))
+        self._local: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._redis = None
+        self._retry_at = 0.0
+
+    async def _get_redis(self):
+        """获取Redis客户端，不可用或处于退避期时返回None，仅使用本地缓存"""
+        if time.monotonic() < self._retry_at:
+            return None
+        if self._redis is None:
+            try:
+                self._redis = await redis_config.get_redis_client()
+            except Exception as e:
+                self._redis_failed("连接决策缓存Redis", e)
+                return None
+        return self._redis
+
+    def _redis_failed(self, action: str, error: Exception):
+        """记录Redis故障，退避期内不再访问"""
+        self._retry_at = time.monotonic() + self.retry_interval
+        print(f"{action}失败，{self.retry_interval} 秒内仅使用本地缓存: {error}")
+
+    @staticmethod
+    def make_key(symbol: str, trade_date: date, current_position: float, fingerprint: str) -> str:
+        """生成确定性的缓存键"""
+        return f"{KEY_PREFIX}:{symbol}:{trade_date.isoformat()}:{current_position:.4f}:{fingerprint}"
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        """写入本地LRU并淘汰最久未使用的条目"""
+        self._local[key] = value
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存，本地未命中时回退到Redis"""
+        if key in self._local:
+            self._local.move_to_end(key)
+            return self._local[key]
+
+        client = await self._get_redis()
+        if client is None:
+            return None
+        try:
+            payload = await client.get(key)
+        except Exception as e:
+            self._redis_failed("读取决策缓存", e)
+            return None
+        if payload is None:
+            return None
+
+        value = json.loads(payload)
+        self._remember(key, value)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> Dict[str, Any]:
+        """写入缓存，返回可JSON序列化的结果"""
+        encoded = jsonable_encoder(value)
+        self._remember(key, encoded)
+
+        client = await self._get_redis()
+        if client is not None:
+            try:
+                await client.set(key, json.dumps(encoded, ensure_ascii=False), ex=self.ttl)
+            except Exception as e:
+                self._redis_failed("写入决策缓存", e)
+        return encoded
+
+    def forget(self, symbol: Optional[str] = None):
+        """丢弃本地缓存中该股票的条目，未指定股票时全部丢弃"""
+        if symbol is None:
+            self._local.clear()
+            return
+        prefix = f"{KEY_PREFIX}:{symbol}:"
+        for key in [key for key in self._local if key.startswith(prefix)]:
+            del self._local[key]
+
+    async def _invalidate(self, symbol: Optional[str]):
+        """删除Redis中的键后通知各 worker 丢弃本地副本，Redis 不可用时只清理本进程"""
+        client = await self._get_redis()
+        if client is None:
+            self.forget(symbol)
+            return
+        pattern = f"{KEY_PREFIX}:{symbol}:*" if symbol is not None else f"{KEY_PREFIX}:*"
+        try:
+            keys = [key async for key in client.scan_iter(match=pattern, count=500)]
+            if keys:
+                await client.delete(*keys)
+        except Exception as e:
+            self._redis_failed("清理决策缓存", e)
+            self.forget(symbol)
+            return
+        # 先删 Redis 再通知，其他 worker 丢弃本地副本后不会再读到旧值
+        await engine_sync.publish(KIND_DECISION_CACHE, {"symbol": symbol})
+
+    async def invalidate_symbol(self, symbol: str):
+        """行情数据变化时失效该股票的全部缓存"""
+        await self._invalidate(symbol)
+
+    async def clear(self):
+        """清空全部决策缓存"""
+        await self._invalidate(None)
+
+
+# 全局决策缓存实例
+decision_cache = DecisionCache()
+
+
+async def _on_invalidated(data: Dict[str, Any]):
+    decision_cache.forget(data.get("symbol"))
+
+
+async def _on_resync(data: Dict[str, Any]):
+    # 断线期间可能漏收失效通知
+    decision_cache.forget()
+
+
+engine_sync.subscribe(KIND_DECISION_CACHE, _on_invalidated)
+engine_sync.subscribe(KIND_RESYNC, _on_resync)
@@ -0,0 +1,201 @@
+"""
+历史决策回放服务
+
+按股票一次性加载历史行情，向量化计算各模型的逐日信号序列，
+批量投票后整批写入 model_decisions 与 final_decisions，用于回填历史决策。
+
+命令行用法:
+    python -m src.services.decision_replay --start 2024-01-01 --end 2024-12-31 [--symbols 000001,600519]
+"""
+
+import asyncio
+import argparse
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.config.database import get_db_session
+from src.models.database import Stock, ModelDecision, FinalDecision
+from src.services.stock_service import StockService
+from src.services.partitions import ensure_decision_partitions
+from src.services.trading_calendar import get_trading_calendar
+from src.ml_models.indicators import IndicatorCache
+from src.services.instrumentation import voting_duration_seconds
+from src.decision_engine.manager import DecisionEngineManager, get_decision_engine_manager
+from src.decision_engine.registry import model_registry
+
+# 单条 INSERT 语句写入的行数
+UPSERT_CHUNK_SIZE = 1000
+
+
+class DecisionReplayService:
+    """历史决策回放服务"""
+
+    def __init__(self, session: AsyncSession, manager: Optional[DecisionEngineManager] = None):
+        self.session = session
+        # 未指定管理器时使用按 backtest_models 配置的全局决策引擎
+        self.use_registry = manager is None
+        self.manager = manager or get_decision_engine_manager()
+        self.stock_service = StockService(session)
+
+    def compute_decisions(self, stock_data: pd.DataFrame, start_date: date) -> Dict[str, pd.DataFrame]:
+        """计算回放区间内的模型信号与综合决策"""
+        active_models = [
+            model for model in self.manager.model_manager.models.values()
+            if model.is_active
+        ]
+        data = stock_data.reset_index(drop=True)
+        cache = IndicatorCache()
+
+        signal_frames = {}
+        for model in active_models:
+            try:
+                signal_frames[model.model_id] = model.generate_signal_series(data, cache)
+            except Exception as e:
+                print(f"模型 {model.model_id} 生成信号序列失败: {e}")
+
+        with voting_duration_seconds.time(strategy=self.manager.decision_engine.config.strategy.value):
+            final = self.manager.decision_engine.aggregate_decisions_batch(signal_frames)
+        in_range = (data['trade_date'] >= start_date).to_numpy()
+        trade_dates = data['trade_date'][in_range]
+
+        signals = {
+            model_id: frame[in_range].assign(trade_date=trade_dates)
+            for model_id, frame in signal_frames.items()
+        }
+        return {
+            "signals": signals,
+            "final": final[in_range].assign(trade_date=trade_dates)
+        }
+
+    async def replay_symbol(self, stock: Stock, start_date: date, end_date: date) -> Dict[str, Any]:
+        """回放单只股票，返回写入的记录数"""
+        # 与实时生成决策使用同一预热规则（活跃模型声明的预热K线数），按交易日计算
+        warmup_start = get_trading_calendar().offset(start_date, -self.manager.get_warmup_bars())
+        stock_data = await self.stock_service.get_stock_data(stock.symbol, warmup_start, end_date)
+        if stock_data.empty:
+            return {"symbol": stock.symbol, "final_decisions": 0, "model_decisions": 0}
+
+        results = self.compute_decisions(stock_data, start_date)
+        now = datetime.now()
+
+        model_rows = [
+            {
+                'stock_id': stock.id,
+                'model_id': model_id,
+                'trade_date': row['trade_date'],
+                'decision': row['decision'],
+                'confidence': round(row['confidence'], 4),
+                'signal_strength': round(row['signal_strength'], 4),
+                'reasoning': row['reasoning'],
+                'created_at': now
+            }
+            for model_id, frame in results["signals"].items()
+            for row in frame.to_dict('records')
+        ]
+        final_rows = [
+            {
+                'stock_id': stock.id,
+                'trade_date': row['trade_date'],
+                'buy_votes': row['buy_votes'],
+                'sell_votes': row['sell_votes'],
+                'hold_votes': row['hold_votes'],
+                'final_decision': row['decision'],
+                'confidence_score': round(row['confidence'], 4),
+                'risk_level': row['risk_level'],
+                'created_at': now
+            }
+            for row in results["final"].to_dict('records')
+        ]
+
+        await self._bulk_upsert(
+            ModelDecision, model_rows, ['stock_id', 'model_id', 'trade_date'],
+            ['decision', 'confidence', 'signal_strength', 'reasoning']
+        )
+        await self._bulk_upsert(
+            FinalDecision, final_rows, ['stock_id', 'trade_date'],
+            ['buy_votes', 'sell_votes', 'hold_votes', 'final_decision', 'confidence_score', 'risk_level']
+        )
+        await self.session.commit()
+
+        return {
+            "symbol": stock.symbol,
+            "final_decisions": len(final_rows),
+            "model_decisions": len(model_rows)
+        }
+
+    async def _bulk_upsert(self, table, rows: List[Dict[str, Any]],
+                           conflict_columns: List[str], update_columns: List[str]):
+        """分批 INSERT ... ON CONFLICT DO UPDATE"""
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = insert(table).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={column: stmt.excluded[column] for column in update_columns}
+            )
+            await self.session.execute(stmt)
+
+    async def replay(self, start_date: date, end_date: date,
+                     symbols: Optional[List[str]] = None) -> Dict[str, Any]:
+        """回放指定股票（默认全部活跃股票）在日期区间内的决策"""
+        if symbols:
+            result = await self.session.execute(select(Stock).where(Stock.symbol.in_(symbols)))
+            stocks = result.scalars().all()
+        else:
+            stocks = await self.stock_service.get_stocks(active_only=True)
+
+        if self.use_registry:
+            await model_registry.ensure_loaded(self.session)
+
+        # 历史区间可能早于预建的决策分区，先补建对应月份
+        await ensure_decision_partitions(await self.session.connection(), start_date, end_date)
+        await self.session.commit()
+
+        found = {stock.symbol for stock in stocks}
+        symbol_results = []
+        errors = [{"symbol": symbol, "error": f"股票 {symbol} 不存在"} for symbol in (symbols or []) if symbol not in found]
+
+        for stock in stocks:
+            try:
+                symbol_results.append(await self.replay_symbol(stock, start_date, end_date))
+            except Exception as e:
+                await self.session.rollback()
+                errors.append({"symbol": stock.symbol, "error": str(e)})
+
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "symbol_count": len(symbol_results),
+            "final_decisions": sum(r["final_decisions"] for r in symbol_results),
+            "model_decisions": sum(r["model_decisions"] for r in symbol_results),
+            "results": symbol_results,
+            "errors": errors
+        }
+
+
+async def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="回放历史决策并回填决策表")
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="结束日期 YYYY-MM-DD")
+    parser.add_argument("--symbols", default="", help="股票代码，逗号分隔，默认全部活跃股票")
+    args = parser.parse_args()
+
+    symbols = [symbol for symbol in args.symbols.split(",") if symbol] or None
+    started = datetime.now()
+    async with get_db_session() as session:
+        summary = await DecisionReplayService(session).replay(args.start, args.end, symbols)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"回放完成: {summary['symbol_count']} 只股票, "
+          f"{summary['final_decisions']} 条综合决策, {summary['model_decisions']} 条模型决策, "
+          f"耗时 {elapsed:.1f} 秒")
+    for error in summary["errors"]:
+        print(f"  {error['symbol']}: {error['error']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,213 @@
+"""
+决策引擎状态跨进程同步
+
+多个 worker 各自持有决策引擎（模型集合、权重、投票与风控配置）、股票代码缓存以及本地决策缓存，
+任一 worker 上的变更通过 Redis 发布为带版本号的更新消息，各 worker 订阅后在内存中整体应用；
+决策生成与代码解析仍只读本地内存，不增加网络往返。
+
+版本号由 Redis 计数器分配，分配、写入配置快照与发布在同一个 Lua 脚本中完成，
+订阅端按版本号顺序收到消息。订阅建立或重连后、以及发现版本号跳跃（断线期间漏收）时，
+从快照重新同步配置，并通知各模块全量重载。
+
+计数器旁保存一个纪元（epoch）标识，Redis 重启未持久化或键被清空后计数器从 1 重新开始，
+同时生成新的纪元；各 worker 发现纪元变化时重置本地版本号，避免此后的更新全部被当作旧消息丢弃。
+"""
+
+import json
+import uuid
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from src.config.redis_config import redis_config
+
+CHANNEL = "engine:config:updates"
+VERSION_KEY = "engine:config:version"
+SNAPSHOT_KEY = "engine:config"
+EPOCH_KEY = "engine:config:epoch"
+
+# 消息类型: 投票与风控配置（完整配置）、单个模型记录变更、单个股票代码映射变更、
+# 决策缓存按股票失效
+KIND_CONFIG = "config"
+KIND_MODEL = "model"
+KIND_SYMBOL = "symbol"
+KIND_DECISION_CACHE = "decision_cache"
+# 重新同步时触发，订阅方应丢弃增量状态并全量重载
+KIND_RESYNC = "resync"
+
+# 分配版本号、保存配置快照并发布，保证版本号与发布顺序一致；
+# 纪元或计数器丢失时以 ARGV[4] 开启新纪元，计数器从 1 重新开始
+PUBLISH_SCRIPT = """
+local epoch = redis.call('GET', KEYS[3])
+if not epoch or redis.call('EXISTS', KEYS[1]) == 0 then
+    epoch = ARGV[4]
+    redis.call('SET', KEYS[3], epoch)
+    redis.call('SET', KEYS[1], 0)
+end
+local version = redis.call('INCR', KEYS[1])
+local message = '{"epoch":"' .. epoch .. '","version":' .. version .. ',"kind":"' .. ARGV[1] .. '","data":' .. ARGV[2] .. '}'
+if ARGV[1] == 'config' then
+    redis.call('SET', KEYS[2], message)
+end
+redis.call('PUBLISH', ARGV[3], message)
+return message
+"""
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class EngineStateSync:
+    """决策引擎状态同步"""
+
+    def __init__(self):
+        # 当前纪元与其中已收到的最大版本号
+        self.epoch: Optional[str] = None
+        self.version = 0
+        # 最新的投票与风控配置及其版本号，决策引擎创建时据此初始化
+        self.config: Optional[Dict[str, Any]] = None
+        self.config_version = 0
+        self._handlers: Dict[str, List[Handler]] = {}
+        # 本进程发布并已在本地应用的版本，订阅端收到时跳过
+        self._published: Set[int] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def _reset(self, epoch: Optional[str]):
+        """切换到新纪元，版本号从头计算"""
+        if self.epoch is not None and epoch != self.epoch:
+            print(f"引擎更新纪元变化 {self.epoch} -> {epoch}，重置本地版本号")
+        self.epoch = epoch
+        self.version = 0
+        self.config_version = 0
+        self._published = set()
+
+    def subscribe(self, kind: str, handler: Handler):
+        """注册某类更新的处理函数"""
+        self._handlers.setdefault(kind, []).append(handler)
+
+    async def _dispatch(self, kind: str, data: Dict[str, Any]):
+        for handler in self._handlers.get(kind, []):
+            try:
+                await handler(data)
+            except Exception as e:
+                print(f"应用引擎更新失败 ({kind}): {str(e)}")
+
+    async def _apply(self, message: Dict[str, Any]):
+        kind, data, version = message["kind"], message["data"], message["version"]
+        if kind == KIND_CONFIG:
+            # 配置为完整快照，只接受更新的版本，避免乱序到达时回退
+            if version <= self.config_version:
+                return
+            self.config, self.config_version = data, version
+        await self._dispatch(kind, data)
+
+    async def publish(self, kind: str, data: Dict[str, Any]) -> Optional[int]:
+        """发布更新并立即在本进程应用，Redis 不可用时仅在本进程生效，返回版本号"""
+        try:
+            client = await redis_config.get_redis_client()
+            try:
+                payload = await client.eval(
+                    PUBLISH_SCRIPT, 3, VERSION_KEY, SNAPSHOT_KEY, EPOCH_KEY,
+                    kind, json.dumps(data, ensure_ascii=False), CHANNEL, uuid.uuid4().hex
+                )
+            finally:
+                await client.close()
+        except Exception as e:
+            print(f"发布引擎更新失败，仅在本进程生效: {str(e)}")
+            if kind == KIND_CONFIG:
+                self.config = data
+            await self._dispatch(kind, data)
+            return None
+
+        message = json.loads(payload)
+        if message["epoch"] != self.epoch:
+            # Redis 已重置，本进程的消息即新纪元的起点
+            self._reset(message["epoch"])
+        self._published.add(message["version"])
+        # 本进程的变更总是在本地应用，仅同一纪元内已有更新的配置时不回退
+        await self._apply(message)
+        return message["version"]
+
+    async def resync(self, client, reload: bool = True):
+        """从快照恢复配置并对齐版本号，reload 时通知订阅方全量重载"""
+        epoch = await client.get(EPOCH_KEY)
+        version = int(await client.get(VERSION_KEY) or 0)
+        snapshot = await client.get(SNAPSHOT_KEY)
+        if epoch != self.epoch or version < self.version:
+            # 纪元变化或计数器回退（Redis 被清空）
+            self._reset(epoch)
+        if snapshot:
+            message = json.loads(snapshot)
+            if message.get("epoch") == self.epoch:
+                await self._apply(message)
+        self.version = max(self.version, version)
+        self._published = {v for v in self._published if v > self.version}
+        if reload:
+            await self._dispatch(KIND_RESYNC, {})
+
+    async def _receive(self, client, message: Dict[str, Any]):
+        version = message["version"]
+        if message.get("epoch") != self.epoch:
+            # 其他 worker 已在新纪元发布，整体重新同步
+            await self.resync(client)
+            return
+        if version <= self.version:
+            return
+        if self.version and version > self.version + 1:
+            # 断线期间漏收了消息
+            print(f"引擎更新版本跳跃 {self.version} -> {version}，重新同步")
+            await self.resync(client)
+            return
+        self.version = version
+        if version in self._published:
+            self._published.discard(version)
+            return
+        await self._apply(message)
+
+    async def _run(self):
+        """订阅循环，连接断开后按指数退避重连"""
+        delay = 1
+        first = True
+        while True:
+            client = None
+            pubsub = None
+            try:
+                client = await redis_config.get_redis_client()
+                pubsub = client.pubsub()
+                await pubsub.subscribe(CHANNEL)
+                # 先订阅再读取快照，两者之间发布的消息不会丢失
+                await self.resync(client, reload=not first)
+                first = False
+                delay = 1
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        await self._receive(client, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"引擎更新订阅中断，{delay} 秒后重连: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                if pubsub is not None:
+                    await pubsub.close()
+                if client is not None:
+                    await client.close()
+
+    def start(self):
+        """启动后台订阅任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台订阅任务"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# 全局引擎状态同步实例
+engine_sync = EngineStateSync()
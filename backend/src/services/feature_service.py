@@ -0,0 +1,158 @@
+"""
+技术指标特征存储服务
+"""
+
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional
+import math
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, and_
+from sqlalchemy.dialects.postgresql import insert
+
+from src.models.database import StockDailyData, StockFeature
+from src.ml_models.indicators import FeatureSpec, compute_features, spec_columns
+
+# 增量更新时向前回溯的K线数量，保证滚动/指数均线有足够的预热数据
+FEATURE_WARMUP_BARS = 250
+
+# 单次批量写入的行数
+UPSERT_CHUNK_SIZE = 1000
+
+
+class FeatureService:
+    """技术指标特征存储服务"""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_latest_feature(self, stock_id: int) -> Optional[StockFeature]:
+        """获取股票最新的特征记录"""
+        result = await self.session.execute(
+            select(StockFeature)
+            .where(StockFeature.stock_id == stock_id)
+            .order_by(StockFeature.trade_date.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_features(self, stock_id: int, start_date: date, end_date: date) -> Dict[date, Dict[str, float]]:
+        """获取指定区间的特征，按交易日期索引"""
+        result = await self.session.execute(
+            select(StockFeature.trade_date, StockFeature.features)
+            .where(
+                and_(
+                    StockFeature.stock_id == stock_id,
+                    StockFeature.trade_date >= start_date,
+                    StockFeature.trade_date <= end_date
+                )
+            )
+        )
+        return {trade_date: features for trade_date, features in result.all()}
+
+    async def attach_features(self, stock_id: int, stock_data: pd.DataFrame) -> pd.DataFrame:
+        """将预计算特征合并为行情数据的列，模型可直接复用"""
+        if stock_data.empty:
+            return stock_data
+
+        features = await self.get_features(
+            stock_id,
+            stock_data['trade_date'].min(),
+            stock_data['trade_date'].max()
+        )
+        if not features:
+            return stock_data
+
+        feature_df = pd.DataFrame.from_dict(features, orient='index')
+        feature_df.index.name = 'trade_date'
+        return stock_data.merge(feature_df.reset_index(), on='trade_date', how='left')
+
+    async def _load_close_prices(self, stock_id: int, after_date: Optional[date]) -> pd.DataFrame:
+        """加载需要计算特征的收盘价，包含预热区间"""
+        conditions = [StockDailyData.stock_id == stock_id]
+        if after_date:
+            # 预热区间: 最后一个已计算日期及之前的若干根K线
+            warmup_result = await self.session.execute(
+                select(StockDailyData.trade_date)
+                .where(
+                    and_(
+                        StockDailyData.stock_id == stock_id,
+                        StockDailyData.trade_date <= after_date
+                    )
+                )
+                .order_by(StockDailyData.trade_date.desc())
+                .offset(FEATURE_WARMUP_BARS - 1)
+                .limit(1)
+            )
+            warmup_start = warmup_result.scalar_one_or_none()
+            if warmup_start:
+                conditions.append(StockDailyData.trade_date >= warmup_start)
+
+        result = await self.session.execute(
+            select(StockDailyData.trade_date, StockDailyData.close_price)
+            .where(and_(*conditions))
+            .order_by(StockDailyData.trade_date.asc())
+        )
+        rows = result.all()
+        return pd.DataFrame(
+            [(trade_date, float(close) if close is not None else None) for trade_date, close in rows],
+            columns=['trade_date', 'close_price']
+        )
+
+    async def update_features(self, stock_id: int, specs: List[FeatureSpec],
+                              full_rebuild: bool = False) -> int:
+        """增量更新股票特征，返回写入的记录数
+
+        仅计算最新特征日期之后的新K线；若已有记录缺少当前模型需要的指标
+        （如新增了参数组合），则自动全量重建。
+        """
+        if not specs:
+            return 0
+
+        columns = spec_columns(specs)
+        latest = None if full_rebuild else await self.get_latest_feature(stock_id)
+        if latest and not set(columns).issubset(latest.features):
+            latest = None
+
+        after_date = latest.trade_date if latest else None
+        prices = await self._load_close_prices(stock_id, after_date)
+        if prices.empty:
+            return 0
+
+        feature_df = compute_features(prices, specs)
+        feature_df['trade_date'] = prices['trade_date']
+        if after_date:
+            feature_df = feature_df[feature_df['trade_date'] > after_date]
+        if feature_df.empty:
+            return 0
+
+        now = datetime.now()
+        rows = []
+        for record in feature_df.to_dict('records'):
+            trade_date = record.pop('trade_date')
+            rows.append({
+                'stock_id': stock_id,
+                'trade_date': trade_date,
+                'features': _clean_features(record),
+                'updated_at': now
+            })
+
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            stmt = insert(StockFeature).values(rows[start:start + UPSERT_CHUNK_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['stock_id', 'trade_date'],
+                set_={'features': stmt.excluded.features, 'updated_at': stmt.excluded.updated_at}
+            )
+            await self.session.execute(stmt)
+
+        await self.session.commit()
+        return len(rows)
+
+
+def _clean_features(record: Dict[str, Any]) -> Dict[str, float]:
+    """去除预热期产生的空值，JSONB不支持NaN"""
+    return {
+        name: round(float(value), 6)
+        for name, value in record.items()
+        if value is not None and not math.isnan(value)
+    }
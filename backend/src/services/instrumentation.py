@@ -0,0 +1,243 @@
+"""
+请求与热点路径埋点
+
+进程内的 Prometheus 风格指标注册表（计数器、直方图）及文本格式输出，
+ASGI 中间件按路由模板记录请求延迟与状态码，
+另在行情查询、模型信号生成、投票聚合和数据库提交等热点路径上计时。
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# 默认直方图分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Prometheus 文本格式的 Content-Type（charset 由响应类追加）
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4"
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """格式化标签，如 {method="GET",route="/stocks"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    """转义标签值"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """格式化样本值"""
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    """单调递增计数器"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        """计数增加"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[str]:
+        """输出样本行"""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram:
+    """累积分桶直方图"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # 每组标签: [各分桶计数..., 总和, 总数]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """记录一次观测值"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = [0.0] * (len(self.buckets) + 2)
+                self._values[key] = state
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """计时上下文，退出时记录耗时（秒）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self) -> List[str]:
+        """输出样本行"""
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(count)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        """注册指标，同名指标只保留首次注册的实例"""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """生成 Prometheus 文本格式输出"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.metric_type}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+# 全局指标注册表
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "stok_http_requests_total", "HTTP请求总数", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "stok_http_request_duration_seconds", "HTTP请求处理耗时", ("method", "route")
+)
+stock_query_duration_seconds = registry.histogram(
+    "stok_stock_query_duration_seconds", "行情数据查询耗时", ("operation",)
+)
+model_signal_duration_seconds = registry.histogram(
+    "stok_model_signal_duration_seconds", "模型生成信号耗时", ("model",)
+)
+voting_duration_seconds = registry.histogram(
+    "stok_voting_duration_seconds", "投票聚合耗时", ("strategy",)
+)
+db_commit_duration_seconds = registry.histogram(
+    "stok_db_commit_duration_seconds", "数据库提交耗时（含flush）", ("outcome",)
+)
+
+
+def timed_query(operation: str):
+    """异步查询方法计时装饰器"""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with stock_query_duration_seconds.time(operation=operation):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+_COMMIT_STARTED = "_instrumentation_commit_started"
+
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    session.info[_COMMIT_STARTED] = time.perf_counter()
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    started = session.info.pop(_COMMIT_STARTED, None)
+    if started is not None:
+        db_commit_duration_seconds.observe(time.perf_counter() - started, outcome="commit")
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    started = session.info.pop(_COMMIT_STARTED, None)
+    if started is not None:
+        db_commit_duration_seconds.observe(time.perf_counter() - started, outcome="rollback")
+
+
+class PrometheusMiddleware:
+    """按路由模板记录请求延迟与状态码的 ASGI 中间件
+
+    使用匹配到的路由模板（如 /api/v1/stocks/{symbol}）作为标签，
+    避免路径参数导致标签基数膨胀；未匹配的请求归为 unmatched。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path: Optional[str] = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_request_duration_seconds.observe(
+                time.perf_counter() - started, method=method, route=route_path
+            )
+            http_requests_total.inc(method=method, route=route_path, status=status_code)
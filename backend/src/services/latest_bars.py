@@ -0,0 +1,77 @@
+"""
+最新K线快照
+
+latest_bars 每只股票保存最新一根日线。日线写入（新增、修改、删除）后在同一事务内
+按 (stock_id, trade_date) 索引倒序取一行重算快照，补录历史数据不会覆盖更新的快照；
+重算前锁定股票行，同一股票的并发写入依次重算，后提交的事务能看到先提交的日线；
+读取最新行情时按股票代码一次联表查询，不再逐只排序日线表。
+"""
+
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.database import Stock, StockDailyData, LatestBar
+
+# 快照中与日线表同名的列
+BAR_COLUMNS = (
+    'trade_date', 'open_price', 'high_price', 'low_price',
+    'close_price', 'volume', 'turnover', 'created_at'
+)
+
+
+async def refresh_latest_bars(session: AsyncSession, stock_ids: Iterable[int]):
+    """按日线表重算股票的最新K线快照，不提交事务，由调用方与日线写入一并提交"""
+    # 确保本事务内尚未刷新的日线写入参与计算
+    await session.flush()
+
+    for stock_id in sorted(set(stock_ids)):
+        # 快照行可能尚不存在，锁定股票行使并发写入串行重算；按ID顺序加锁避免死锁。
+        # NO KEY UPDATE 不与日线外键检查的 KEY SHARE 锁冲突
+        await session.execute(select(Stock.id).where(Stock.id == stock_id).with_for_update(key_share=True))
+        latest = (
+            select(
+                StockDailyData.stock_id, StockDailyData.id,
+                *(getattr(StockDailyData, column) for column in BAR_COLUMNS),
+                func.localtimestamp()
+            )
+            .where(StockDailyData.stock_id == stock_id)
+            .order_by(StockDailyData.trade_date.desc())
+            .limit(1)
+        )
+        stmt = insert(LatestBar).from_select(['stock_id', 'daily_data_id', *BAR_COLUMNS, 'updated_at'], latest)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['stock_id'],
+            set_={
+                'daily_data_id': stmt.excluded.daily_data_id,
+                **{column: stmt.excluded[column] for column in BAR_COLUMNS},
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        result = await session.execute(stmt)
+
+        # 日线已全部删除时移除快照
+        if result.rowcount == 0:
+            await session.execute(delete(LatestBar).where(LatestBar.stock_id == stock_id))
+
+
+def latest_bar_to_dict(symbol: str, bar: LatestBar) -> Dict[str, Any]:
+    """快照行转换为与日线响应相同的字段"""
+    return {
+        "symbol": symbol,
+        "id": bar.daily_data_id,
+        **{column: getattr(bar, column) for column in BAR_COLUMNS}
+    }
+
+
+async def get_latest_bars(session: AsyncSession, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """按股票代码批量读取最新K线，没有股票或没有数据的代码不在结果中"""
+    if not symbols:
+        return {}
+    result = await session.execute(
+        select(Stock.symbol, LatestBar)
+        .join(LatestBar, LatestBar.stock_id == Stock.id)
+        .where(Stock.symbol.in_(symbols))
+    )
+    return {symbol: latest_bar_to_dict(symbol, bar) for symbol, bar in result.all()}
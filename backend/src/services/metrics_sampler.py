@@ -0,0 +1,101 @@
+"""
+系统指标后台采样器
+
+在应用生命周期内按固定间隔采集 CPU、内存、磁盘指标并保存到环形缓冲区，
+健康检查与指标接口直接读取最新快照，不在请求路径上阻塞事件循环。
+psutil 在第一次采样时才导入，不计入应用启动耗时。
+"""
+
+import os
+import asyncio
+from collections import deque
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+
+class SystemMetricsSampler:
+    """系统指标采样器"""
+
+    def __init__(self, interval: Optional[float] = None, history_size: Optional[int] = None):
+        self.interval = interval or float(os.getenv("SYSTEM_METRICS_INTERVAL", "5"))
+        self.history_size = history_size or int(os.getenv("SYSTEM_METRICS_HISTORY", "120"))
+        self._history: deque = deque(maxlen=self.history_size)
+        self._task: Optional[asyncio.Task] = None
+
+    def sample(self) -> Dict[str, Any]:
+        """采集一次指标（非阻塞）
+
+        cpu_percent(interval=None) 返回自上次调用以来的CPU占用，
+        由采样间隔决定统计窗口，无需在调用时等待。
+        """
+        import psutil
+
+        try:
+            cpu_percent = psutil.cpu_percent(interval=None)
+            memory = psutil.virtual_memory()
+            disk = psutil.disk_usage('/')
+
+            return {
+                "cpu_percent": round(cpu_percent, 2),
+                "memory_percent": round(memory.percent, 2),
+                "memory_used_gb": round(memory.used / (1024 ** 3), 2),
+                "memory_total_gb": round(memory.total / (1024 ** 3), 2),
+                "disk_usage_percent": round(disk.percent, 2),
+                "disk_used_gb": round(disk.used / (1024 ** 3), 2),
+                "disk_total_gb": round(disk.total / (1024 ** 3), 2),
+                "sampled_at": datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {
+                "cpu_percent": None,
+                "memory_percent": None,
+                "memory_used_gb": None,
+                "memory_total_gb": None,
+                "disk_usage_percent": None,
+                "disk_used_gb": None,
+                "disk_total_gb": None,
+                "sampled_at": datetime.now().isoformat(),
+                "error": str(e)
+            }
+
+    async def _run(self):
+        """采样循环，首次调用 cpu_percent 建立基准，返回值无意义"""
+        import psutil
+
+        psutil.cpu_percent(interval=None)
+        self._history.append(self.sample())
+        while True:
+            await asyncio.sleep(self.interval)
+            self._history.append(self.sample())
+
+    def start(self):
+        """启动后台采样任务"""
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台采样任务"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def latest(self) -> Dict[str, Any]:
+        """最新快照，采样器未启动时现场非阻塞采集"""
+        if not self._history:
+            self._history.append(self.sample())
+        return self._history[-1]
+
+    def history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """最近的历史快照，按时间正序"""
+        snapshots = list(self._history)
+        return snapshots[-limit:] if limit else snapshots
+
+
+# 全局系统指标采样器实例
+metrics_sampler = SystemMetricsSampler()
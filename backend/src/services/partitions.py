@@ -0,0 +1,346 @@
+"""
+分区表维护
+
+stock_daily_data 按交易日期年份分区，model_decisions 与 final_decisions 按月份分区。
+启动时及运行期间定期（PARTITION_CHECK_INTERVAL，默认6小时）补建近期分区，
+长期运行的进程跨月后新数据也不会落入默认分区；已结束的日线年份可整理压实或分离归档；
+超过保留期（DECISION_RETENTION_MONTHS，默认24个月）的决策分区按月汇总到
+model_decision_rollups / final_decision_rollups 后删除。
+
+用法（在 backend 目录下）:
+    python -m src.services.partitions list [--table final_decisions]
+    python -m src.services.partitions ensure --through-year 2027
+    python -m src.services.partitions compact --year 2015
+    python -m src.services.partitions detach --year 2005 [--drop]
+    python -m src.services.partitions rollup [--retention-months 24] [--dry-run]
+"""
+
+import os
+import asyncio
+import argparse
+from datetime import date
+from typing import List, Dict, Any, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.config.database import get_engine
+from src.models.database import (
+    RangePartitioning, DAILY_DATA_PARTITIONING, DAILY_DATA_FIRST_DATE,
+    MODEL_DECISIONS_PARTITIONING, FINAL_DECISIONS_PARTITIONING, decision_partition_window
+)
+
+DECISION_PARTITIONINGS = (MODEL_DECISIONS_PARTITIONING, FINAL_DECISIONS_PARTITIONING)
+
+PARTITIONINGS = {
+    partitioning.table: partitioning
+    for partitioning in (DAILY_DATA_PARTITIONING, *DECISION_PARTITIONINGS)
+}
+
+# 决策明细保留的月数，更早的月份汇总后删除
+DECISION_RETENTION_MONTHS = int(os.getenv("DECISION_RETENTION_MONTHS", "24"))
+
+# 多个 worker 同时补建分区时以事务级咨询锁串行执行
+PARTITION_LOCK_SQL = "SELECT pg_advisory_xact_lock(hashtext('partition_maintenance'))"
+
+ROLLUP_MODEL_DECISIONS_SQL = """
+    INSERT INTO model_decision_rollups (stock_id, model_id, month, buy_count, sell_count, hold_count,
+                                        avg_confidence, avg_signal_strength, created_at)
+    SELECT stock_id, model_id, CAST(:month AS DATE),
+           count(*) FILTER (WHERE decision = 'BUY'),
+           count(*) FILTER (WHERE decision = 'SELL'),
+           count(*) FILTER (WHERE decision = 'HOLD'),
+           round(avg(confidence), 4), round(avg(signal_strength), 4), LOCALTIMESTAMP
+    FROM model_decisions
+    WHERE trade_date >= :month AND trade_date < :next_month
+    GROUP BY stock_id, model_id
+    ON CONFLICT (stock_id, model_id, month) DO UPDATE SET
+        buy_count = EXCLUDED.buy_count,
+        sell_count = EXCLUDED.sell_count,
+        hold_count = EXCLUDED.hold_count,
+        avg_confidence = EXCLUDED.avg_confidence,
+        avg_signal_strength = EXCLUDED.avg_signal_strength,
+        created_at = EXCLUDED.created_at
+"""
+
+ROLLUP_FINAL_DECISIONS_SQL = """
+    INSERT INTO final_decision_rollups (stock_id, month, trading_days, buy_days, sell_days, hold_days,
+                                        avg_confidence, first_trade_date, last_trade_date,
+                                        last_decision, created_at)
+    SELECT stock_id, CAST(:month AS DATE), count(*),
+           count(*) FILTER (WHERE final_decision = 'BUY'),
+           count(*) FILTER (WHERE final_decision = 'SELL'),
+           count(*) FILTER (WHERE final_decision = 'HOLD'),
+           round(avg(confidence_score), 4), min(trade_date), max(trade_date),
+           (array_agg(final_decision ORDER BY trade_date DESC))[1], LOCALTIMESTAMP
+    FROM final_decisions
+    WHERE trade_date >= :month AND trade_date < :next_month
+    GROUP BY stock_id
+    ON CONFLICT (stock_id, month) DO UPDATE SET
+        trading_days = EXCLUDED.trading_days,
+        buy_days = EXCLUDED.buy_days,
+        sell_days = EXCLUDED.sell_days,
+        hold_days = EXCLUDED.hold_days,
+        avg_confidence = EXCLUDED.avg_confidence,
+        first_trade_date = EXCLUDED.first_trade_date,
+        last_trade_date = EXCLUDED.last_trade_date,
+        last_decision = EXCLUDED.last_decision,
+        created_at = EXCLUDED.created_at
+"""
+
+
+async def is_partitioned(conn: AsyncConnection, table: str) -> bool:
+    """表是否已迁移为分区表"""
+    result = await conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    )
+    return result.scalar() == "p"
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> List[Dict[str, Any]]:
+    """分区列表，含分区范围、估算行数与占用空间"""
+    result = await conn.execute(text("""
+        SELECT c.relname AS name,
+               pg_get_expr(c.relpartbound, c.oid) AS bound,
+               c.reltuples::bigint AS estimated_rows,
+               pg_total_relation_size(c.oid) AS total_bytes
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:table)
+        ORDER BY c.relname
+    """), {"table": table})
+    return [dict(row._mapping) for row in result]
+
+
+async def ensure_partitions(conn: AsyncConnection, partitioning: RangePartitioning,
+                            first: date, last: date) -> List[str]:
+    """补建覆盖 [first, last] 的缺失分区，返回新建的分区名；表未分区时不做任何事"""
+    if not await is_partitioned(conn, partitioning.table):
+        return []
+
+    existing = {partition["name"] for partition in await list_partitions(conn, partitioning.table)}
+    created = []
+    for start in partitioning.periods(first, last):
+        name = partitioning.partition_name(start)
+        if name in existing:
+            continue
+        try:
+            # 默认分区中已有该范围的数据时创建会失败，数据仍保留在默认分区中
+            async with conn.begin_nested():
+                await conn.execute(text(partitioning.partition_ddl(start)))
+            created.append(name)
+        except Exception as e:
+            print(f"创建分区 {name} 失败: {e}")
+    return created
+
+
+async def ensure_decision_partitions(conn: AsyncConnection, first: date, last: date) -> List[str]:
+    """补建决策表在 [first, last] 内的月份分区，回放历史决策前调用"""
+    created = []
+    for partitioning in DECISION_PARTITIONINGS:
+        created.extend(await ensure_partitions(conn, partitioning, first, last))
+    return created
+
+
+async def ensure_upcoming_partitions(conn: AsyncConnection) -> List[str]:
+    """补建至明年的日线分区与近期的决策分区，启动时及定期调用"""
+    await conn.execute(text(PARTITION_LOCK_SQL))
+    created = await ensure_partitions(
+        conn, DAILY_DATA_PARTITIONING, DAILY_DATA_FIRST_DATE, date(date.today().year + 1, 12, 31)
+    )
+    created.extend(await ensure_decision_partitions(conn, *decision_partition_window()))
+    return created
+
+
+class PartitionMaintainer:
+    """应用运行期间定期补建近期分区"""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or float(os.getenv("PARTITION_CHECK_INTERVAL", str(6 * 3600)))
+        self._task: Optional[asyncio.Task] = None
+
+    async def check(self) -> List[str]:
+        """补建一次，返回新建的分区名"""
+        async with get_engine().begin() as conn:
+            return await ensure_upcoming_partitions(conn)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                created = await self.check()
+                if created:
+                    print(f"新建分区: {', '.join(created)}")
+            except Exception as e:
+                print(f"分区检查失败: {e}")
+
+    def start(self):
+        """启动后台补建任务"""
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台补建任务"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+# 全局分区维护实例
+partition_maintainer = PartitionMaintainer()
+
+
+async def compact_daily_data_partition(year: int):
+    """整理已结束年份的分区：填充因子设为100并重写表，释放更新产生的空间"""
+    if year >= date.today().year:
+        raise ValueError(f"{year} 年尚未结束，不能整理")
+
+    name = DAILY_DATA_PARTITIONING.partition_name(date(year, 1, 1))
+    # VACUUM 不能在事务中执行
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text(f"ALTER TABLE {name} SET (fillfactor = 100)"))
+        await conn.execute(text(f"VACUUM (FULL, ANALYZE) {name}"))
+
+
+async def detach_partition(conn: AsyncConnection, partitioning: RangePartitioning, start: date, drop: bool = False):
+    """分离分区，分离后的表可单独导出归档；drop=True 时直接删除"""
+    name = partitioning.partition_name(start)
+    await conn.execute(text(f"ALTER TABLE {partitioning.table} DETACH PARTITION {name}"))
+    if drop:
+        await conn.execute(text(f"DROP TABLE {name}"))
+
+
+def retention_cutoff(retention_months: int, today: Optional[date] = None) -> date:
+    """保留期起始月份首日，早于该日期的决策会被汇总"""
+    today = today or date.today()
+    months = today.year * 12 + today.month - 1 - retention_months
+    return date(months // 12, months % 12 + 1, 1)
+
+
+async def _expired_decision_months(conn: AsyncConnection, cutoff: date) -> List[date]:
+    """早于保留期、仍有明细的月份（已过期的分区及默认分区中的数据）"""
+    months = set()
+    for partitioning in DECISION_PARTITIONINGS:
+        partitions = await list_partitions(conn, partitioning.table)
+        for partition in partitions:
+            start = partitioning.partition_start(partition["name"])
+            if start and start < cutoff:
+                months.add(start)
+        if any(partition["name"] == partitioning.default_partition_name for partition in partitions):
+            result = await conn.execute(text(
+                f"SELECT DISTINCT date_trunc('month', trade_date)::date FROM {partitioning.default_partition_name} "
+                f"WHERE trade_date < :cutoff"
+            ), {"cutoff": cutoff})
+            months.update(row[0] for row in result)
+    return sorted(months)
+
+
+async def rollup_decisions(conn: AsyncConnection, retention_months: int = DECISION_RETENTION_MONTHS,
+                           dry_run: bool = False) -> List[Dict[str, Any]]:
+    """将超过保留期的决策月份汇总到 rollup 表，并删除对应的分区及默认分区中的明细"""
+    for partitioning in DECISION_PARTITIONINGS:
+        if not await is_partitioned(conn, partitioning.table):
+            raise RuntimeError(f"{partitioning.table} 尚未分区，请先执行 data/migrations/migrate_004_partition_decisions.sql")
+
+    cutoff = retention_cutoff(retention_months)
+    summary = []
+    for month in await _expired_decision_months(conn, cutoff):
+        next_month = FINAL_DECISIONS_PARTITIONING.next_period(month)
+        params = {"month": month, "next_month": next_month}
+        if dry_run:
+            summary.append({"month": month})
+            continue
+
+        model_result = await conn.execute(text(ROLLUP_MODEL_DECISIONS_SQL), params)
+        final_result = await conn.execute(text(ROLLUP_FINAL_DECISIONS_SQL), params)
+        for partitioning in DECISION_PARTITIONINGS:
+            existing = {partition["name"] for partition in await list_partitions(conn, partitioning.table)}
+            if partitioning.partition_name(month) in existing:
+                await detach_partition(conn, partitioning, month, drop=True)
+            if partitioning.default_partition_name in existing:
+                await conn.execute(
+                    text(f"DELETE FROM {partitioning.default_partition_name} "
+                         f"WHERE trade_date >= :month AND trade_date < :next_month"),
+                    params
+                )
+        summary.append({
+            "month": month,
+            "model_rollups": model_result.rowcount,
+            "final_rollups": final_result.rowcount
+        })
+    return summary
+
+
+def _format_size(num_bytes: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TB"
+
+
+async def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="分区表维护")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="列出分区")
+    list_parser.add_argument("--table", default=DAILY_DATA_PARTITIONING.table, choices=list(PARTITIONINGS))
+    ensure_parser = subparsers.add_parser("ensure", help="补建缺失的日线年份分区与近期决策分区")
+    ensure_parser.add_argument("--through-year", type=int, help="日线分区补建至该年份，默认明年")
+    compact_parser = subparsers.add_parser("compact", help="整理已结束年份的日线分区")
+    compact_parser.add_argument("--year", type=int, required=True)
+    detach_parser = subparsers.add_parser("detach", help="分离某一年的日线分区")
+    detach_parser.add_argument("--year", type=int, required=True)
+    detach_parser.add_argument("--drop", action="store_true", help="分离后删除")
+    rollup_parser = subparsers.add_parser("rollup", help="汇总并删除超过保留期的决策明细")
+    rollup_parser.add_argument("--retention-months", type=int, default=DECISION_RETENTION_MONTHS)
+    rollup_parser.add_argument("--dry-run", action="store_true", help="只列出将要汇总的月份")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "compact":
+            await compact_daily_data_partition(args.year)
+            print(f"已整理分区 {DAILY_DATA_PARTITIONING.partition_name(date(args.year, 1, 1))}")
+            return
+
+        async with get_engine().begin() as conn:
+            if args.command == "list":
+                if not await is_partitioned(conn, args.table):
+                    print(f"{args.table} 尚未分区")
+                    return
+                for partition in await list_partitions(conn, args.table):
+                    print(f"  {partition['name']:<32}{partition['estimated_rows']:>12} 行"
+                          f"{_format_size(partition['total_bytes']):>10}  {partition['bound']}")
+            elif args.command == "ensure":
+                created = await ensure_upcoming_partitions(conn)
+                if args.through_year:
+                    created.extend(await ensure_partitions(
+                        conn, DAILY_DATA_PARTITIONING, DAILY_DATA_FIRST_DATE, date(args.through_year, 12, 31)
+                    ))
+                print(f"新建分区: {', '.join(created)}" if created else "分区已齐全")
+            elif args.command == "detach":
+                await detach_partition(conn, DAILY_DATA_PARTITIONING, date(args.year, 1, 1), args.drop)
+                print(f"已{'删除' if args.drop else '分离'}分区 "
+                      f"{DAILY_DATA_PARTITIONING.partition_name(date(args.year, 1, 1))}")
+            elif args.command == "rollup":
+                summary = await rollup_decisions(conn, args.retention_months, args.dry_run)
+                if not summary:
+                    print("没有超过保留期的决策明细")
+                for item in summary:
+                    if args.dry_run:
+                        print(f"  将汇总 {item['month']:%Y-%m}")
+                    else:
+                        print(f"  {item['month']:%Y-%m}: 模型决策汇总 {item['model_rollups']} 条, "
+                              f"综合决策汇总 {item['final_rollups']} 条")
+    finally:
+        await get_engine().dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
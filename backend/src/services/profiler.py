@@ -0,0 +1,179 @@
+"""
+按请求开启的采样剖析
+
+携带 X-Profile 请求头且值与 PROFILE_TOKEN 一致的请求，会在处理期间由后台线程
+定时采集事件循环线程的调用栈，结果以 collapsed stack 格式（可直接用于火焰图）
+保存到磁盘，只保留最近的若干份。未配置 PROFILE_TOKEN 时中间件不会注册，
+未携带请求头的请求只做一次请求头查找。
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+
+
+def get_profile_token() -> Optional[str]:
+    """剖析授权令牌，未配置时剖析功能关闭"""
+    return os.getenv("PROFILE_TOKEN") or None
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """校验请求携带的令牌"""
+    expected = get_profile_token()
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode(), expected.encode())
+
+
+class StackSampler:
+    """定时采集指定线程调用栈的采样器"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """collapsed stack 文本，每行 "栈帧;栈帧;... 采样数" """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """剖析结果的磁盘存储，只保留最近 max_profiles 份"""
+
+    def __init__(self, directory: Optional[str] = None, max_profiles: Optional[int] = None):
+        self.directory = Path(directory or os.getenv("PROFILE_DIR", "logs/profiles"))
+        self.max_profiles = max_profiles or int(os.getenv("PROFILE_MAX_FILES", "50"))
+
+    def save(self, profile_id: str, collapsed: str, metadata: Dict[str, Any]):
+        """保存剖析结果并清理过旧的记录"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f"{profile_id}.collapsed").write_text(collapsed, encoding="utf-8")
+        (self.directory / f"{profile_id}.json").write_text(
+            json.dumps(metadata, ensure_ascii=False), encoding="utf-8"
+        )
+        self._prune()
+
+    def _prune(self):
+        metadata_files = sorted(self.directory.glob("*.json"))
+        for path in metadata_files[:-self.max_profiles]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".collapsed").unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """最近的剖析记录元数据，新的在前"""
+        if not self.directory.exists():
+            return []
+        return [
+            json.loads(path.read_text(encoding="utf-8"))
+            for path in sorted(self.directory.glob("*.json"), reverse=True)
+        ]
+
+    def get(self, profile_id: str) -> Optional[str]:
+        """读取 collapsed stack 文本"""
+        # 只接受本模块生成的文件名，避免路径穿越
+        if not profile_id.replace("-", "").isalnum():
+            return None
+        path = self.directory / f"{profile_id}.collapsed"
+        if not path.exists():
+            return None
+        return path.read_text(encoding="utf-8")
+
+
+# 全局剖析结果存储
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """请求头触发的采样剖析 ASGI 中间件
+
+    采样的是事件循环线程，同一时间并发处理的其他请求也会计入样本，
+    适合在低峰期针对单个慢接口使用。
+    """
+
+    def __init__(self, app, store: Optional[ProfileStore] = None, interval: Optional[float] = None):
+        self.app = app
+        self.store = store or profile_store
+        self.interval = interval or float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                token = value.decode("latin-1")
+                break
+        if token is None or not is_authorized(token):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (PROFILE_ID_HEADER.encode(), profile_id.encode())]
+                }
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            metadata = {
+                "profile_id": profile_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "samples": sum(sampler.stacks.values()),
+                "sample_interval_ms": self.interval * 1000,
+                "created_at": datetime.now().isoformat()
+            }
+            try:
+                await asyncio.to_thread(self.store.save, profile_id, sampler.collapsed(), metadata)
+            except Exception as e:
+                print(f"保存剖析结果失败: {e}")
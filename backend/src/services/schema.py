@@ -0,0 +1,76 @@
+"""
+数据库结构准备
+
+create 模式按模型执行 create_all（逐表查询系统目录，适合开发环境）；
+verify 模式只读取 schema_migrations 中已登记的最大迁移编号并与 SCHEMA_VERSION 比较，
+结构变更由 data/migrations 中的迁移脚本完成，生产环境默认使用该模式以缩短启动时间。
+"""
+
+import os
+from typing import Optional
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.models.database import Base, SchemaMigration, SCHEMA_VERSION
+
+SCHEMA_MODE_CREATE = "create"
+SCHEMA_MODE_VERIFY = "verify"
+SCHEMA_MODES = (SCHEMA_MODE_CREATE, SCHEMA_MODE_VERIFY)
+
+
+class SchemaVersionError(RuntimeError):
+    """数据库结构版本低于代码要求"""
+
+
+def get_schema_mode() -> str:
+    """启动时的结构准备方式，由 DB_SCHEMA_MODE 指定，生产环境默认 verify"""
+    default = SCHEMA_MODE_VERIFY if os.getenv("ENVIRONMENT") == "production" else SCHEMA_MODE_CREATE
+    mode = os.getenv("DB_SCHEMA_MODE", default).lower()
+    if mode not in SCHEMA_MODES:
+        raise ValueError(f"DB_SCHEMA_MODE 必须是 {', '.join(SCHEMA_MODES)} 之一: {mode}")
+    return mode
+
+
+async def _table_exists(conn: AsyncConnection, table: str) -> bool:
+    result = await conn.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": table})
+    return bool(result.scalar())
+
+
+async def get_schema_version(conn: AsyncConnection) -> Optional[int]:
+    """已登记的最大迁移编号，未创建版本表或未登记时为 None"""
+    if not await _table_exists(conn, SchemaMigration.__tablename__):
+        return None
+    result = await conn.execute(select(func.max(SchemaMigration.version)))
+    return result.scalar()
+
+
+async def verify_schema(conn: AsyncConnection) -> int:
+    """校验结构版本，低于代码要求时抛出异常，提示先执行迁移"""
+    version = await get_schema_version(conn)
+    if version is None or version < SCHEMA_VERSION:
+        raise SchemaVersionError(
+            f"数据库结构版本 {version if version is not None else '未登记'} 低于代码要求的 {SCHEMA_VERSION}，"
+            f"请先执行 data/migrations 中的迁移脚本"
+        )
+    return version
+
+
+async def create_schema(conn: AsyncConnection) -> Optional[int]:
+    """按模型创建缺失的表；全新数据库建表后即为最新结构，登记当前版本"""
+    fresh = not await _table_exists(conn, "stocks")
+    await conn.run_sync(Base.metadata.create_all)
+    if fresh:
+        await conn.execute(
+            insert(SchemaMigration)
+            .values(version=SCHEMA_VERSION, name="create_all")
+            .on_conflict_do_nothing(index_elements=["version"])
+        )
+    return await get_schema_version(conn)
+
+
+async def prepare_schema(conn: AsyncConnection, mode: Optional[str] = None) -> Optional[int]:
+    """按模式准备数据库结构，返回当前结构版本"""
+    if (mode or get_schema_mode()) == SCHEMA_MODE_VERIFY:
+        return await verify_schema(conn)
+    return await create_schema(conn)
@@ -0,0 +1,51 @@
+"""
+启动耗时统计
+
+记录应用模块导入与生命周期启动各阶段的耗时，启动完成后打印汇总，
+并通过 /api/v1/info 返回，便于排查自动扩容时的冷启动时间。
+"""
+
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict
+
+
+class StartupTimer:
+    """按阶段累计启动耗时（毫秒）"""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self._origin = time.perf_counter()
+        self._last_mark = self._origin
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str):
+        """记录从上一次标记到现在的耗时"""
+        now = time.perf_counter()
+        self.phases[phase] = round((now - self._last_mark) * 1000, 1)
+        self._last_mark = now
+
+    @contextmanager
+    def phase(self, phase: str):
+        """记录代码块的耗时"""
+        self._last_mark = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(phase)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "started_at": self.started_at,
+            "phases_ms": dict(self.phases),
+            "total_ms": round(sum(self.phases.values()), 1),
+        }
+
+    def summary(self) -> str:
+        parts = [f"{phase} {elapsed:.0f}ms" for phase, elapsed in self.phases.items()]
+        return f"启动耗时: {', '.join(parts)}，合计 {sum(self.phases.values()):.0f}ms"
+
+
+# 全局启动计时器，在 main 模块最先导入
+startup_timer = StartupTimer()
@@ -11,6 +11,28 @@ from sqlalchemy import select, and_
 from src.config.database import get_db_session
 from src.models.database import Stock, StockDailyData
 from src.models.stock_models import StockDailyDataCreate
+from src.services.instrumentation import timed_query
+from src.services.latest_bars import refresh_latest_bars
+from src.services.symbol_cache import symbol_cache
+
+
+PRICE_COLUMNS = ('open_price', 'high_price', 'low_price', 'close_price')
+
+
+def daily_data_to_frame(records: List[StockDailyData]) -> pd.DataFrame:
+    """将日线数据记录转换为DataFrame（按列构建）"""
+    if not records:
+        return pd.DataFrame()
+
+    def to_float(value):
+        return float(value) if value else None
+
+    columns: Dict[str, list] = {'trade_date': [record.trade_date for record in records]}
+    for column in PRICE_COLUMNS:
+        columns[column] = [to_float(getattr(record, column)) for record in records]
+    columns['volume'] = [record.volume for record in records]
+    columns['turnover'] = [to_float(record.turnover) for record in records]
+    return pd.DataFrame(columns)
 
 
 class StockService:
@@ -19,6 +41,7 @@ class StockService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    @timed_query('get_stock_by_symbol')
     async def get_stock_by_symbol(self, symbol: str) -> Optional[Stock]:
         """根据股票代码获取股票"""
         result = await self.session.execute(
@@ -26,6 +49,11 @@ class StockService:
         )
         return result.scalar_one_or_none()
 
+    async def get_stock_id(self, symbol: str) -> Optional[int]:
+        """根据股票代码获取股票ID，优先读取进程内缓存"""
+        return await symbol_cache.get_id(self.session, symbol)
+
+    @timed_query('get_stocks')
     async def get_stocks(self, active_only: bool = True, market: Optional[str] = None) -> List[Stock]:
         """获取股票列表"""
         conditions = []
@@ -41,17 +69,18 @@ class StockService:
         result = await self.session.execute(query)
         return result.scalars().all()
 
+    @timed_query('get_stock_data')
     async def get_stock_data(self, symbol: str, start_date: date, end_date: date) -> pd.DataFrame:
         """获取股票历史数据"""
-        stock = await self.get_stock_by_symbol(symbol)
-        if not stock:
+        stock_id = await self.get_stock_id(symbol)
+        if stock_id is None:
             raise ValueError(f"股票 {symbol} 不存在")
 
         result = await self.session.execute(
             select(StockDailyData)
             .where(
                 and_(
-                    StockDailyData.stock_id == stock.id,
+                    StockDailyData.stock_id == stock_id,
                     StockDailyData.trade_date >= start_date,
                     StockDailyData.trade_date <= end_date
                 )
@@ -60,20 +89,29 @@ class StockService:
         )
         data = result.scalars().all()
 
-        # 转换为DataFrame
-        df_data = []
-        for record in data:
-            df_data.append({
-                'trade_date': record.trade_date,
-                'open_price': float(record.open_price) if record.open_price else None,
-                'high_price': float(record.high_price) if record.high_price else None,
-                'low_price': float(record.low_price) if record.low_price else None,
-                'close_price': float(record.close_price) if record.close_price else None,
-                'volume': record.volume,
-                'turnover': float(record.turnover) if record.turnover else None
-            })
-
-        return pd.DataFrame(df_data)
+        return daily_data_to_frame(data)
+
+    @timed_query('get_recent_stock_data')
+    async def get_recent_stock_data(self, stock_id: int, end_date: date, bars: int) -> pd.DataFrame:
+        """截至 end_date（含）最近 bars 个交易日的数据
+
+        按 (stock_id, trade_date) 索引倒序取 LIMIT 行，加载量只取决于模型的预热需求，
+        与节假日和停牌无关。
+        """
+        result = await self.session.execute(
+            select(StockDailyData)
+            .where(
+                and_(
+                    StockDailyData.stock_id == stock_id,
+                    StockDailyData.trade_date <= end_date
+                )
+            )
+            .order_by(StockDailyData.trade_date.desc())
+            .limit(bars)
+        )
+        data = result.scalars().all()
+
+        return daily_data_to_frame(data[::-1])
 
     async def get_latest_stock_data(self, symbol: str, days: int = 30) -> pd.DataFrame:
         """获取最近N天的股票数据"""
@@ -83,8 +121,8 @@ class StockService:
 
     async def create_stock_data(self, symbol: str, data: StockDailyDataCreate) -> StockDailyData:
         """创建股票日线数据"""
-        stock = await self.get_stock_by_symbol(symbol)
-        if not stock:
+        stock_id = await self.get_stock_id(symbol)
+        if stock_id is None:
             raise ValueError(f"股票 {symbol} 不存在")
 
         # 检查数据是否已存在
@@ -92,7 +130,7 @@ class StockService:
             select(StockDailyData)
             .where(
                 and_(
-                    StockDailyData.stock_id == stock.id,
+                    StockDailyData.stock_id == stock_id,
                     StockDailyData.trade_date == data.trade_date
                 )
             )
@@ -104,10 +142,11 @@ class StockService:
 
         # 创建新数据
         daily_data = StockDailyData(
-            stock_id=stock.id,
+            stock_id=stock_id,
             **data.model_dump(exclude={'symbol'})
         )
         self.session.add(daily_data)
+        await refresh_latest_bars(self.session, [stock_id])
         await self.session.commit()
         await self.session.refresh(daily_data)
 
@@ -115,8 +154,8 @@ class StockService:
 
     async def batch_create_stock_data(self, symbol: str, data_list: List[StockDailyDataCreate]) -> List[StockDailyData]:
         """批量创建股票日线数据"""
-        stock = await self.get_stock_by_symbol(symbol)
-        if not stock:
+        stock_id = await self.get_stock_id(symbol)
+        if stock_id is None:
             raise ValueError(f"股票 {symbol} 不存在")
 
         created_data = []
@@ -126,7 +165,7 @@ class StockService:
                 select(StockDailyData)
                 .where(
                     and_(
-                        StockDailyData.stock_id == stock.id,
+                        StockDailyData.stock_id == stock_id,
                         StockDailyData.trade_date == data.trade_date
                     )
                 )
@@ -135,12 +174,14 @@ class StockService:
 
             if not existing_data:
                 daily_data = StockDailyData(
-                    stock_id=stock.id,
+                    stock_id=stock_id,
                     **data.model_dump(exclude={'symbol'})
                 )
                 self.session.add(daily_data)
                 created_data.append(daily_data)
 
+        if created_data:
+            await refresh_latest_bars(self.session, [stock_id])
         await self.session.commit()
         
         # 刷新所有创建的对象
@@ -151,15 +192,15 @@ class StockService:
 
     async def update_stock_data(self, symbol: str, trade_date: date, update_data: Dict[str, Any]) -> Optional[StockDailyData]:
         """更新股票日线数据"""
-        stock = await self.get_stock_by_symbol(symbol)
-        if not stock:
+        stock_id = await self.get_stock_id(symbol)
+        if stock_id is None:
             raise ValueError(f"股票 {symbol} 不存在")
 
         result = await self.session.execute(
             select(StockDailyData)
             .where(
                 and_(
-                    StockDailyData.stock_id == stock.id,
+                    StockDailyData.stock_id == stock_id,
                     StockDailyData.trade_date == trade_date
                 )
             )
@@ -174,21 +215,23 @@ class StockService:
             if hasattr(daily_data, field):
                 setattr(daily_data, field, value)
 
+        await refresh_latest_bars(self.session, [stock_id])
         await self.session.commit()
         await self.session.refresh(daily_data)
 
         return daily_data
 
+    @timed_query('get_stock_data_range')
     async def get_stock_data_range(self, symbol: str) -> Dict[str, Optional[date]]:
         """获取股票数据的时间范围"""
-        stock = await self.get_stock_by_symbol(symbol)
-        if not stock:
+        stock_id = await self.get_stock_id(symbol)
+        if stock_id is None:
             raise ValueError(f"股票 {symbol} 不存在")
 
         # 获取最早和最晚的交易日期
         min_date_result = await self.session.execute(
             select(StockDailyData.trade_date)
-            .where(StockDailyData.stock_id == stock.id)
+            .where(StockDailyData.stock_id == stock_id)
             .order_by(StockDailyData.trade_date.asc())
             .limit(1)
         )
@@ -196,7 +239,7 @@ class StockService:
 
         max_date_result = await self.session.execute(
             select(StockDailyData.trade_date)
-            .where(StockDailyData.stock_id == stock.id)
+            .where(StockDailyData.stock_id == stock_id)
             .order_by(StockDailyData.trade_date.desc())
             .limit(1)
         )
@@ -223,23 +266,25 @@ class StockService:
 
         return stocks_with_data
 
+    @timed_query('get_stock_data_count')
     async def get_stock_data_count(self, symbol: str) -> int:
         """获取股票数据数量"""
-        stock = await self.get_stock_by_symbol(symbol)
-        if not stock:
+        stock_id = await self.get_stock_id(symbol)
+        if stock_id is None:
             return 0
 
         result = await self.session.execute(
             select(StockDailyData.id)
-            .where(StockDailyData.stock_id == stock.id)
+            .where(StockDailyData.stock_id == stock_id)
         )
         return len(result.scalars().all())
 
 
+    @timed_query('get_stock_data_paginated')
     async def get_stock_data_paginated(self, symbol: str, start_date: date, end_date: date, skip: int = 0, limit: int = 1000) -> Dict[str, Any]:
         """获取股票历史数据（支持分页）"""
-        stock = await self.get_stock_by_symbol(symbol)
-        if not stock:
+        stock_id = await self.get_stock_id(symbol)
+        if stock_id is None:
             raise ValueError(f"股票 {symbol} 不存在")
 
         # 查询总记录数
@@ -247,7 +292,7 @@ class StockService:
             select(StockDailyData.id)
             .where(
                 and_(
-                    StockDailyData.stock_id == stock.id,
+                    StockDailyData.stock_id == stock_id,
                     StockDailyData.trade_date >= start_date,
                     StockDailyData.trade_date <= end_date
                 )
@@ -260,7 +305,7 @@ class StockService:
             select(StockDailyData)
             .where(
                 and_(
-                    StockDailyData.stock_id == stock.id,
+                    StockDailyData.stock_id == stock_id,
                     StockDailyData.trade_date >= start_date,
                     StockDailyData.trade_date <= end_date
                 )
@@ -271,21 +316,8 @@ class StockService:
         )
         data = result.scalars().all()
 
-        # 转换为DataFrame
-        df_data = []
-        for record in data:
-            df_data.append({
-                'trade_date': record.trade_date,
-                'open_price': float(record.open_price) if record.open_price else None,
-                'high_price': float(record.high_price) if record.high_price else None,
-                'low_price': float(record.low_price) if record.low_price else None,
-                'close_price': float(record.close_price) if record.close_price else None,
-                'volume': record.volume,
-                'turnover': float(record.turnover) if record.turnover else None
-            })
-
         return {
-            'data': pd.DataFrame(df_data),
+            'data': daily_data_to_frame(data),
             'pagination': {
                 'total': total_count,
                 'skip': skip,
@@ -0,0 +1,146 @@
+"""
+流式查询响应
+
+通过服务端游标分批读取查询结果，逐批编码为 NDJSON 或 Arrow IPC 流后输出，
+服务端内存占用与结果总量无关，且不对每一行做 pydantic 校验。
+Arrow 格式需要安装 pyarrow（可选依赖）。
+"""
+
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from src.config.database import get_read_session
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_ARROW = "arrow"
+STREAM_FORMATS = (FORMAT_NDJSON, FORMAT_ARROW)
+
+MEDIA_TYPES = {
+    FORMAT_NDJSON: "application/x-ndjson",
+    FORMAT_ARROW: "application/vnd.apache.arrow.stream",
+}
+
+# 每批从游标读取的行数
+DEFAULT_BATCH_SIZE = 2000
+
+
+class StreamColumn:
+    """流式输出列: 名称、Arrow 类型名与取值转换"""
+
+    def __init__(self, name: str, arrow_type: str, convert: Optional[Callable[[Any], Any]] = None):
+        self.name = name
+        self.arrow_type = arrow_type
+        self.convert = convert
+
+    def values(self, rows: List[Any], index: int) -> List[Any]:
+        if self.convert is None:
+            return [row[index] for row in rows]
+        return [None if row[index] is None else self.convert(row[index]) for row in rows]
+
+
+def _json_default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def _arrow_schema(columns: List[StreamColumn]):
+    types = {
+        "date32": pa.date32(),
+        "timestamp": pa.timestamp("us"),
+        "float64": pa.float64(),
+        "int64": pa.int64(),
+        "string": pa.string(),
+    }
+    return pa.schema([(column.name, types[column.arrow_type]) for column in columns])
+
+
+def ensure_format_available(fmt: str):
+    """校验输出格式，Arrow 格式在未安装 pyarrow 时不可用"""
+    if fmt not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的输出格式: {fmt}")
+    if fmt == FORMAT_ARROW and pa is None:
+        raise HTTPException(status_code=400, detail="服务端未安装 pyarrow，暂不支持 Arrow 格式")
+
+
+async def _partitions(query: Select, batch_size: int) -> AsyncIterator[List[Tuple]]:
+    """以服务端游标分批读取查询结果，只读查询走副本"""
+    async with get_read_session() as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
+
+
+async def _ndjson_chunks(query: Select, columns: List[StreamColumn], batch_size: int) -> AsyncIterator[bytes]:
+    names = [column.name for column in columns]
+    async for rows in _partitions(query, batch_size):
+        values = [column.values(rows, i) for i, column in enumerate(columns)]
+        lines = [
+            json.dumps(dict(zip(names, record)), ensure_ascii=False, default=_json_default)
+            for record in zip(*values)
+        ]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def _arrow_chunks(query: Select, columns: List[StreamColumn], batch_size: int) -> AsyncIterator[bytes]:
+    schema = _arrow_schema(columns)
+    sink = io.BytesIO()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    def drain() -> bytes:
+        chunk = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return chunk
+
+    async for rows in _partitions(query, batch_size):
+        batch = pa.record_batch(
+            [pa.array(column.values(rows, i), type=schema.field(i).type) for i, column in enumerate(columns)],
+            schema=schema
+        )
+        writer.write_batch(batch)
+        yield drain()
+    # 结果为空时这里会输出 schema 与结束标记
+    writer.close()
+    yield drain()
+
+
+async def _guarded(chunks: AsyncIterator[bytes], label: str) -> AsyncIterator[bytes]:
+    # 响应头已发出后无法再返回错误状态码，只能记录错误并提前结束
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        print(f"{label} 流式输出失败: {str(e)}")
+        raise
+
+
+def stream_query(query: Select, columns: List[StreamColumn], fmt: str, filename: str,
+                 batch_size: int = DEFAULT_BATCH_SIZE) -> StreamingResponse:
+    """将查询结果以指定格式流式返回，查询的选择列需与 columns 一一对应"""
+    ensure_format_available(fmt)
+    if fmt == FORMAT_ARROW:
+        chunks = _arrow_chunks(query, columns, batch_size)
+        extension = "arrow"
+    else:
+        chunks = _ndjson_chunks(query, columns, batch_size)
+        extension = "ndjson"
+
+    return StreamingResponse(
+        _guarded(chunks, filename),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
@@ -0,0 +1,72 @@
+"""
+股票代码到ID的进程内缓存
+
+大多数接口只需要股票ID即可执行真正的查询，缓存命中时省去按代码查询 stocks 的一次往返。
+启动时整体加载；未命中时回查数据库并缓存，其他途径新增的股票无需等待通知即可解析。
+/stocks 的增改删接口提交后经引擎状态同步通道发布映射变更，各 worker 更新本地缓存；
+订阅重新同步时清空缓存，之后按需回查。
+"""
+
+from typing import Any, Dict, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.database import Stock
+from src.services.engine_sync import engine_sync, KIND_SYMBOL, KIND_RESYNC
+
+
+class SymbolCache:
+    """股票代码到ID的缓存"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.loaded = False
+
+    async def load(self, session: AsyncSession) -> int:
+        """加载全部股票代码，返回缓存的股票数"""
+        result = await session.execute(select(Stock.symbol, Stock.id))
+        self._ids = {symbol: stock_id for symbol, stock_id in result.all()}
+        self.loaded = True
+        return len(self._ids)
+
+    async def get_id(self, session: AsyncSession, symbol: str) -> Optional[int]:
+        """股票代码对应的ID，不存在时返回 None（不缓存未命中）"""
+        stock_id = self._ids.get(symbol)
+        if stock_id is None:
+            result = await session.execute(select(Stock.id).where(Stock.symbol == symbol))
+            stock_id = result.scalar_one_or_none()
+            if stock_id is not None:
+                self._ids[symbol] = stock_id
+        return stock_id
+
+    def set(self, symbol: str, stock_id: Optional[int]):
+        """更新一条映射，stock_id 为 None 时移除"""
+        if stock_id is None:
+            self._ids.pop(symbol, None)
+        else:
+            self._ids[symbol] = stock_id
+
+    def clear(self):
+        self._ids = {}
+        self.loaded = False
+
+    async def publish(self, symbol: str, stock_id: Optional[int]):
+        """在本进程更新映射并通知其他 worker"""
+        await engine_sync.publish(KIND_SYMBOL, {"symbol": symbol, "stock_id": stock_id})
+
+
+# 全局股票代码缓存实例
+symbol_cache = SymbolCache()
+
+
+async def _on_symbol_changed(data: Dict[str, Any]):
+    symbol_cache.set(data["symbol"], data.get("stock_id"))
+
+
+async def _on_resync(data: Dict[str, Any]):
+    # 断线期间可能漏收变更，清空后按需回查
+    symbol_cache.clear()
+
+
+engine_sync.subscribe(KIND_SYMBOL, _on_symbol_changed)
+engine_sync.subscribe(KIND_RESYNC, _on_resync)
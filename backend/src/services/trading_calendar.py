@@ -0,0 +1,194 @@
+"""
+交易日历
+
+交易日保存为有序的 datetime64[D] 数组，前后交易日、偏移 N 个交易日、区间交易日数等
+运算都通过 searchsorted 完成，既可传入单个日期也可传入日期数组（向量化）。
+单个日期返回 datetime.date，数组返回 datetime64[D] 数组。
+
+交易日默认为工作日；设置 TRADING_HOLIDAYS_FILE（每行一个 ISO 日期，# 开头为注释）
+后剔除其中的休市日，年化交易日数也按休市日覆盖的完整年份实测。
+"""
+
+import os
+from datetime import date
+from typing import Iterable, Optional, Tuple
+import numpy as np
+
+# 日历起点
+CALENDAR_START = date(1990, 1, 1)
+
+# 日历从今天起向后延伸的年数
+CALENDAR_FORWARD_YEARS = 5
+
+# 休市日文件，未设置时仅剔除周末
+TRADING_HOLIDAYS_FILE = os.getenv("TRADING_HOLIDAYS_FILE")
+
+# 未配置休市日时使用的年化交易日数
+DEFAULT_SESSIONS_PER_YEAR = int(os.getenv("TRADING_DAYS_PER_YEAR", "252"))
+
+# 各周期每年的期数，daily 为交易日数
+PERIODS_PER_YEAR = {"weekly": 52, "monthly": 12, "quarterly": 4, "yearly": 1}
+
+# 支持的周期
+FREQUENCIES = ("daily", *PERIODS_PER_YEAR)
+
+
+def _as_days(dates) -> Tuple[np.ndarray, bool]:
+    """转换为 datetime64[D] 数组，并返回输入是否为单个日期"""
+    days = np.asarray(dates, dtype="datetime64[D]")
+    return days, days.ndim == 0
+
+
+def _period_keys(days: np.ndarray, frequency: str) -> np.ndarray:
+    """日期所属周期的编号，同一周期内相同"""
+    if frequency == "daily":
+        return days.astype(np.int64)
+    if frequency == "weekly":
+        # 1970-01-01 为周四，+3 后按 7 整除即以周一为一周的起点
+        return (days.astype(np.int64) + 3) // 7
+    if frequency == "monthly":
+        return days.astype("datetime64[M]").astype(np.int64)
+    if frequency == "quarterly":
+        return days.astype("datetime64[M]").astype(np.int64) // 3
+    if frequency == "yearly":
+        return days.astype("datetime64[Y]").astype(np.int64)
+    raise ValueError(f"不支持的周期: {frequency}，可选 {', '.join(FREQUENCIES)}")
+
+
+class TradingCalendar:
+    """交易日历"""
+
+    def __init__(self, sessions, sessions_per_year: Optional[float] = None):
+        self.sessions = np.unique(np.asarray(sessions, dtype="datetime64[D]"))
+        if len(self.sessions) == 0:
+            raise ValueError("交易日历为空")
+        self.sessions_per_year = float(sessions_per_year or DEFAULT_SESSIONS_PER_YEAR)
+
+    @classmethod
+    def from_weekdays(cls, start: date, end: date, holidays: Iterable = (),
+                      sessions_per_year: Optional[float] = None) -> "TradingCalendar":
+        """由工作日剔除休市日构建，未指定年化交易日数时按休市日覆盖的完整年份实测"""
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        holidays = np.asarray(list(holidays), dtype="datetime64[D]")
+        sessions = days[np.is_busday(days, holidays=holidays)]
+
+        if sessions_per_year is None and len(holidays):
+            years = sessions.astype("datetime64[Y]")
+            covered = np.unique(holidays.astype("datetime64[Y]"))
+            _, counts = np.unique(years[np.isin(years, covered)], return_counts=True)
+            sessions_per_year = counts.mean() if len(counts) else None
+        return cls(sessions, sessions_per_year)
+
+    def _take(self, positions: np.ndarray, scalar: bool):
+        if np.any((positions < 0) | (positions >= len(self.sessions))):
+            raise ValueError("日期超出交易日历范围")
+        result = self.sessions[positions]
+        return result.astype(object) if scalar else result
+
+    def is_session(self, dates):
+        """是否为交易日"""
+        days, scalar = _as_days(dates)
+        positions = np.searchsorted(self.sessions, days)
+        result = self.sessions[np.minimum(positions, len(self.sessions) - 1)] == days
+        return bool(result) if scalar else result
+
+    def rollforward(self, dates):
+        """当日或之后的第一个交易日"""
+        days, scalar = _as_days(dates)
+        return self._take(np.searchsorted(self.sessions, days, side="left"), scalar)
+
+    def rollback(self, dates):
+        """当日或之前的最后一个交易日"""
+        days, scalar = _as_days(dates)
+        return self._take(np.searchsorted(self.sessions, days, side="right") - 1, scalar)
+
+    def next_session(self, dates):
+        """之后（不含当日）的下一个交易日"""
+        days, scalar = _as_days(dates)
+        return self._take(np.searchsorted(self.sessions, days, side="right"), scalar)
+
+    def prev_session(self, dates):
+        """之前（不含当日）的上一个交易日"""
+        days, scalar = _as_days(dates)
+        return self._take(np.searchsorted(self.sessions, days, side="left") - 1, scalar)
+
+    def offset(self, dates, n: int, roll: str = "forward"):
+        """偏移 n 个交易日，非交易日先按 roll（forward/backward）滚动到交易日"""
+        days, scalar = _as_days(dates)
+        if roll == "forward":
+            positions = np.searchsorted(self.sessions, days, side="left")
+        elif roll == "backward":
+            positions = np.searchsorted(self.sessions, days, side="right") - 1
+        else:
+            raise ValueError(f"不支持的滚动方向: {roll}")
+        return self._take(positions + n, scalar)
+
+    def count_sessions(self, start, end):
+        """闭区间 [start, end] 内的交易日数"""
+        start_days, scalar = _as_days(start)
+        end_days, _ = _as_days(end)
+        counts = np.maximum(
+            np.searchsorted(self.sessions, end_days, side="right")
+            - np.searchsorted(self.sessions, start_days, side="left"),
+            0
+        )
+        return int(counts) if scalar else counts
+
+    def sessions_in_range(self, start, end) -> np.ndarray:
+        """闭区间 [start, end] 内的交易日"""
+        left = np.searchsorted(self.sessions, np.datetime64(start, "D"), side="left")
+        right = np.searchsorted(self.sessions, np.datetime64(end, "D"), side="right")
+        return self.sessions[left:right]
+
+    def is_period_end(self, dates, frequency: str):
+        """是否为所在周期（daily/weekly/monthly/quarterly/yearly）的最后一个交易日"""
+        days, scalar = _as_days(dates)
+        positions = np.searchsorted(self.sessions, days, side="right")
+        # 日历末尾之后没有交易日，视为周期结束
+        following = self.sessions[np.minimum(positions, len(self.sessions) - 1)]
+        result = (
+            self.is_session(days)
+            & ((positions >= len(self.sessions))
+               | (_period_keys(days, frequency) != _period_keys(following, frequency)))
+        )
+        return bool(result) if scalar else result
+
+    def period_ends(self, start, end, frequency: str) -> np.ndarray:
+        """区间内各周期的最后一个交易日，用于确定再平衡日"""
+        sessions = self.sessions_in_range(start, end)
+        return sessions[self.is_period_end(sessions, frequency)]
+
+    def annualization_factor(self, frequency: str = "daily") -> float:
+        """按周期计算的收益率、波动率年化时使用的每年期数"""
+        if frequency == "daily":
+            return self.sessions_per_year
+        if frequency not in PERIODS_PER_YEAR:
+            raise ValueError(f"不支持的周期: {frequency}，可选 {', '.join(FREQUENCIES)}")
+        return float(PERIODS_PER_YEAR[frequency])
+
+
+def load_holidays(path: str) -> np.ndarray:
+    """读取休市日文件"""
+    with open(path, encoding="utf-8") as f:
+        lines = [line.split("#", 1)[0].strip() for line in f]
+    return np.array([line for line in lines if line], dtype="datetime64[D]")
+
+
+# 全局交易日历，首次使用时构建
+_trading_calendar: Optional[TradingCalendar] = None
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """获取全局交易日历"""
+    global _trading_calendar
+    if _trading_calendar is None:
+        today = date.today()
+        holidays = load_holidays(TRADING_HOLIDAYS_FILE) if TRADING_HOLIDAYS_FILE else ()
+        _trading_calendar = TradingCalendar.from_weekdays(
+            CALENDAR_START,
+            today.replace(year=today.year + CALENDAR_FORWARD_YEARS, day=min(today.day, 28)),
+            holidays,
+            # 显式设置 TRADING_DAYS_PER_YEAR 时不再实测
+            sessions_per_year=DEFAULT_SESSIONS_PER_YEAR if "TRADING_DAYS_PER_YEAR" in os.environ else None
+        )
+    return _trading_calendar
@@ -0,0 +1,235 @@
+"""
+滚动前推（Walk-Forward）优化与样本外评估引擎
+
+将历史数据切分为连续的训练/测试窗口：在训练窗口上网格搜索最优参数，
+再用该参数在紧随其后的测试窗口上回测，拼接各测试窗口得到样本外权益曲线。
+各窗口相互独立，在进程池中并行执行。
+"""
+
+import os
+import asyncio
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from src.models.database import ModelPerformance
+from src.ml_models.technical_models import TECHNICAL_MODEL_CLASSES, create_technical_model
+from src.services.backtest_jobs import report_progress
+from src.services.trading_calendar import get_trading_calendar
+
+# 支持的优化目标
+OBJECTIVES = ('sharpe_ratio', 'total_return')
+
+
+def build_windows(n_bars: int, train_size: int, test_size: int,
+                  anchored: bool = False) -> List[Tuple[int, int, int, int]]:
+    """生成 (训练起点, 训练终点, 测试起点, 测试终点) 位置区间，终点不含
+
+    滚动模式下训练窗口长度固定；锚定模式下训练窗口起点固定为0、逐步扩张。
+    """
+    windows = []
+    test_start = train_size
+    while test_start < n_bars:
+        test_end = min(test_start + test_size, n_bars)
+        train_start = 0 if anchored else test_start - train_size
+        windows.append((train_start, test_start, test_start, test_end))
+        test_start = test_end
+    return windows
+
+
+def expand_param_grid(base_params: Dict[str, Any], param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """展开参数网格，未参与搜索的参数沿用基础参数"""
+    if not param_grid:
+        return [dict(base_params)]
+
+    names = list(param_grid.keys())
+    combinations = []
+    for values in itertools.product(*(param_grid[name] for name in names)):
+        params = dict(base_params)
+        params.update(zip(names, values))
+        combinations.append(params)
+    return combinations
+
+
+def compute_equity_metrics(equity: pd.Series, trades: List[Dict[str, Any]]) -> Dict[str, float]:
+    """根据权益曲线和交易记录计算绩效指标"""
+    if len(equity) < 2:
+        return {
+            'total_return': 0.0, 'annual_return': 0.0, 'volatility': 0.0,
+            'sharpe_ratio': 0.0, 'max_drawdown': 0.0, 'win_rate': 0.0, 'total_trades': len(trades)
+        }
+
+    periods_per_year = get_trading_calendar().annualization_factor()
+    values = equity.to_numpy(dtype=float)
+    returns = np.diff(values) / values[:-1]
+    total_return = values[-1] / values[0] - 1
+    annual_return = (1 + total_return) ** (periods_per_year / len(returns)) - 1
+    volatility = float(returns.std() * np.sqrt(periods_per_year))
+    sharpe_ratio = float(returns.mean() / returns.std() * np.sqrt(periods_per_year)) if returns.std() > 0 else 0.0
+
+    running_max = np.maximum.accumulate(values)
+    max_drawdown = float(((values - running_max) / running_max).min())
+
+    # 胜率: 按买入-卖出配对计算盈利的完整交易比例
+    round_trips = []
+    entry_price = None
+    for trade in trades:
+        if trade['type'] == 'BUY':
+            entry_price = trade['price']
+        elif trade['type'] == 'SELL' and entry_price is not None:
+            round_trips.append(trade['price'] > entry_price)
+            entry_price = None
+    win_rate = sum(round_trips) / len(round_trips) if round_trips else 0.0
+
+    return {
+        'total_return': float(total_return),
+        'annual_return': float(annual_return),
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'max_drawdown': max_drawdown,
+        'win_rate': float(win_rate),
+        'total_trades': len(trades)
+    }
+
+
+def _run_segment(model, data: pd.DataFrame, start_index: int,
+                 initial_capital: float) -> Tuple[pd.Series, List[Dict[str, Any]]]:
+    """在 start_index 之后的区间上回测，返回权益曲线与交易记录"""
+    result = model.backtest(data, initial_capital, start_index=start_index)
+    equity = pd.Series(
+        [initial_capital] + [position['capital'] for position in result['positions']],
+        dtype=float
+    )
+    return equity, result['trades']
+
+
+def run_window(model_type: str, model_id: int, candidates: List[Dict[str, Any]],
+               train_data: pd.DataFrame, test_data: pd.DataFrame,
+               objective: str, initial_capital: float) -> Dict[str, Any]:
+    """执行单个窗口: 训练区间选参，测试区间样本外回测
+
+    模块级函数，供进程池调用。
+    """
+    best_params, best_score, best_train_metrics = None, None, None
+    for params in candidates:
+        model = create_technical_model(model_type, model_id, params)
+        if model is None:
+            continue
+        equity, trades = _run_segment(model, train_data, 0, initial_capital)
+        metrics = compute_equity_metrics(equity, trades)
+        if best_score is None or metrics[objective] > best_score:
+            best_params, best_score, best_train_metrics = params, metrics[objective], metrics
+
+    if best_params is None:
+        raise ValueError("参数网格中没有有效的参数组合")
+
+    # 测试区间前拼接训练数据作为指标预热，交易只发生在测试区间
+    model = create_technical_model(model_type, model_id, best_params)
+    combined = pd.concat([train_data, test_data], ignore_index=True)
+    equity, trades = _run_segment(model, combined, len(train_data), initial_capital)
+
+    return {
+        'train_start': train_data['trade_date'].iloc[0],
+        'train_end': train_data['trade_date'].iloc[-1],
+        'test_start': test_data['trade_date'].iloc[0],
+        'test_end': test_data['trade_date'].iloc[-1],
+        'best_params': best_params,
+        'train_metrics': best_train_metrics,
+        'test_metrics': compute_equity_metrics(equity, trades),
+        'test_dates': list(test_data['trade_date']),
+        'test_equity': equity.iloc[1:].tolist(),
+        'trades': trades
+    }
+
+
+class WalkForwardEngine:
+    """滚动前推优化引擎"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("WALK_FORWARD_WORKERS", str(os.cpu_count() or 1)))
+
+    async def run(self, model_type: str, model_id: int, data: pd.DataFrame,
+                  base_params: Dict[str, Any], param_grid: Dict[str, List[Any]],
+                  train_window: int, test_window: int, anchored: bool = False,
+                  objective: str = 'sharpe_ratio', initial_capital: float = 100000) -> Dict[str, Any]:
+        """执行滚动前推评估，返回各窗口结果与拼接后的样本外权益曲线"""
+        if model_type not in TECHNICAL_MODEL_CLASSES:
+            raise ValueError(f"不支持的模型类型: {model_type}")
+        if objective not in OBJECTIVES:
+            raise ValueError(f"不支持的优化目标: {objective}")
+
+        data = data.reset_index(drop=True)
+        windows = build_windows(len(data), train_window, test_window, anchored)
+        if not windows:
+            raise ValueError(f"数据不足: 至少需要 {train_window + 1} 个交易日")
+
+        candidates = expand_param_grid(base_params, param_grid)
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(windows))) as executor:
+            futures = [
+                loop.run_in_executor(
+                    executor, run_window, model_type, model_id, candidates,
+                    data.iloc[train_start:train_end], data.iloc[test_start:test_end],
+                    objective, initial_capital
+                )
+                for train_start, train_end, test_start, test_end in windows
+            ]
+            for completed, future in enumerate(asyncio.as_completed(futures), start=1):
+                await future
+                await report_progress(completed / len(futures), f"已完成 {completed}/{len(futures)} 个窗口")
+            window_results = [future.result() for future in futures]
+
+        return self._stitch(window_results, initial_capital)
+
+    def _stitch(self, window_results: List[Dict[str, Any]], initial_capital: float) -> Dict[str, Any]:
+        """按复利拼接各测试窗口的权益曲线"""
+        equity_curve = []
+        all_trades = []
+        current_value = initial_capital
+        windows = []
+
+        for result in window_results:
+            scale = current_value / initial_capital
+            for trade_date, value in zip(result['test_dates'], result['test_equity']):
+                equity_curve.append({"date": trade_date, "value": value * scale})
+            if equity_curve:
+                current_value = equity_curve[-1]["value"]
+            all_trades.extend(result['trades'])
+            windows.append({
+                key: result[key]
+                for key in ('train_start', 'train_end', 'test_start', 'test_end',
+                            'best_params', 'train_metrics', 'test_metrics')
+            })
+
+        equity = pd.Series([initial_capital] + [point["value"] for point in equity_curve])
+        return {
+            "windows": windows,
+            "out_of_sample_metrics": compute_equity_metrics(equity, all_trades),
+            "equity_curve": equity_curve,
+            "trades": all_trades
+        }
+
+
+async def save_walk_forward_performance(session: AsyncSession, model_id: int,
+                                        backtest_date: date, metrics: Dict[str, float]) -> None:
+    """将样本外绩效写入模型性能表，同一日期重复评估时覆盖"""
+    values = {
+        'model_id': model_id,
+        'backtest_date': backtest_date,
+        'accuracy': round(metrics['win_rate'], 4),
+        'total_return': round(metrics['total_return'], 4),
+        'sharpe_ratio': round(metrics['sharpe_ratio'], 4),
+        'max_drawdown': round(metrics['max_drawdown'], 4)
+    }
+    stmt = insert(ModelPerformance).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['model_id', 'backtest_date'],
+        set_={key: stmt.excluded[key] for key in ('accuracy', 'total_return', 'sharpe_ratio', 'max_drawdown')}
+    )
+    await session.execute(stmt)
+    await session.commit()
@@ -107,5 +107,12 @@ CREATE INDEX IF NOT EXISTS idx_final_decisions_decision ON final_decisions(final
 CREATE INDEX IF NOT EXISTS idx_performance_model_date ON model_performance(model_id, backtest_date);
 CREATE INDEX IF NOT EXISTS idx_performance_date ON model_performance(backtest_date);
 
+-- 创建结构版本表，迁移脚本执行后登记各自的编号，应用启动时据此校验结构版本
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- 输出创建结果
 SELECT '数据库表结构创建完成' as message;
\ No newline at end of file
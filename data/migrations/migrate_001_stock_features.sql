@@ -0,0 +1,24 @@
+-- 迁移 001: 技术指标特征表
+-- 按 (股票, 交易日) 存储模型所需的预计算指标，随新行情增量更新
+
+CREATE TABLE IF NOT EXISTS stock_features (
+    id BIGSERIAL PRIMARY KEY,
+    stock_id BIGINT NOT NULL REFERENCES stocks(id) ON DELETE CASCADE,
+    trade_date DATE NOT NULL,
+    features JSONB NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_feature_stock_date UNIQUE (stock_id, trade_date)
+);
+
+COMMENT ON COLUMN stock_features.features IS '指标名称到数值的映射';
+
+-- 登记结构版本
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO schema_migrations (version, name) VALUES (1, 'stock_features')
+ON CONFLICT (version) DO NOTHING;
+
+SELECT '技术指标特征表创建完成' as message;
@@ -0,0 +1,36 @@
+-- 迁移 002: 回测运行记录表
+-- 保存每次回测的参数、指标、交易记录和权益曲线，权益曲线以差分编码后压缩的二进制数组存储
+
+CREATE TABLE IF NOT EXISTS backtest_runs (
+    id BIGSERIAL PRIMARY KEY,
+    run_type VARCHAR(20) NOT NULL,
+    symbol VARCHAR(20),
+    model_id BIGINT REFERENCES backtest_models(id) ON DELETE SET NULL,
+    start_date DATE,
+    end_date DATE,
+    parameters JSONB NOT NULL,
+    metrics JSONB NOT NULL,
+    trades JSONB NOT NULL,
+    equity_points INTEGER NOT NULL DEFAULT 0,
+    equity_dates BYTEA,
+    equity_values BYTEA,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_backtest_runs_symbol ON backtest_runs(symbol, created_at);
+CREATE INDEX IF NOT EXISTS idx_backtest_runs_model ON backtest_runs(model_id, created_at);
+
+COMMENT ON COLUMN backtest_runs.run_type IS '回测类型: model/portfolio/walk-forward';
+COMMENT ON COLUMN backtest_runs.equity_dates IS '差分编码并压缩的权益曲线日期（int32 天数）';
+COMMENT ON COLUMN backtest_runs.equity_values IS '差分编码并压缩的权益曲线数值（int64 万分之一定点数）';
+
+-- 登记结构版本
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO schema_migrations (version, name) VALUES (2, 'backtest_runs')
+ON CONFLICT (version) DO NOTHING;
+
+SELECT '回测运行记录表创建完成' as message;
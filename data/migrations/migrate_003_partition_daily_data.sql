@@ -0,0 +1,86 @@
+-- 迁移 003: 日线数据按年份分区
+-- stock_daily_data 改为按 trade_date 年份的声明式范围分区表；
+-- 唯一约束 (stock_id, trade_date) 同时服务于按股票查询，日期扫描改用 BRIN 索引，
+-- 删除重复的 B-tree 索引 idx_daily_data_stock_date / idx_daily_data_stock / idx_daily_data_date。
+-- 已分区时跳过，可重复执行。
+--
+-- 已结束的年份可整理或分离归档（在 backend 目录下）:
+--   python -m src.services.partitions compact --year 2015
+--   python -m src.services.partitions detach --year 2005
+
+DO $$
+DECLARE
+    first_year INTEGER;
+    last_year INTEGER;
+    y INTEGER;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('stock_daily_data')) = 'p' THEN
+        RAISE NOTICE 'stock_daily_data 已是分区表，跳过';
+        RETURN;
+    END IF;
+
+    -- 旧表改名，释放约束与索引名称；序列改为不随旧表删除
+    ALTER TABLE stock_daily_data RENAME TO stock_daily_data_legacy;
+    ALTER SEQUENCE stock_daily_data_id_seq OWNED BY NONE;
+    ALTER TABLE stock_daily_data_legacy DROP CONSTRAINT IF EXISTS uq_stock_date;
+    ALTER TABLE stock_daily_data_legacy DROP CONSTRAINT IF EXISTS stock_daily_data_pkey;
+    DROP INDEX IF EXISTS idx_daily_data_stock_date;
+    DROP INDEX IF EXISTS idx_daily_data_stock;
+    DROP INDEX IF EXISTS idx_daily_data_date;
+
+    CREATE TABLE stock_daily_data (
+        id BIGINT NOT NULL DEFAULT nextval('stock_daily_data_id_seq'),
+        stock_id BIGINT NOT NULL REFERENCES stocks(id) ON DELETE CASCADE,
+        trade_date DATE NOT NULL,
+        open_price NUMERIC(10,4),
+        high_price NUMERIC(10,4),
+        low_price NUMERIC(10,4),
+        close_price NUMERIC(10,4),
+        volume BIGINT,
+        turnover NUMERIC(15,2),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, trade_date),
+        CONSTRAINT uq_stock_date UNIQUE (stock_id, trade_date)
+    ) PARTITION BY RANGE (trade_date);
+
+    ALTER SEQUENCE stock_daily_data_id_seq OWNED BY stock_daily_data.id;
+
+    -- 与 models/database.py 中 DAILY_DATA_FIRST_DATE 的年份一致，已有更早的数据时从其年份开始
+    SELECT LEAST(1990, COALESCE(EXTRACT(YEAR FROM MIN(trade_date))::INTEGER, 1990)),
+           GREATEST(EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER + 1,
+                    COALESCE(EXTRACT(YEAR FROM MAX(trade_date))::INTEGER, 0))
+      INTO first_year, last_year
+      FROM stock_daily_data_legacy;
+
+    FOR y IN first_year..last_year LOOP
+        EXECUTE format(
+            'CREATE TABLE stock_daily_data_y%s PARTITION OF stock_daily_data FOR VALUES FROM (%L) TO (%L)',
+            y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+        );
+    END LOOP;
+    CREATE TABLE stock_daily_data_default PARTITION OF stock_daily_data DEFAULT;
+
+    CREATE INDEX idx_daily_data_date_brin ON stock_daily_data USING BRIN (trade_date);
+
+    INSERT INTO stock_daily_data (id, stock_id, trade_date, open_price, high_price, low_price,
+                                  close_price, volume, turnover, created_at)
+    SELECT id, stock_id, trade_date, open_price, high_price, low_price,
+           close_price, volume, turnover, created_at
+    FROM stock_daily_data_legacy
+    ORDER BY trade_date, stock_id;
+
+    DROP TABLE stock_daily_data_legacy;
+END $$;
+
+ANALYZE stock_daily_data;
+
+-- 登记结构版本
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO schema_migrations (version, name) VALUES (3, 'partition_daily_data')
+ON CONFLICT (version) DO NOTHING;
+
+SELECT '日线数据分区迁移完成' as message;
@@ -0,0 +1,181 @@
+-- 迁移 004: 决策表按月分区与汇总表
+-- model_decisions / final_decisions 改为按 trade_date 月份的声明式范围分区表，
+-- 覆盖已有数据至两个月后，其余数据进入默认分区。已分区的表跳过，可重复执行。
+-- 超过保留期的月份汇总到 *_rollups 后删除明细（在 backend 目录下，建议每月执行）:
+--   python -m src.services.partitions rollup --retention-months 24
+
+-- 模型决策按月汇总
+CREATE TABLE IF NOT EXISTS model_decision_rollups (
+    id BIGSERIAL PRIMARY KEY,
+    stock_id BIGINT NOT NULL REFERENCES stocks(id) ON DELETE CASCADE,
+    model_id BIGINT NOT NULL REFERENCES backtest_models(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    buy_count INTEGER NOT NULL DEFAULT 0,
+    sell_count INTEGER NOT NULL DEFAULT 0,
+    hold_count INTEGER NOT NULL DEFAULT 0,
+    avg_confidence NUMERIC(5,4),
+    avg_signal_strength NUMERIC(5,4),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_model_rollup_stock_model_month UNIQUE (stock_id, model_id, month)
+);
+
+-- 综合决策按月汇总
+CREATE TABLE IF NOT EXISTS final_decision_rollups (
+    id BIGSERIAL PRIMARY KEY,
+    stock_id BIGINT NOT NULL REFERENCES stocks(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    trading_days INTEGER NOT NULL DEFAULT 0,
+    buy_days INTEGER NOT NULL DEFAULT 0,
+    sell_days INTEGER NOT NULL DEFAULT 0,
+    hold_days INTEGER NOT NULL DEFAULT 0,
+    avg_confidence NUMERIC(5,4),
+    first_trade_date DATE,
+    last_trade_date DATE,
+    last_decision VARCHAR(10),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_final_rollup_stock_month UNIQUE (stock_id, month)
+);
+
+COMMENT ON COLUMN model_decision_rollups.month IS '月份首日';
+COMMENT ON COLUMN final_decision_rollups.month IS '月份首日';
+COMMENT ON COLUMN final_decision_rollups.last_decision IS '当月最后一个交易日的决策';
+
+-- 为分区表创建覆盖 [first_month, last_month] 的月份分区与默认分区
+CREATE OR REPLACE FUNCTION pg_temp.create_monthly_partitions(parent TEXT, first_month DATE, last_month DATE)
+RETURNS VOID AS $$
+DECLARE
+    m DATE := date_trunc('month', first_month)::date;
+BEGIN
+    WHILE m <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            parent || '_m' || to_char(m, 'YYYYMM'), parent, m, (m + INTERVAL '1 month')::date
+        );
+        m := (m + INTERVAL '1 month')::date;
+    END LOOP;
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I DEFAULT', parent || '_default', parent);
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    first_month DATE;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + INTERVAL '2 months')::date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('model_decisions')) = 'p' THEN
+        RAISE NOTICE 'model_decisions 已是分区表，跳过';
+        RETURN;
+    END IF;
+
+    ALTER TABLE model_decisions RENAME TO model_decisions_legacy;
+    ALTER SEQUENCE model_decisions_id_seq OWNED BY NONE;
+    ALTER TABLE model_decisions_legacy DROP CONSTRAINT IF EXISTS model_decisions_pkey;
+    ALTER TABLE model_decisions_legacy DROP CONSTRAINT IF EXISTS uq_stock_model_date;
+    DROP INDEX IF EXISTS idx_model_decisions_stock_date;
+    DROP INDEX IF EXISTS idx_model_decisions_model_date;
+    DROP INDEX IF EXISTS idx_model_decisions_decision;
+
+    CREATE TABLE model_decisions (
+        id BIGINT NOT NULL DEFAULT nextval('model_decisions_id_seq'),
+        stock_id BIGINT NOT NULL REFERENCES stocks(id) ON DELETE CASCADE,
+        model_id BIGINT NOT NULL REFERENCES backtest_models(id) ON DELETE CASCADE,
+        trade_date DATE NOT NULL,
+        decision VARCHAR(10) NOT NULL,
+        confidence NUMERIC(5,4),
+        signal_strength NUMERIC(5,4),
+        reasoning TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, trade_date),
+        CONSTRAINT uq_stock_model_date UNIQUE (stock_id, model_id, trade_date),
+        CONSTRAINT chk_decision_type CHECK (decision IN ('BUY', 'SELL', 'HOLD')),
+        CONSTRAINT chk_confidence_range CHECK (confidence >= 0 AND confidence <= 1),
+        CONSTRAINT chk_signal_range CHECK (signal_strength >= 0 AND signal_strength <= 1)
+    ) PARTITION BY RANGE (trade_date);
+    ALTER SEQUENCE model_decisions_id_seq OWNED BY model_decisions.id;
+
+    SELECT LEAST(COALESCE(MIN(trade_date), CURRENT_DATE), (CURRENT_DATE - INTERVAL '12 months')::date)
+      INTO first_month FROM model_decisions_legacy;
+    PERFORM pg_temp.create_monthly_partitions('model_decisions', first_month,
+                                              GREATEST(last_month, (SELECT MAX(trade_date) FROM model_decisions_legacy)));
+
+    CREATE INDEX idx_model_decisions_stock_date ON model_decisions(stock_id, trade_date);
+    CREATE INDEX idx_model_decisions_model_date ON model_decisions(model_id, trade_date);
+
+    INSERT INTO model_decisions (id, stock_id, model_id, trade_date, decision, confidence,
+                                 signal_strength, reasoning, created_at)
+    SELECT id, stock_id, model_id, trade_date, decision, confidence,
+           signal_strength, reasoning, created_at
+    FROM model_decisions_legacy
+    ORDER BY trade_date, stock_id;
+
+    DROP TABLE model_decisions_legacy;
+END $$;
+
+DO $$
+DECLARE
+    first_month DATE;
+    last_month DATE := (date_trunc('month', CURRENT_DATE) + INTERVAL '2 months')::date;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = to_regclass('final_decisions')) = 'p' THEN
+        RAISE NOTICE 'final_decisions 已是分区表，跳过';
+        RETURN;
+    END IF;
+
+    ALTER TABLE final_decisions RENAME TO final_decisions_legacy;
+    ALTER SEQUENCE final_decisions_id_seq OWNED BY NONE;
+    ALTER TABLE final_decisions_legacy DROP CONSTRAINT IF EXISTS final_decisions_pkey;
+    ALTER TABLE final_decisions_legacy DROP CONSTRAINT IF EXISTS uq_final_stock_date;
+    DROP INDEX IF EXISTS idx_final_decisions_stock_date;
+    DROP INDEX IF EXISTS idx_final_decisions_date;
+    DROP INDEX IF EXISTS idx_final_decisions_decision;
+
+    CREATE TABLE final_decisions (
+        id BIGINT NOT NULL DEFAULT nextval('final_decisions_id_seq'),
+        stock_id BIGINT NOT NULL REFERENCES stocks(id) ON DELETE CASCADE,
+        trade_date DATE NOT NULL,
+        buy_votes INTEGER,
+        sell_votes INTEGER,
+        hold_votes INTEGER,
+        final_decision VARCHAR(10),
+        confidence_score NUMERIC(5,4),
+        risk_level VARCHAR(20),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (id, trade_date),
+        CONSTRAINT uq_final_stock_date UNIQUE (stock_id, trade_date),
+        CONSTRAINT chk_final_decision_type CHECK (final_decision IN ('BUY', 'SELL', 'HOLD')),
+        CONSTRAINT chk_final_confidence_range CHECK (confidence_score >= 0 AND confidence_score <= 1),
+        CONSTRAINT chk_risk_level CHECK (risk_level IN ('LOW', 'MEDIUM', 'HIGH'))
+    ) PARTITION BY RANGE (trade_date);
+    ALTER SEQUENCE final_decisions_id_seq OWNED BY final_decisions.id;
+
+    SELECT LEAST(COALESCE(MIN(trade_date), CURRENT_DATE), (CURRENT_DATE - INTERVAL '12 months')::date)
+      INTO first_month FROM final_decisions_legacy;
+    PERFORM pg_temp.create_monthly_partitions('final_decisions', first_month,
+                                              GREATEST(last_month, (SELECT MAX(trade_date) FROM final_decisions_legacy)));
+
+    -- 决策列表按 (trade_date, id) 倒序分页，唯一约束覆盖按股票查询
+    CREATE INDEX idx_final_decisions_date_id ON final_decisions(trade_date, id);
+
+    INSERT INTO final_decisions (id, stock_id, trade_date, buy_votes, sell_votes, hold_votes,
+                                 final_decision, confidence_score, risk_level, created_at)
+    SELECT id, stock_id, trade_date, buy_votes, sell_votes, hold_votes,
+           final_decision, confidence_score, risk_level, created_at
+    FROM final_decisions_legacy
+    ORDER BY trade_date, stock_id;
+
+    DROP TABLE final_decisions_legacy;
+END $$;
+
+ANALYZE model_decisions;
+ANALYZE final_decisions;
+
+-- 登记结构版本
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO schema_migrations (version, name) VALUES (4, 'partition_decisions')
+ON CONFLICT (version) DO NOTHING;
+
+SELECT '决策表分区迁移完成' as message;
@@ -0,0 +1,53 @@
+-- 迁移 005: 最新K线快照表
+-- 每只股票保存最新一根日线，日线写入时在同一事务内按日线表重算；
+-- GET /stocks/latest?symbols=... 一次按主键批量读取，不再逐只排序日线表。
+
+CREATE TABLE IF NOT EXISTS latest_bars (
+    stock_id BIGINT PRIMARY KEY REFERENCES stocks(id) ON DELETE CASCADE,
+    daily_data_id BIGINT NOT NULL,
+    trade_date DATE NOT NULL,
+    open_price NUMERIC(10,4),
+    high_price NUMERIC(10,4),
+    low_price NUMERIC(10,4),
+    close_price NUMERIC(10,4),
+    volume BIGINT,
+    turnover NUMERIC(15,2),
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON COLUMN latest_bars.daily_data_id IS '对应 stock_daily_data.id';
+COMMENT ON COLUMN latest_bars.created_at IS '对应日线记录的创建时间';
+
+-- 由现有日线回填，可重复执行
+INSERT INTO latest_bars (
+    stock_id, daily_data_id, trade_date, open_price, high_price, low_price,
+    close_price, volume, turnover, created_at
+)
+SELECT DISTINCT ON (stock_id)
+    stock_id, id, trade_date, open_price, high_price, low_price,
+    close_price, volume, turnover, created_at
+FROM stock_daily_data
+ORDER BY stock_id, trade_date DESC
+ON CONFLICT (stock_id) DO UPDATE SET
+    daily_data_id = EXCLUDED.daily_data_id,
+    trade_date = EXCLUDED.trade_date,
+    open_price = EXCLUDED.open_price,
+    high_price = EXCLUDED.high_price,
+    low_price = EXCLUDED.low_price,
+    close_price = EXCLUDED.close_price,
+    volume = EXCLUDED.volume,
+    turnover = EXCLUDED.turnover,
+    created_at = EXCLUDED.created_at,
+    updated_at = CURRENT_TIMESTAMP;
+
+-- 登记结构版本
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO schema_migrations (version, name) VALUES (5, 'latest_bars')
+ON CONFLICT (version) DO NOTHING;
+
+SELECT '最新K线快照表创建完成' as message;
@@ -20,9 +20,9 @@ ON CONFLICT (symbol) DO NOTHING;
 
 -- 插入回测模型数据
 INSERT INTO backtest_models (name, description, model_type, parameters, weight, is_active) VALUES
-('移动平均线策略', '基于双移动平均线的趋势跟踪策略', 'technical', '{"fast_period": 5, "slow_period": 20, "threshold": 0.02}', 0.30, true),
-('RSI策略', '基于相对强弱指数的超买超卖策略', 'technical', '{"period": 14, "overbought": 70, "oversold": 30}', 0.25, true),
-('MACD策略', '基于MACD指标的趋势判断策略', 'technical', '{"fast_period": 12, "slow_period": 26, "signal_period": 9}', 0.25, true),
+('移动平均线策略', '基于双移动平均线的趋势跟踪策略', 'technical', '{"implementation": "moving_average_crossover", "short_window": 5, "long_window": 20}', 0.30, true),
+('RSI策略', '基于相对强弱指数的超买超卖策略', 'technical', '{"implementation": "rsi_model", "period": 14, "overbought": 70, "oversold": 30}', 0.25, true),
+('MACD策略', '基于MACD指标的趋势判断策略', 'technical', '{"implementation": "macd_model", "fast_period": 12, "slow_period": 26, "signal_period": 9}', 0.25, true),
 ('布林带策略', '基于布林带的价格突破策略', 'technical', '{"period": 20, "std_dev": 2}', 0.20, true),
 ('随机森林分类器', '基于随机森林的股票涨跌分类模型', 'ml', '{"n_estimators": 100, "max_depth": 10, "random_state": 42}', 0.40, true),
 ('梯度提升树', '基于XGBoost的回归预测模型', 'ml', '{"n_estimators": 200, "learning_rate": 0.1, "max_depth": 6}', 0.35, true),